@@ -0,0 +1,306 @@
+"""
+Set-based outcome resolution inside Postgres.
+
+report._student_outcome decides each student's career outcome in Python,
+so every count used to mean shipping the whole cohort's payloads to the
+app. This module installs the same precedence rules as SQL functions —
+
+  analytics.map_status(text)              STATUS_TO_OUTCOME substring mapping
+  analytics.term_cutoff(text)             Phase 1 cutoff (report._get_term_cutoff)
+  analytics.student_outcome(uid, term)    report._student_outcome
+  analytics.student_outcomes              view: demographics rows + outcome
+
+— so outcome tables and placement / knowledge rates can be a GROUP BY in
+the database. The mapping CASE is generated from report.STATUS_TO_OUTCOME,
+so the two implementations share one table; `parity` checks they agree.
+
+    python migrations.py apply     # installs these objects with the indexes
+    python analytics.py parity     # compare SQL and Python, student by student
+"""
+
+import argparse
+import sys
+from collections import Counter
+
+from psycopg import sql
+
+import database
+import report
+
+# Characters str.strip() removes that btrim() does not by default
+_STRIP_CHARS = " \t\n\r\f\v"
+
+
+def _map_status_sql():
+    """CREATE FUNCTION analytics.map_status — first matching key wins, as in report._map_status."""
+    cases = sql.SQL("\n        ").join(
+        sql.SQL("WHEN strpos(lower(status), {}) > 0 THEN {}").format(
+            sql.Literal(key), sql.Literal(label)
+        )
+        for key, label in report.STATUS_TO_OUTCOME.items()
+    )
+    return sql.SQL("""
+        CREATE OR REPLACE FUNCTION analytics.map_status(status text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+            SELECT CASE
+                {cases}
+                ELSE 'Unresolved'
+            END
+        $fn$
+    """).format(cases=cases)
+
+
+_TERM_CUTOFF_SQL = r"""
+    CREATE OR REPLACE FUNCTION analytics.term_cutoff(term text) RETURNS timestamp
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $fn$
+        SELECT CASE m[1]
+            WHEN 'summer' THEN make_timestamp(m[2]::int,     12, 1, 0, 0, 0)
+            WHEN 'fall'   THEN make_timestamp(m[2]::int + 1,  4, 1, 0, 0, 0)
+            WHEN 'spring' THEN make_timestamp(m[2]::int,      9, 1, 0, 0, 0)
+            WHEN 'winter' THEN make_timestamp(m[2]::int,      4, 1, 0, 0, 0)
+        END
+        FROM regexp_match(lower(term), '(spring|summer|fall|winter)\s+(\d{4})') AS m
+    $fn$
+"""
+
+# Steps mirror report._resolve_outcome: Qualtrics STATUS → LinkedIn status /
+# field presence → Clearinghouse → master outcome_status → Phase 1 cutoff.
+# "First" source rows use the same ordering as database._source_queries.
+_STUDENT_OUTCOME_SQL = """
+    CREATE OR REPLACE FUNCTION analytics.student_outcome(p_uid {uid_type}, p_term text)
+    RETURNS text
+    LANGUAGE sql STABLE AS $fn$
+        SELECT CASE
+            WHEN q.status <> '' AND analytics.map_status(q.status) <> 'Unresolved'
+                THEN analytics.map_status(q.status)
+            WHEN li.status <> '' AND analytics.map_status(li.status) <> 'Unresolved'
+                THEN analytics.map_status(li.status)
+            WHEN coalesce(li.payload->>'name_of_employer', '') <> ''
+              OR coalesce(li.payload->>'job_title', '') <> ''
+                THEN 'Employed full-time'
+            WHEN coalesce(li.payload->>'continuing_education_institution', '') <> ''
+                THEN 'Continuing education'
+            WHEN coalesce(li.payload->>'joined_military_branch', '') <> ''
+                THEN 'Serving in the U.S. Armed Forces'
+            WHEN coalesce(li.payload->>'volunteer_organization', '') <> ''
+                THEN 'Volunteering or service program'
+            WHEN coalesce(li.payload->>'name_of_started_business', '') <> ''
+                THEN 'Starting a business'
+            WHEN EXISTS (SELECT 1 FROM src.src_clearinghouse_record c WHERE c.student_key = p_uid)
+                THEN 'Continuing education'
+            WHEN coalesce(m.outcome_status, '') <> ''
+                THEN m.outcome_status
+            WHEN q.recorded_at::timestamp >= analytics.term_cutoff(p_term)
+                THEN 'Unplaced'
+            ELSE 'Unresolved'
+        END
+        FROM (SELECT 1) AS one
+        LEFT JOIN LATERAL (
+            SELECT btrim(coalesce(r.payload->>'STATUS', ''), {strip}) AS status, r.recorded_at
+            FROM src.src_qualtrics_response r
+            WHERE r.student_key = p_uid
+            ORDER BY r.recorded_at DESC NULLS LAST, r.id DESC
+            LIMIT 1
+        ) AS q ON true
+        LEFT JOIN LATERAL (
+            SELECT btrim(coalesce(p.payload->>'status', ''), {strip}) AS status, p.payload
+            FROM src.src_linkedin_position p
+            WHERE p.student_key = p_uid
+            ORDER BY p.id DESC
+            LIMIT 1
+        ) AS li ON true
+        LEFT JOIN analytics.master_graduate_outcomes m
+            ON m.student_id = p_uid AND m.graduation_term = p_term
+    $fn$
+"""
+
+# One row per database._DEMO_SELECT row (same DISTINCT columns), uid kept on
+# its native type so student_outcome's key lookups can use the indexes
+_STUDENTS_SQL = """
+    SELECT DISTINCT
+        d.uid,
+        d.term,
+        d.payload->>'name'            AS name,
+        d.payload->>'email_address'   AS email,
+        d.payload->>'major1_major'    AS major,
+        d.payload->>'major1_coll'     AS school
+    FROM src.src_demographics d
+    WHERE {where_clause}
+"""
+
+_VIEW_SQL = f"""
+    CREATE OR REPLACE VIEW analytics.student_outcomes AS
+    SELECT s.uid::text AS uid, s.term, s.name, s.email, s.major, s.school,
+           analytics.student_outcome(s.uid, s.term) AS outcome
+    FROM ({_STUDENTS_SQL.format(where_clause="d.uid IS NOT NULL")}) AS s
+"""
+
+
+def _uid_type(cur):
+    cur.execute("""
+        SELECT format_type(atttypid, atttypmod) AS type
+        FROM pg_attribute
+        WHERE attrelid = 'src.src_demographics'::regclass AND attname = 'uid'
+    """)
+    return cur.fetchone()["type"]
+
+
+def apply(cur):
+    """Create or replace the outcome functions and view (called by migrations.apply)."""
+    cur.execute(_map_status_sql())
+    cur.execute(_TERM_CUTOFF_SQL)
+    cur.execute(sql.SQL(_STUDENT_OUTCOME_SQL).format(
+        uid_type=sql.SQL(_uid_type(cur)), strip=sql.Literal(_STRIP_CHARS),
+    ))
+    cur.execute(_VIEW_SQL)
+    print("  ensured  analytics.student_outcome / analytics.student_outcomes")
+
+
+def _outcome_counts_query(major_filter=None, school_filter=None, term_filter=None):
+    """SQL + params: students per resolved outcome for the report filters."""
+    where_clause, params = database._build_demo_where(
+        None, major_filter, school_filter, term_filter, None
+    )
+    query = f"""
+        SELECT analytics.student_outcome(s.uid, s.term) AS outcome, count(*) AS n
+        FROM ({_STUDENTS_SQL.format(where_clause=where_clause)}) AS s
+        GROUP BY 1
+    """
+    return query, params
+
+
+def get_outcome_counts(major_filter=None, school_filter=None, term_filter=None) -> dict:
+    """{outcome: students} resolved and counted inside Postgres."""
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(*_outcome_counts_query(major_filter, school_filter, term_filter))
+            return {row["outcome"]: row["n"] for row in cur.fetchall()}
+
+
+def outcome_summary(major_filter=None, school_filter=None, term_filter=None) -> dict:
+    """
+    The report's outcome table, placement / workforce rates and knowledge
+    rate, from a GROUP BY instead of the full cohort. Rates go through the
+    report's own _Outcomes accumulator so the formulas cannot drift.
+    """
+    counts = get_outcome_counts(major_filter, school_filter, term_filter)
+    total_graduates = sum(counts.values())
+    known_count = total_graduates - counts.get("Unresolved", 0)
+
+    outcomes = report._Outcomes()
+    outcomes.not_seeking = counts.pop("NOT seeking", 0)
+    outcomes.counts.update(counts)
+
+    return {
+        "totals": {
+            "total_graduates": total_graduates,
+            "known_count":     known_count,
+            "knowledge_rate":  round(known_count / total_graduates * 100, 1) if total_graduates else 0,
+        },
+        "outcomes": outcomes.result(),
+    }
+
+
+# ── Parity check ──────────────────────────────────────────────────────────────
+
+_EDGE_STATUSES = [
+    "", "  ", "Employed Full-Time", "  employed part-time\t", "EMPLOYED FULL-TIME (40+ hrs)",
+    "Not seeking employment or continuing education", "Actively seeking employment",
+    "Applied to graduate school", "Something else entirely",
+]
+_EDGE_TERMS = ["Spring 2024", "Summer 2023", "FALL 2022", "Winter 2025", "fall  2021",
+               "Term 2024", "", "2024 Spring", "Fall 2024 (late)"]
+
+
+def _check_scalars(cur) -> bool:
+    """map_status / term_cutoff against their Python twins on literal and stored inputs."""
+    cur.execute("SELECT DISTINCT btrim(coalesce(payload->>'STATUS', ''), %s) AS s "
+                "FROM src.src_qualtrics_response", (_STRIP_CHARS,))
+    statuses = set(_EDGE_STATUSES) | set(report.STATUS_TO_OUTCOME) | {r["s"] for r in cur.fetchall()}
+    terms = set(_EDGE_TERMS) | set(database.get_distinct_terms())
+
+    mismatches = []
+    for status in sorted(statuses):
+        cur.execute("SELECT analytics.map_status(%s) AS v", (status.strip(),))
+        expected = report._map_status(status.strip())
+        if cur.fetchone()["v"] != expected:
+            mismatches.append(f"map_status({status!r})")
+    for term in sorted(terms):
+        cur.execute("SELECT analytics.term_cutoff(%s) AS v", (term,))
+        if cur.fetchone()["v"] != report._get_term_cutoff(term):
+            mismatches.append(f"term_cutoff({term!r})")
+
+    checked = len(statuses) + len(terms)
+    print(f"  {'ok  ' if not mismatches else 'FAIL'} scalar functions        "
+          f"{checked - len(mismatches)}/{checked} inputs agree")
+    for m in mismatches[:20]:
+        print(f"       {m}")
+    return not mismatches
+
+
+def _check_students(cur) -> bool:
+    """Every student's SQL outcome against report._student_outcome."""
+    cur.execute("SELECT uid, term, outcome FROM analytics.student_outcomes")
+    in_sql = Counter((r["uid"], r["term"], r["outcome"]) for r in cur.fetchall())
+    in_python = Counter(
+        (s["uid"], s["term"], report._student_outcome(s))
+        for s in database.iter_students_with_data()
+    )
+    diff = (in_sql - in_python) + (in_python - in_sql)
+    total = sum(in_python.values())
+    print(f"  {'ok  ' if not diff else 'FAIL'} per-student outcome     "
+          f"{total - sum((in_python - in_sql).values())}/{total} students agree")
+    for (uid, term, outcome), _ in sorted(diff.items())[:20]:
+        side = "sql" if (uid, term, outcome) in in_sql else "python"
+        print(f"       {side:6} {uid} {term}: {outcome}")
+    return not diff
+
+
+def _check_summaries() -> bool:
+    """outcome_summary against the full report for a few filter combinations."""
+    terms = database.get_distinct_terms()
+    schools = database.get_distinct_values("major1_coll")
+    cases = [(None, None, None)]
+    cases += [(None, None, [t]) for t in terms[:3]]
+    cases += [(None, s, None) for s in schools[:3]]
+
+    ok = True
+    for major, school, term in cases:
+        full = report._aggregate_students(
+            database.iter_students_with_data(major_filter=major, school_filter=school, term_filter=term)
+        )
+        summary = outcome_summary(major, school, term)
+        expected = {
+            "totals":   {k: full["totals"][k] for k in summary["totals"]},
+            "outcomes": full["outcomes"],
+        }
+        passed = summary == expected
+        ok = ok and passed
+        label = f"summary {school or ', '.join(term or []) or 'all'}"
+        print(f"  {'ok  ' if passed else 'FAIL'} {label:24} "
+              f"{summary['totals']['total_graduates']} students")
+    return ok
+
+
+def parity() -> bool:
+    """Compare the SQL outcome functions with report.py; True if everything agrees."""
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT to_regprocedure('analytics.map_status(text)') IS NOT NULL AS ok")
+            if not cur.fetchone()["ok"]:
+                print("  FAIL analytics functions missing — run `python migrations.py apply`")
+                return False
+            ok = _check_scalars(cur)
+            ok = _check_students(cur) and ok
+    return _check_summaries() and ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL outcome resolution")
+    parser.add_argument("command", choices=["parity"])
+    parser.parse_args()
+    sys.exit(0 if parity() else 1)
+
+
+if __name__ == "__main__":
+    main()
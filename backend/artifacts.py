@@ -0,0 +1,252 @@
+"""
+Content-addressed on-disk store of generated DOCX reports.
+
+A report is a pure function of its filters, the rows behind them, the
+report code and the day it is rendered on (the cover and response-rate
+dates). Each artifact is stored as <key>.docx, where key is the SHA-256 of
+exactly those inputs:
+
+  - the normalized filters (result_cache.cache_key);
+  - a data-version stamp: row count plus an md5 over the xmin of every
+    analytics.student_facts row in the filters, read after draining the
+    fact queue. Any write to a source table, demographics or a master
+    record rewrites the student's fact rows (facts.py triggers), so the
+    stamp changes with the rows behind the report;
+  - a hash of report.py and every backend module it uses (cube.py,
+    facts.py, database.py, ...), and today's date.
+
+/api/report/download serves a stored artifact straight from disk with the
+key as a strong ETag, answers a matching If-None-Match with 304, and only
+aggregates and renders on a miss — once per data change, straight into
+a temporary file in the store. Concurrent misses
+for a key share one render (singleflight.py). Files are written atomically;
+when the store grows past REPORT_ARTIFACT_MAX_MB the least recently served
+are deleted. Artifacts are handed out as open files, so eviction cannot
+pull one out from under a response being served. Without analytics.student_facts there is no stamp, and
+without every facts.py trigger (migrations.py apply skips the tables it
+does not own) the stamp would miss writes: downloads then render the
+cached aggregation into a spooled temporary file per request.
+
+    REPORT_ARTIFACT_DIR=<tmp>/gradsurvey-reports   # store directory
+    REPORT_ARTIFACT_MAX_MB=512                     # size cap before eviction
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+import types
+from datetime import date
+from pathlib import Path
+
+import database
+import facts
+import report
+import result_cache
+import singleflight
+
+DIRECTORY = Path(os.getenv("REPORT_ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "gradsurvey-reports")))
+MAX_BYTES = int(float(os.getenv("REPORT_ARTIFACT_MAX_MB", "512")) * 2**20)
+
+
+def _renderer_version(root=report) -> str:
+    """Hash of `root`'s source and of every module in its directory it uses, directly or not."""
+    directory = Path(root.__file__).parent
+    sources, pending = {}, [root]
+    while pending:
+        module = pending.pop()
+        path = Path(module.__file__)
+        if path in sources:
+            continue
+        sources[path] = path.read_bytes()
+        for value in vars(module).values():
+            used = value if isinstance(value, types.ModuleType) else \
+                sys.modules.get(getattr(value, "__module__", None) or "")
+            if getattr(used, "__file__", None) and Path(used.__file__).parent == directory:
+                pending.append(used)
+    digest = hashlib.sha256()
+    for path in sorted(sources):
+        digest.update(path.name.encode() + b"\0" + sources[path])
+    return digest.hexdigest()[:16]
+
+
+_RENDERER = _renderer_version()
+
+
+def data_stamp(major_filter=None, school_filter=None, term_filter=None) -> str | None:
+    """Version of the fact rows in the filters, or None without analytics.student_facts."""
+    if not facts.available():
+        return None
+    facts.refresh_pending()
+    clauses, params = database._cohort_filter_clauses(
+        major_filter, school_filter, term_filter,
+        major_col="f.major", school_col="f.school", term_col="f.term",
+    )
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT count(*) AS n,
+                       md5(coalesce(string_agg(f.xmin::text, ',' ORDER BY f.uid, f.term), '')) AS rows
+                FROM analytics.student_facts f
+                WHERE {" AND ".join(clauses) or "true"}
+            """, params)
+            row = cur.fetchone()
+    return f"{row['n']}:{row['rows']}"
+
+
+def artifact_key(major_filter=None, school_filter=None, term_filter=None) -> str | None:
+    """
+    Content address of the report for the filters as of now, or None without
+    a data stamp — or while some source table lacks its fact trigger, since
+    writes to it would not change the stamp.
+    """
+    if not facts.triggers_installed():
+        return None
+    stamp = data_stamp(major_filter, school_filter, term_filter)
+    if stamp is None:
+        return None
+    inputs = {
+        "filters":  result_cache.cache_key("report/download", major_filter, school_filter, term_filter),
+        "data":     stamp,
+        "renderer": _RENDERER,
+        "date":     date.today().isoformat(),
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def etag(key) -> str:
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match, key) -> bool:
+    """Whether an If-None-Match header value covers the artifact (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag(key) in tags
+
+
+class ArtifactStore:
+    """Directory of <key>.docx files with a total-size cap (least recently served evicted first)."""
+
+    def __init__(self, directory=DIRECTORY, max_bytes=MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def path(self, key) -> Path:
+        return self.directory / f"{key}.docx"
+
+    def _open(self, key):
+        """The stored artifact opened for reading and marked as just served, or None."""
+        try:
+            f = open(self.path(key), "rb")
+        except FileNotFoundError:
+            return None
+        os.utime(f.fileno())
+        return f
+
+    def get(self, key):
+        """
+        The stored artifact as an open binary file, or None; counts the hit or
+        miss. Eviction may unlink the file meanwhile; the open file stays
+        readable until closed.
+        """
+        f = self._open(key)
+        with self._lock:
+            if f is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return f
+
+    def put(self, key, write) -> Path:
+        """
+        Store the file `write(fp)` produces under `key` — written straight to
+        a temporary file in the store, then renamed into place — and evict
+        down to the size cap.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        path = self.path(key)
+        os.replace(tmp, path)
+        self._evict(keep=path)
+        return path
+
+    def _files(self):
+        """[(mtime, size, path)] of the stored artifacts, oldest first."""
+        files = []
+        for path in self.directory.glob("*.docx"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+        return sorted(files)
+
+    def _evict(self, keep=None):
+        with self._lock:
+            files = self._files()
+            total = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
+                self.evictions += 1
+
+    def _render(self, key, major_filter, school_filter, term_filter) -> Path:
+        # Re-check: a flight that landed just before this one may have stored it
+        if self.path(key).exists():
+            return self.path(key)
+        data = report.aggregate_report_data(major_filter, school_filter, term_filter)
+        return self.put(key, lambda fp: report.write_report_docx(data, fp))
+
+    def get_or_render(self, key, major_filter=None, school_filter=None, term_filter=None):
+        """
+        Stored artifact for `key` as an open file (see get), rendered from
+        fresh data on a miss (once per concurrent flight). Rendered again if
+        evicted before this caller could open it.
+        """
+        f = self.get(key)
+        while f is None:
+            singleflight.flights.do(
+                ("artifact", key), lambda: self._render(key, major_filter, school_filter, term_filter))
+            f = self._open(key)
+        return f
+
+    async def get_or_render_async(self, key, major_filter=None, school_filter=None, term_filter=None):
+        """get_or_render for async handlers; the render runs in a worker thread."""
+        f = self.get(key)
+        while f is None:
+            await singleflight.flights.do_async(
+                ("artifact", key), lambda: self._render(key, major_filter, school_filter, term_filter))
+            f = self._open(key)
+        return f
+
+    def stats(self) -> dict:
+        files = self._files() if self.directory.exists() else []
+        with self._lock:
+            return {
+                "directory": str(self.directory),
+                "entries":   len(files),
+                "bytes":     sum(size for _, size, _ in files),
+                "max_bytes": self.max_bytes,
+                "hits":      self.hits,
+                "misses":    self.misses,
+                "evictions": self.evictions,
+            }
+
+
+store = ArtifactStore()
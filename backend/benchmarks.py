@@ -0,0 +1,361 @@
+"""
+Micro-benchmarks for the backend's hot paths.
+
+Run against the database configured in .env, e.g.
+
+    python benchmarks.py source-fetch --page-sizes 20 50 100 --repeat 30
+    python benchmarks.py stream --chunk-sizes 500 1000 5000
+    python benchmarks.py dashboard --repeat 5
+    python benchmarks.py report-aggregate --students 50000
+    python benchmarks.py docx --rows 5000
+
+report-aggregate and docx need no database: they build a synthetic
+cohort in memory. Pass --baseline with another revision's report.py (e.g.
+from `git show`) to time its aggregation, or its DOCX rendering, on the
+same cohort.
+
+Timings are wall-clock and include network latency, so numbers taken on a
+laptop against RDS are the ones that matter for the deployed app.
+"""
+
+import argparse
+import importlib.util
+import io
+import json
+import random
+import statistics
+import time
+import tracemalloc
+import zipfile
+from datetime import datetime
+from unittest import mock
+
+import database
+import report
+
+
+def _timed(fn, repeat):
+    """Run fn `repeat` times; return per-call wall times in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def _summary(times):
+    ordered = sorted(times)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"median {statistics.median(ordered):8.2f} ms   p95 {p95:8.2f} ms"
+
+
+def bench_source_fetch(args):
+    """Sequential vs pipelined master + source lookups for one page of UIDs."""
+    with database.get_db_connection() as conn:
+        for size in args.page_sizes:
+            students = database._run_batch(
+                conn, [database._students_page_query(size, 0, *([None] * 6))]
+            )[0]
+            uids = [s["uid"] for s in students]
+            queries = [database._master_outcomes_query(uids)] + database._source_queries(uids)
+
+            print(f"page size {len(uids)}")
+            for label, pipeline in (("sequential", False), ("pipelined ", True)):
+                times = _timed(lambda: database._run_batch(conn, queries, pipeline), args.repeat)
+                print(f"  {label}  {_summary(times)}")
+
+
+def _peak_memory(fn):
+    """Run fn once; return (wall ms, peak Python heap in MiB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def bench_stream(args):
+    """Peak memory of a full-cohort load vs streaming it through a server-side cursor."""
+    def load_all():
+        return len(database.get_students_with_data(limit=None))
+
+    def stream(chunk_size):
+        return lambda: sum(1 for _ in database.iter_students_with_data(chunk_size=chunk_size))
+
+    print(f"students {load_all()}")
+    elapsed, peak = _peak_memory(load_all)
+    print(f"  fetchall           {elapsed:9.1f} ms   peak {peak:8.1f} MiB")
+    for size in args.chunk_sizes:
+        elapsed, peak = _peak_memory(stream(size))
+        print(f"  stream chunk {size:<5} {elapsed:9.1f} ms   peak {peak:8.1f} MiB")
+
+
+def bench_dashboard(args):
+    """End-to-end /api/dashboard aggregation, with the cohort loads and outcome resolutions it issues."""
+    loads = resolutions = 0
+    stream = database.iter_students_with_data
+    resolve = report._resolve_outcome
+
+    def counting_stream(*a, **kw):
+        nonlocal loads
+        loads += 1
+        return stream(*a, **kw)
+
+    def counting_resolve(student):
+        nonlocal resolutions
+        resolutions += 1
+        return resolve(student)
+
+    report.database.iter_students_with_data = counting_stream
+    report._resolve_outcome = counting_resolve
+    try:
+        times = _timed(lambda: report.aggregate_dashboard_data(term_filter=args.term), args.repeat)
+    finally:
+        report.database.iter_students_with_data = stream
+        report._resolve_outcome = resolve
+    print(f"cohort loads per call {loads // args.repeat}")
+    print(f"outcome resolutions per call {resolutions // args.repeat}")
+    print(f"  dashboard  {_summary(times)}")
+
+# ── Synthetic cohort (report-aggregate) ──────────────────────────────────────
+
+_SYN_STATUSES = [
+    "Employed full-time", "Employed part-time", "Accepted into a program of continuing education",
+    "Applied to graduate school", "Starting my own business", "Serving in the U.S. Armed Forces",
+    "Participating in a service or volunteer program", "Not seeking employment",
+    "Actively seeking employment", "",
+]
+_SYN_SCHOOLS = ["ARHU", "BMGT", "BSOS", "CMNS", "ENGR", "SPHL"]
+_SYN_STATES  = ["MD", "VA", "DC", "NY", "CA", "TX", "PA", "Maryland", ""]
+_SYN_TERMS   = ["Spring 2023", "Summer 2023", "Fall 2023", "Spring 2024", "Summer 2024", "Fall 2024"]
+
+
+def _synthetic_student(rng: random.Random, n: int) -> dict:
+    """One merged student record shaped like database.iter_students_with_data output."""
+    term = rng.choice(_SYN_TERMS)
+    student = {
+        "uid": str(200000000 + n), "term": term, "name": f"Student {n}",
+        "email": f"s{n}@umd.edu", "major": f"Major {n % 40}",
+        "school": rng.choice(_SYN_SCHOOLS),
+        "qualtrics_data": [], "linkedin_data": [], "clearinghouse_data": [], "masterData": None,
+    }
+    if rng.random() < 0.6:
+        nintern = rng.randint(0, 3)
+        payload = {
+            "STATUS":      rng.choice(_SYN_STATUSES),
+            "EMP_TYPE":    rng.choice(["Full-time employee", "Part-time employee", "Contract", ""]),
+            "EMP_SAL_1":   f"${rng.randint(35, 140)},000 - ${rng.randint(141, 200)},000",
+            "EMP_BONUS":   rng.choice(["no", "", "$5,000", "$10,000"]),
+            "EMP_STATE":   rng.choice(_SYN_STATES),
+            "EMP_CITY1_1": rng.choice(["Baltimore, MD, USA", "Toronto, ON, Canada", ""]),
+            "EMP_NATURE":  rng.choice(["Directly related", "Somewhat related", "Unrelated", "Other"]),
+            "EMP_FIELD":   rng.choice(["Technology", "Finance", "Health", ""]),
+            "EMP_JOBSITE": rng.choice(["Remote", "Hybrid", "On-site"]),
+            "EMP_ORG_1":   f"Employer {rng.randint(1, 2000)}, Inc.",
+            "EMP_TITLE":   rng.choice(["Analyst", "Engineer", "Associate", "Unknown"]),
+            "NUMINTERN":   str(nintern),
+            "CONTEDU_INST_1":  rng.choice(["University of Maryland, College Park, MD",
+                                           "Johns Hopkins University", ""]),
+            "CONTEDU_PROGRAM": rng.choice(["MS CS", "JD", "MPH", ""]),
+            "CONTEDU_DEGREE":  rng.choice(["Masters", "Doctoral", ""]),
+            "VOL_ORG": "Peace Corps", "VOL_ROLE": "Volunteer", "STBUS_ORG": "MyCo",
+        }
+        for i, how in enumerate(rng.sample(list(report.EMP_HOW_LABEL), rng.randint(0, 3)), 1):
+            payload[f"EMP_HOW_{i}"] = how
+        for field in rng.sample(list(report.OTHEREXP_LABEL), rng.randint(0, 4)):
+            payload[field] = "1"
+        for i in range(1, nintern + 1):
+            payload[f"{i}_INT_ORG_1"]   = f"Org {rng.randint(1, 500)}"
+            payload[f"{i}_INT_TITLE"]   = "Intern"
+            payload[f"{i}_INT_PAID"]    = rng.choice(["Yes", "No"])
+            payload[f"{i}_INT_CREDIT"]  = rng.choice(["Yes", "No"])
+            payload[f"{i}_INT_HOWMUCH"] = str(rng.randint(12, 40))
+        student["qualtrics_data"] = [{
+            "id": n, "recorded_at": datetime(int(term[-4:]), rng.randint(1, 12), 1),
+            "payload": payload,
+        }]
+    if rng.random() < 0.3:
+        student["linkedin_data"] = [{"id": n, "payload": {
+            "status":           rng.choice(["", "Employed full-time"]),
+            "name_of_employer": rng.choice(["", f"Employer {rng.randint(1, 2000)}"]),
+            "job_title":        rng.choice(["", "Engineer"]),
+            "employer_state":   rng.choice(_SYN_STATES),
+            "employer_country": rng.choice(["USA", "Canada", ""]),
+            "employment_modality": rng.choice(["Remote", "Hybrid", ""]),
+            "continuing_education_institution": rng.choice(["", "Georgetown University"]),
+        }}]
+    if rng.random() < 0.15:
+        student["clearinghouse_data"] = [{"id": n, "payload": {
+            "College Name":       rng.choice(["University of Maryland, College Park", "Duke University"]),
+            "Enrollment Major 1": rng.choice(["Computer Science", "Law", ""]),
+            "Degree Title":       rng.choice(["Master of Science", ""]),
+        }}]
+    if rng.random() < 0.2:
+        student["masterData"] = {"currentActivity": rng.choice(["Employed full-time", "Unplaced"])}
+    return student
+
+
+def _synthetic_cohort(size: int, seed: int):
+    rng = random.Random(seed)
+    for n in range(size):
+        yield _synthetic_student(rng, n)
+
+
+def _load_report_module(path):
+    spec = importlib.util.spec_from_file_location("report_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _baseline_aggregate(baseline, students):
+    """
+    fn() aggregating `students` with another revision's report.py: through
+    its _aggregate_students, or — in revisions without one, such as the
+    original — through aggregate_report_data with its cohort load patched
+    to return `students` in the name order its query used.
+    """
+    aggregate = getattr(baseline, "_aggregate_students", None)
+    if aggregate is not None:
+        return lambda: aggregate(students)
+
+    by_name = sorted(students, key=report._student_order)
+
+    def run():
+        with mock.patch.object(baseline.database, "get_students_with_data",
+                               lambda **_filters: by_name):
+            return baseline.aggregate_report_data()
+    return run
+
+
+def _comparable(data):
+    """Report data without its generation timestamp."""
+    data = json.loads(json.dumps(data, default=str))
+    data.get("meta", {}).pop("generated_at", None)
+    return data
+
+
+def bench_report_aggregate(args):
+    """Report aggregation over a synthetic cohort: materialized list vs streamed generator."""
+    students = list(_synthetic_cohort(args.students, args.seed))
+    print(f"students {len(students)}")
+
+    times = _timed(lambda: report._aggregate_students(students), args.repeat)
+    print(f"  single-pass list     {_summary(times)}")
+    if args.baseline:
+        baseline = _baseline_aggregate(_load_report_module(args.baseline), students)
+        base_times = _timed(baseline, args.repeat)
+        print(f"  baseline list        {_summary(base_times)}")
+        print(f"  speedup              {statistics.median(base_times) / statistics.median(times):8.2f}x")
+        same = _comparable(report._aggregate_students(students)) == _comparable(baseline())
+        print(f"  identical results    {same}")
+    del students
+
+    elapsed, peak = _peak_memory(
+        lambda: report._aggregate_students(list(_synthetic_cohort(args.students, args.seed))))
+    print(f"  materialized         {elapsed:9.1f} ms   peak {peak:8.1f} MiB")
+    elapsed, peak = _peak_memory(
+        lambda: report._aggregate_students(_synthetic_cohort(args.students, args.seed)))
+    print(f"  streamed             {elapsed:9.1f} ms   peak {peak:8.1f} MiB")
+
+
+def _appendix_table_per_cell(rows):
+    """Appendix A table built one cell at a time (_data_row), as a reference."""
+    doc = report.Document()
+    table = doc.add_table(rows=len(rows) + 1, cols=2)
+    report._add_table_borders(table)
+    table.style = "Table Grid"
+    report._header_row(table, ["Employer", "Job Title"])
+    for idx, row in enumerate(rows):
+        report._data_row(table, idx + 1, row)
+    return doc
+
+
+def _appendix_table_bulk(rows):
+    doc = report.Document()
+    report._list_table(doc, ["Employer", "Job Title"], rows)
+    return doc
+
+
+def _docx_parts(content: bytes) -> dict:
+    """{part name: bytes} of a DOCX (zip entry timestamps differ between saves)."""
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def bench_docx(args):
+    """DOCX rendering of a report whose Appendix A has --rows employer rows."""
+    rng = random.Random(args.seed)
+    data = report._aggregate_students(list(_synthetic_cohort(args.students, args.seed)))
+    data["appendix_a"] = [{"employer": f"Employer {rng.randrange(args.rows)}",
+                           "title": rng.choice(["Analyst", "Engineer", "Research Assistant", "Teacher"])}
+                          for _ in range(args.rows)]
+    rows = [[e["employer"], e["title"]] for e in data["appendix_a"]]
+    print(f"appendix A rows {len(rows)}   appendix B rows {len(data['appendix_b'])}   "
+          f"internships {len(data['internships']['intern_list'])}")
+
+    # The per-cell path is quadratic in the row count, so it runs once
+    per_cell = _timed(lambda: _appendix_table_per_cell(rows).save(io.BytesIO()), 1)[0]
+    print(f"  table per-cell      {per_cell:9.1f} ms (1 run)")
+    times = _timed(lambda: _appendix_table_bulk(rows).save(io.BytesIO()), args.repeat)
+    print(f"  table bulk          {_summary(times)}")
+
+    # Peak memory is the Python heap only: tracemalloc does not see lxml's trees
+    times = _timed(lambda: report.generate_report_docx(data), args.repeat)
+    elapsed, peak = _peak_memory(lambda: report.generate_report_docx(data))
+    print(f"  report              {_summary(times)}   peak {peak:8.1f} MiB")
+    if args.baseline:
+        baseline = _load_report_module(args.baseline)
+        start = time.perf_counter()
+        base_content = baseline.generate_report_docx(data)
+        base_ms = (time.perf_counter() - start) * 1000
+        print(f"  baseline report     {base_ms:9.1f} ms (1 run)")
+        print(f"  speedup             {base_ms / statistics.median(times):8.2f}x")
+        same = _docx_parts(report.generate_report_docx(data)) == _docx_parts(base_content)
+        print(f"  identical parts     {same}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("source-fetch", help=bench_source_fetch.__doc__)
+    p.add_argument("--page-sizes", type=int, nargs="+", default=[20, 50, 100, 250])
+    p.add_argument("--repeat", type=int, default=20)
+    p.set_defaults(func=bench_source_fetch)
+
+    p = sub.add_parser("stream", help=bench_stream.__doc__)
+    p.add_argument("--chunk-sizes", type=int, nargs="+", default=[500, 1000, 5000])
+    p.set_defaults(func=bench_stream)
+
+    p = sub.add_parser("dashboard", help=bench_dashboard.__doc__)
+    p.add_argument("--term", nargs="+", default=None)
+    p.add_argument("--repeat", type=int, default=5)
+    p.set_defaults(func=bench_dashboard)
+
+    p = sub.add_parser("report-aggregate", help=bench_report_aggregate.__doc__)
+    p.add_argument("--students", type=int, default=50000)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--baseline", default=None,
+                   help="path to another report.py to time on the same cohort")
+    p.set_defaults(func=bench_report_aggregate)
+
+    p = sub.add_parser("docx", help=bench_docx.__doc__)
+    p.add_argument("--rows", type=int, default=5000)
+    p.add_argument("--students", type=int, default=2000)
+    p.add_argument("--seed", type=int, default=7)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--baseline", default=None,
+                   help="path to another report.py to time on the same data")
+    p.set_defaults(func=bench_docx)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
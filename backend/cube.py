@@ -0,0 +1,319 @@
+"""
+Pre-aggregated outcome cube (analytics.outcome_cube).
+
+One cell per (term, major, school) holding mergeable partial aggregates of
+the analytics.student_facts rows in it: student and per-source counts,
+outcome counts (known / placed / workforce follow from these), students
+with a paid internship, and QuantileSketches of the report salaries (FT
+employed survey respondents), all survey salaries and internship wages.
+
+Any term / major / school filter is answered by selecting the matching
+cells — with the same substring / IN semantics as the demographics filters
+— and merging them, so the dashboard breakdowns and the Major Analytics
+tab cost O(cells) instead of O(students).
+
+Cells are rewritten by facts.py in the same transaction as the fact rows
+they summarize, so the cube is exactly as fresh as the facts. A unique
+index keeps one row per cell, and concurrent refreshes of a cell take
+turns on a per-cell advisory lock.
+
+    python cube.py rebuild    # recompute every cell from analytics.student_facts
+    python cube.py verify     # compare stored cells with cells rebuilt from the facts
+"""
+
+import argparse
+import sys
+from collections import Counter
+
+from psycopg.types.json import Jsonb
+
+import database
+from sketches import QuantileSketch
+
+SKETCHES = ("report_salaries", "salaries", "internship_wages")
+
+_available = None
+
+_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS analytics.outcome_cube (
+        term                text,
+        major               text,
+        school              text,
+        students            integer NOT NULL,
+        survey_count        integer NOT NULL,
+        linkedin_count      integer NOT NULL,
+        clearinghouse_count integer NOT NULL,
+        paid_students       integer NOT NULL,
+        outcome_counts      jsonb   NOT NULL,
+        report_salaries     jsonb   NOT NULL,
+        salaries            jsonb   NOT NULL,
+        internship_wages    jsonb   NOT NULL,
+        refreshed_at        timestamptz NOT NULL DEFAULT now()
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_outcome_cube_term ON analytics.outcome_cube (term)",
+]
+
+# One row per cell; created after apply() clears duplicates of older versions.
+# Expression keys make NULL keys equal without NULLS NOT DISTINCT (PG15+); the
+# IS NULL flags keep a NULL key apart from ''.
+_CELL_INDEX = """
+    CREATE UNIQUE INDEX IF NOT EXISTS ux_outcome_cube_cell_key ON analytics.outcome_cube (
+        COALESCE(term, ''), COALESCE(major, ''), COALESCE(school, ''),
+        (term IS NULL), (major IS NULL), (school IS NULL)
+    )
+"""
+
+
+class OutcomeCell:
+    """Mergeable partial aggregate over student fact rows (report.student_facts shape)."""
+
+    __slots__ = ("students", "survey_count", "linkedin_count", "clearinghouse_count",
+                 "paid_students", "outcome_counts") + SKETCHES
+
+    def __init__(self):
+        self.students = self.survey_count = self.linkedin_count = 0
+        self.clearinghouse_count = self.paid_students = 0
+        self.outcome_counts = Counter()
+        self.report_salaries  = QuantileSketch()
+        self.salaries         = QuantileSketch()
+        self.internship_wages = QuantileSketch()
+
+    def add_fact(self, f: dict):
+        self.students            += 1
+        self.survey_count        += f["has_survey"]
+        self.linkedin_count      += f["has_linkedin"]
+        self.clearinghouse_count += f["has_clearinghouse"]
+        self.paid_students       += f["paid_internships"] > 0
+        self.outcome_counts[f["outcome"]] += 1
+        if f["salary_midpoint"]:
+            self.salaries.add(f["salary_midpoint"])
+            # The report's salary section: FT employed survey respondents only
+            if f["employed_survey"] and f["full_time_survey"]:
+                self.report_salaries.add(f["salary_midpoint"])
+        for wage in f["internship_wages"]:
+            self.internship_wages.add(wage)
+        return self
+
+    def merge(self, other: "OutcomeCell"):
+        self.students            += other.students
+        self.survey_count        += other.survey_count
+        self.linkedin_count      += other.linkedin_count
+        self.clearinghouse_count += other.clearinghouse_count
+        self.paid_students       += other.paid_students
+        self.outcome_counts.update(other.outcome_counts)
+        for name in SKETCHES:
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    def to_row(self) -> dict:
+        row = {name: getattr(self, name) for name in (
+            "students", "survey_count", "linkedin_count", "clearinghouse_count", "paid_students")}
+        row["outcome_counts"] = Jsonb(dict(self.outcome_counts))
+        for name in SKETCHES:
+            row[name] = Jsonb(getattr(self, name).to_json())
+        return row
+
+    @classmethod
+    def from_row(cls, row: dict) -> "OutcomeCell":
+        cell = cls()
+        for name in ("students", "survey_count", "linkedin_count",
+                     "clearinghouse_count", "paid_students"):
+            setattr(cell, name, row[name])
+        cell.outcome_counts = Counter(row["outcome_counts"])
+        for name in SKETCHES:
+            setattr(cell, name, QuantileSketch.from_json(row[name]))
+        return cell
+
+
+def add_to_cells(cells: dict, f: dict):
+    """Add one fact row to its (term, major, school) cell in `cells`."""
+    key = (f["term"], f["major"], f["school"])
+    cell = cells.get(key)
+    if cell is None:
+        cell = cells[key] = OutcomeCell()
+    cell.add_fact(f)
+
+
+def cells_from_facts(fact_rows) -> dict:
+    """{(term, major, school): OutcomeCell} for an iterable of fact rows."""
+    cells = {}
+    for f in fact_rows:
+        add_to_cells(cells, f)
+    return cells
+
+
+# ── Storage ───────────────────────────────────────────────────────────────────
+
+_FACT_COLUMNS = """
+    term, major, school, outcome, has_survey, has_linkedin, has_clearinghouse,
+    employed_survey, full_time_survey, salary_midpoint, paid_internships, internship_wages
+"""
+
+_INSERT_SQL = """
+    INSERT INTO analytics.outcome_cube (
+        term, major, school, students, survey_count, linkedin_count, clearinghouse_count,
+        paid_students, outcome_counts, report_salaries, salaries, internship_wages
+    ) VALUES (
+        %(term)s, %(major)s, %(school)s, %(students)s, %(survey_count)s, %(linkedin_count)s,
+        %(clearinghouse_count)s, %(paid_students)s, %(outcome_counts)s, %(report_salaries)s,
+        %(salaries)s, %(internship_wages)s
+    )
+"""
+
+# Rows of `alias` in any of the cells given as three parallel key arrays;
+# NULL keys match NULL columns
+_IN_CELLS = """
+    EXISTS (
+        SELECT 1 FROM unnest(%s::text[], %s::text[], %s::text[]) AS k(term, major, school)
+        WHERE {alias}.term   IS NOT DISTINCT FROM k.term
+          AND {alias}.major  IS NOT DISTINCT FROM k.major
+          AND {alias}.school IS NOT DISTINCT FROM k.school
+    )
+"""
+
+
+def _key_params(keys):
+    keys = list(keys)
+    return [[k[0] for k in keys], [k[1] for k in keys], [k[2] for k in keys]]
+
+
+def _write_cells(cur, cells):
+    cur.executemany(_INSERT_SQL, [
+        {"term": term, "major": major, "school": school, **cell.to_row()}
+        for (term, major, school), cell in cells.items()
+    ])
+
+
+def refresh_cells(cur, keys) -> int:
+    """
+    Recompute the cells for `keys` from analytics.student_facts inside the
+    caller's transaction. Each cell is locked for the rest of the
+    transaction first (in a fixed order), so a concurrent refresh of the
+    same cell waits for this one to commit and then recomputes from facts
+    that include it.
+    """
+    if not keys:
+        return 0
+    params = _key_params(set(keys))
+    cur.execute("""
+        SELECT pg_advisory_xact_lock(h) FROM (
+            SELECT DISTINCT hashtext(concat_ws(chr(31), k.term, k.major, k.school)) AS h
+            FROM unnest(%s::text[], %s::text[], %s::text[]) AS k(term, major, school)
+            ORDER BY h
+        ) locks
+    """, params)
+    cur.execute("DELETE FROM analytics.outcome_cube c WHERE " + _IN_CELLS.format(alias="c"), params)
+    cur.execute(f"SELECT {_FACT_COLUMNS} FROM analytics.student_facts f WHERE "
+                + _IN_CELLS.format(alias="f"), params)
+    cells = cells_from_facts(cur.fetchall())
+    _write_cells(cur, cells)
+    return len(cells)
+
+
+def rebuild(cur) -> int:
+    """Recompute every cell from analytics.student_facts inside the caller's transaction."""
+    # Blocks cell refreshes until the rebuilt cube commits
+    cur.execute("LOCK TABLE analytics.outcome_cube IN EXCLUSIVE MODE")
+    cur.execute("DELETE FROM analytics.outcome_cube")
+    cur.execute(f"SELECT {_FACT_COLUMNS} FROM analytics.student_facts")
+    cells = cells_from_facts(cur)
+    _write_cells(cur, cells)
+    return len(cells)
+
+
+def apply(cur):
+    """Create the cube table (called by migrations.apply after facts.apply); populate if empty."""
+    global _available
+    for statement in _DDL:
+        cur.execute(statement)
+    cur.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM analytics.outcome_cube
+            GROUP BY term, major, school HAVING count(*) > 1
+        ) AS duplicated
+    """)
+    if cur.fetchone()["duplicated"]:
+        with cur.connection.transaction():
+            print(f"  rebuilt  analytics.outcome_cube ({rebuild(cur)} cells, duplicates removed)")
+    # Replaced by ux_outcome_cube_cell_key
+    cur.execute("DROP INDEX IF EXISTS analytics.ux_outcome_cube_cell")
+    cur.execute(_CELL_INDEX)
+    cur.execute("SELECT EXISTS (SELECT 1 FROM analytics.outcome_cube) AS populated")
+    if not cur.fetchone()["populated"]:
+        with cur.connection.transaction():
+            print(f"  rebuilt  analytics.outcome_cube ({rebuild(cur)} cells)")
+    _available = True
+
+
+def available() -> bool:
+    """Whether analytics.outcome_cube exists (cached per process)."""
+    global _available
+    if _available is None:
+        with database.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('analytics.outcome_cube') IS NOT NULL AS ok")
+                _available = cur.fetchone()["ok"]
+    return _available
+
+
+def load_cells(major_filter=None, school_filter=None, term_filter=None) -> dict:
+    """
+    {(term, major, school): OutcomeCell} for the cells matching the report
+    filters. Callers drain the fact queue first (facts.refresh_pending).
+    """
+    clauses, params = database._cohort_filter_clauses(
+        major_filter, school_filter, term_filter,
+        major_col="c.major", school_col="c.school", term_col="c.term",
+    )
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT * FROM analytics.outcome_cube c
+                WHERE {" AND ".join(clauses) or "true"}
+            """, params)
+            return {(row["term"], row["major"], row["school"]): OutcomeCell.from_row(row)
+                    for row in cur.fetchall()}
+
+
+# ── Verification ──────────────────────────────────────────────────────────────
+
+def _cell_state(cell):
+    return (
+        cell.students, cell.survey_count, cell.linkedin_count, cell.clearinghouse_count,
+        cell.paid_students, dict(cell.outcome_counts),
+        *(getattr(cell, name).to_json() for name in SKETCHES),
+    )
+
+
+def verify() -> bool:
+    """Compare the stored cells with cells rebuilt in memory from analytics.student_facts."""
+    import facts
+    facts.refresh_pending()
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {_FACT_COLUMNS} FROM analytics.student_facts")
+            expected = {key: _cell_state(cell) for key, cell in cells_from_facts(cur).items()}
+    stored = {key: _cell_state(cell) for key, cell in load_cells().items()}
+    differ = sum(stored.get(key) != state for key, state in expected.items()) \
+        + len(stored.keys() - expected.keys())
+    print(f"  {'ok  ' if not differ else 'FAIL'} outcome cube            "
+          f"{len(stored)} stored, {len(expected)} expected, {differ} differ")
+    return not differ
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-aggregated outcome cube")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        with database.get_db_connection() as conn:
+            with conn.transaction(), conn.cursor() as cur:
+                print(f"rebuilt {rebuild(cur)} cells")
+    else:
+        sys.exit(0 if verify() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 import psycopg
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool
 from contextlib import contextmanager
+import base64
+import binascii
+import json
 import os
+import threading
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,44 +19,115 @@ DB_CONFIG = {
     "password": os.getenv("DB_PASSWORD")
 }
 
+# Connection pool sizing — all values overridable from .env.
+# max_idle / max_lifetime are in seconds; timeout is how long a request
+# waits for a free connection before failing.
+POOL_CONFIG = {
+    "min_size":     int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+    "max_size":     int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    "max_idle":     float(os.getenv("DB_POOL_MAX_IDLE", "600")),
+    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+    "timeout":      float(os.getenv("DB_POOL_TIMEOUT", "30")),
+}
+
+# Rows per chunk when streaming full cohorts through a server-side cursor
+STREAM_CHUNK_SIZE = int(os.getenv("DB_STREAM_CHUNK_SIZE", "1000"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """Return the process-wide connection pool, opening it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    kwargs={**DB_CONFIG, "row_factory": dict_row},
+                    # Health check on checkout: a cheap round trip that
+                    # discards connections dropped by RDS / the network.
+                    check=ConnectionPool.check_connection,
+                    name="gradsurvey",
+                    open=True,
+                    **POOL_CONFIG,
+                )
+    return _pool
+
+
+def close_pool():
+    """Close the connection pool (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+def get_pool_stats() -> dict:
+    """Pool configuration plus psycopg_pool's live counters, for sizing."""
+    stats = {"config": dict(POOL_CONFIG), "open": _pool is not None}
+    if _pool is not None:
+        stats.update(_pool.get_stats())
+    return stats
+
+
 @contextmanager
 def get_db_connection():
-    conn = None
-    try:
-        conn = psycopg.connect(**DB_CONFIG, row_factory=dict_row)
+    """
+    Borrow a connection from the pool and return it when the block exits.
+    An open transaction is committed on a clean exit and rolled back on
+    error; writers still call conn.commit() explicitly as before.
+    """
+    with get_pool().connection() as conn:
         yield conn
-    finally:
-        if conn:
-            conn.close()
 
 
-def _build_demo_where(name_filter, major_filter, school_filter, term_filter,
-                      uid_filter, sources_filter=None):
-    """Build WHERE clause and params for the demographics table."""
-    clauses = ["d.uid IS NOT NULL"]
+def _cohort_filter_clauses(major_filter, school_filter, term_filter,
+                           major_col="d.payload->>'major1_major'",
+                           school_col="d.payload->>'major1_coll'",
+                           term_col="d.term"):
+    """
+    Major / school / term clauses and params. Shared by the demographics
+    filters and the analytics tables (facts.py), which pass their own columns.
+    """
+    clauses = []
     params = []
-    if name_filter:
-        clauses.append("LOWER(d.payload->>'name') LIKE LOWER(%s)")
-        params.append(f"%{name_filter}%")
     if major_filter:
         if isinstance(major_filter, list) and len(major_filter) > 0:
-            or_clauses = ["LOWER(d.payload->>'major1_major') LIKE LOWER(%s)" for _ in major_filter]
+            or_clauses = [f"LOWER({major_col}) LIKE LOWER(%s)" for _ in major_filter]
             clauses.append(f"({' OR '.join(or_clauses)})")
             params.extend([f"%{m}%" for m in major_filter])
         elif isinstance(major_filter, str):
-            clauses.append("LOWER(d.payload->>'major1_major') LIKE LOWER(%s)")
+            clauses.append(f"LOWER({major_col}) LIKE LOWER(%s)")
             params.append(f"%{major_filter}%")
     if school_filter:
-        clauses.append("LOWER(d.payload->>'major1_coll') LIKE LOWER(%s)")
+        clauses.append(f"LOWER({school_col}) LIKE LOWER(%s)")
         params.append(f"%{school_filter}%")
     if term_filter:
         if isinstance(term_filter, list) and len(term_filter) > 0:
             placeholders = ','.join(['%s'] * len(term_filter))
-            clauses.append(f"d.term IN ({placeholders})")
+            clauses.append(f"{term_col} IN ({placeholders})")
             params.extend(term_filter)
         elif isinstance(term_filter, str):
-            clauses.append("d.term = %s")
+            clauses.append(f"{term_col} = %s")
             params.append(term_filter)
+    return clauses, params
+
+
+def _build_demo_where(name_filter, major_filter, school_filter, term_filter,
+                      uid_filter, sources_filter=None):
+    """Build WHERE clause and params for the demographics table."""
+    # The LOWER(...) / uid::text expressions match the trigram indexes in
+    # migrations.py, which is what lets these leading-wildcard LIKEs use an index
+    clauses = ["d.uid IS NOT NULL"]
+    params = []
+    if name_filter:
+        clauses.append("LOWER(d.payload->>'name') LIKE LOWER(%s)")
+        params.append(f"%{name_filter}%")
+    cohort_clauses, cohort_params = _cohort_filter_clauses(major_filter, school_filter, term_filter)
+    clauses.extend(cohort_clauses)
+    params.extend(cohort_params)
     if uid_filter:
         clauses.append("d.uid::text LIKE %s")
         params.append(f"%{uid_filter}%")
@@ -62,13 +138,13 @@ def _build_demo_where(name_filter, major_filter, school_filter, term_filter,
         if 'qualtrics' in sources_filter:
             source_clauses.append(
                 "EXISTS (SELECT 1 FROM src.src_qualtrics_response qf "
-                "WHERE qf.student_key::text = d.uid::text "
+                "WHERE qf.student_key = d.uid "
                 "AND qf.payload->>'STATUS' IS NOT NULL AND qf.payload->>'STATUS' != '')"
             )
         if 'linkedin' in sources_filter:
             source_clauses.append(
                 "EXISTS (SELECT 1 FROM src.src_linkedin_position lf "
-                "WHERE lf.student_key::text = d.uid::text "
+                "WHERE lf.student_key = d.uid "
                 "AND (lf.payload->>'linkedin_url' IS NOT NULL AND lf.payload->>'linkedin_url' != '' "
                 "  OR lf.payload->>'url' IS NOT NULL AND lf.payload->>'url' != '' "
                 "  OR lf.payload->>'profile_url' IS NOT NULL AND lf.payload->>'profile_url' != ''))"
@@ -76,20 +152,20 @@ def _build_demo_where(name_filter, major_filter, school_filter, term_filter,
         if 'clearinghouse' in sources_filter:
             source_clauses.append(
                 "EXISTS (SELECT 1 FROM src.src_clearinghouse_record cf "
-                "WHERE cf.student_key::text = d.uid::text)"
+                "WHERE cf.student_key = d.uid)"
             )
         if 'no-source' in sources_filter:
             source_clauses.append(
                 "(NOT EXISTS (SELECT 1 FROM src.src_qualtrics_response qf "
-                "WHERE qf.student_key::text = d.uid::text "
+                "WHERE qf.student_key = d.uid "
                 "AND qf.payload->>'STATUS' IS NOT NULL AND qf.payload->>'STATUS' != '') "
                 "AND NOT EXISTS (SELECT 1 FROM src.src_linkedin_position lf "
-                "WHERE lf.student_key::text = d.uid::text "
+                "WHERE lf.student_key = d.uid "
                 "AND (lf.payload->>'linkedin_url' IS NOT NULL AND lf.payload->>'linkedin_url' != '' "
                 "  OR lf.payload->>'url' IS NOT NULL AND lf.payload->>'url' != '' "
                 "  OR lf.payload->>'profile_url' IS NOT NULL AND lf.payload->>'profile_url' != '')) "
                 "AND NOT EXISTS (SELECT 1 FROM src.src_clearinghouse_record cf "
-                "WHERE cf.student_key::text = d.uid::text))"
+                "WHERE cf.student_key = d.uid))"
             )
         if source_clauses:
             clauses.append(f"({' OR '.join(source_clauses)})")
@@ -97,25 +173,39 @@ def _build_demo_where(name_filter, major_filter, school_filter, term_filter,
     return " AND ".join(clauses), params
 
 
-def _fetch_source_data(cur, uids):
+def _source_queries(uids):
     """
-    Given a list of UIDs, fetch qualtrics/linkedin/clearinghouse rows in 3
-    targeted IN queries and return them grouped by UID.
+    SQL + params for the three per-source lookups, one query per table.
+    Keys are compared on their native type against a bound array so the
+    student_key indexes (see migrations.py) serve every lookup.
     """
-    if not uids:
-        return {}, {}, {}
+    return [
+        ("""
+            SELECT id, student_key::text AS uid, survey_id, response_id,
+                   recorded_at, payload, source_file
+            FROM src.src_qualtrics_response
+            WHERE student_key = ANY(%s)
+            ORDER BY recorded_at DESC NULLS LAST, id DESC
+        """, [uids]),
+        ("""
+            SELECT id, student_key::text AS uid, position_key, payload, source_file
+            FROM src.src_linkedin_position
+            WHERE student_key = ANY(%s)
+            ORDER BY id DESC
+        """, [uids]),
+        ("""
+            SELECT id, student_key::text AS uid, record_key, payload, source_file
+            FROM src.src_clearinghouse_record
+            WHERE student_key = ANY(%s)
+            ORDER BY id DESC
+        """, [uids]),
+    ]
 
-    placeholders = ",".join(["%s"] * len(uids))
 
-    cur.execute(f"""
-        SELECT id, student_key::text AS uid, survey_id, response_id,
-               recorded_at, payload, source_file
-        FROM src.src_qualtrics_response
-        WHERE student_key::text IN ({placeholders})
-        ORDER BY recorded_at DESC NULLS LAST
-    """, uids)
+def _group_source_rows(qualtrics_rows, linkedin_rows, clearinghouse_rows):
+    """Group the rows returned by _source_queries by UID."""
     qualtrics_by_uid = {}
-    for row in cur.fetchall():
+    for row in qualtrics_rows:
         qualtrics_by_uid.setdefault(row["uid"], []).append({
             "id": row["id"],
             "survey_id": row["survey_id"],
@@ -125,14 +215,8 @@ def _fetch_source_data(cur, uids):
             "source_file": row["source_file"],
         })
 
-    cur.execute(f"""
-        SELECT id, student_key::text AS uid, position_key, payload, source_file
-        FROM src.src_linkedin_position
-        WHERE student_key::text IN ({placeholders})
-        ORDER BY id DESC
-    """, uids)
     linkedin_by_uid = {}
-    for row in cur.fetchall():
+    for row in linkedin_rows:
         linkedin_by_uid.setdefault(row["uid"], []).append({
             "id": row["id"],
             "position_key": row["position_key"],
@@ -140,14 +224,8 @@ def _fetch_source_data(cur, uids):
             "source_file": row["source_file"],
         })
 
-    cur.execute(f"""
-        SELECT id, student_key::text AS uid, record_key, payload, source_file
-        FROM src.src_clearinghouse_record
-        WHERE student_key::text IN ({placeholders})
-        ORDER BY id DESC
-    """, uids)
     clearinghouse_by_uid = {}
-    for row in cur.fetchall():
+    for row in clearinghouse_rows:
         clearinghouse_by_uid.setdefault(row["uid"], []).append({
             "id": row["id"],
             "record_key": row["record_key"],
@@ -158,119 +236,553 @@ def _fetch_source_data(cur, uids):
     return qualtrics_by_uid, linkedin_by_uid, clearinghouse_by_uid
 
 
+SOURCE_NAMES = ("qualtrics", "linkedin", "clearinghouse")
+
+# Response shapes: "full" carries every source row with its payload,
+# "summary" only per-source counts / badges (see _source_summary_queries)
+VIEWS = ("full", "summary")
+
+
+def _source_summary_queries(uids):
+    """
+    SQL + params for per-student source summaries: row counts, the latest
+    Qualtrics date, and the values the list view's source badges read from
+    each student's newest row. No payload leaves the database.
+    Row order matches _source_queries, so "newest" means the same row.
+    """
+    return [
+        ("""
+            SELECT student_key::text AS uid, COUNT(*) AS count,
+                   MAX(recorded_at) AS latest_recorded_at,
+                   (array_agg(payload->>'STATUS'
+                              ORDER BY recorded_at DESC NULLS LAST, id DESC))[1] AS status
+            FROM src.src_qualtrics_response
+            WHERE student_key = ANY(%s)
+            GROUP BY student_key
+        """, [uids]),
+        ("""
+            SELECT student_key::text AS uid, COUNT(*) AS count,
+                   (array_agg(COALESCE(NULLIF(payload->>'linkedin_url', ''),
+                                       NULLIF(payload->>'url', ''),
+                                       payload->>'profile_url')
+                              ORDER BY id DESC))[1] AS profile_url
+            FROM src.src_linkedin_position
+            WHERE student_key = ANY(%s)
+            GROUP BY student_key
+        """, [uids]),
+        ("""
+            SELECT student_key::text AS uid, COUNT(*) AS count
+            FROM src.src_clearinghouse_record
+            WHERE student_key = ANY(%s)
+            GROUP BY student_key
+        """, [uids]),
+    ]
+
+
+_EMPTY_SOURCE_SUMMARY = {
+    "qualtrics":     {"count": 0, "latest_recorded_at": None, "status": None},
+    "linkedin":      {"count": 0, "profile_url": None},
+    "clearinghouse": {"count": 0},
+}
+
+
+def _group_source_summaries(qualtrics_rows, linkedin_rows, clearinghouse_rows):
+    """Index the rows returned by _source_summary_queries as {uid: {source: summary}}."""
+    by_uid = {}
+    for source, rows in zip(SOURCE_NAMES, (qualtrics_rows, linkedin_rows, clearinghouse_rows)):
+        for row in rows:
+            summary = dict(row)
+            by_uid.setdefault(summary.pop("uid"), {})[source] = summary
+    return by_uid
+
+
+def _student_source_query(uid, source):
+    """SQL + params for one student's full rows from a single source table."""
+    if source not in SOURCE_NAMES:
+        raise ValueError(f"Unknown source: {source}")
+    return _source_queries([uid])[SOURCE_NAMES.index(source)]
+
+
+def _group_student_source_rows(uid, source, rows):
+    """Shape one source's rows like the matching *_data list of a full student."""
+    grouped = _group_source_rows(*(rows if name == source else [] for name in SOURCE_NAMES))
+    return grouped[SOURCE_NAMES.index(source)].get(uid, [])
+
+
+def _run_batch(conn, queries, pipeline=True):
+    """
+    Execute independent (sql, params) pairs and return each one's rows.
+    In pipeline mode every statement is sent before any result is read, so
+    the batch costs a single network round trip instead of one per query.
+    """
+    cursors = [conn.cursor() for _ in queries]
+    try:
+        if pipeline and psycopg.Pipeline.is_supported():
+            with conn.pipeline():
+                for cur, (query, params) in zip(cursors, queries):
+                    cur.execute(query, params)
+        else:
+            for cur, (query, params) in zip(cursors, queries):
+                cur.execute(query, params)
+        return [cur.fetchall() for cur in cursors]
+    finally:
+        for cur in cursors:
+            cur.close()
+
+
+def _fetch_source_data(cur, uids):
+    """
+    Given a list of UIDs, fetch qualtrics/linkedin/clearinghouse rows in 3
+    targeted IN queries (pipelined) and return them grouped by UID.
+    """
+    if not uids:
+        return {}, {}, {}
+
+    return _group_source_rows(*_run_batch(cur.connection, _source_queries(uids)))
+
+
+def encode_cursor(student: dict) -> str:
+    """Opaque keyset cursor for the row *after* `student` (name, uid, term)."""
+    key = [student.get("name"), student.get("uid"), student.get("term")]
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str):
+    """Decode an encode_cursor() token to (name, uid, term); ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        name, uid, term = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+    if not isinstance(uid, str):
+        raise ValueError(f"Invalid cursor: {token}")
+    return name, uid, term
+
+
+def _keyset_clause(after: str, name_col="d.payload->>'name'", uid_col="d.uid::text",
+                   term_col="d.term"):
+    """
+    (WHERE fragment, params, null_names) seeking past the cursor position in
+    the (name NULLS LAST, uid, term NULLS LAST) ordering used for pagination.
+
+    The fragment is a row comparison on (name, uid) — a range scan of
+    ix_src_demographics_name_uid_term — plus a filter on the rows sharing
+    the cursor's (name, uid). It never matches a NULL name; those rows sort
+    last, so `null_names` tells the caller to add them after a non-NULL
+    cursor name (_students_page_query unions them in as a second seek).
+    """
+    name, uid, term = decode_cursor(after)
+
+    # Rows sharing the cursor's (name, uid) that it does not precede: all of
+    # them after a NULL term (sorts last), otherwise those with term <= it
+    if term is None:
+        reached, reached_params = "TRUE", []
+    else:
+        reached, reached_params = f"coalesce({term_col} <= %s, FALSE)", [term]
+
+    if name is None:
+        return (
+            f"({name_col} IS NULL AND {uid_col} >= %s "
+            f"AND NOT ({uid_col} = %s AND {reached}))",
+            [uid, uid] + reached_params,
+            False,
+        )
+    return (
+        f"(({name_col}, {uid_col}) >= (%s, %s) "
+        f"AND NOT ({name_col} = %s AND {uid_col} = %s AND {reached}))",
+        [name, uid, name, uid] + reached_params,
+        True,
+    )
+
+
+def _pagination_clause(limit, offset):
+    """LIMIT / OFFSET fragment + params (either may be None)."""
+    if limit is None:
+        return "", []
+    if offset is None:
+        return "LIMIT %s", [limit]
+    return "LIMIT %s OFFSET %s", [limit, offset]
+
+
+_DEMO_SELECT = """
+    SELECT DISTINCT
+        d.uid::text AS uid,
+        d.term,
+        d.payload->>'name'            AS name,
+        d.payload->>'email_address'   AS email,
+        d.payload->>'major1_major'    AS major,
+        d.payload->>'major1_coll'     AS school
+    FROM src.src_demographics d
+    WHERE {where_clause}
+"""
+
+_PAGE_ORDER = "ORDER BY name NULLS LAST, uid, term NULLS LAST"
+
+
+def _students_page_query(limit, offset, name_filter, major_filter, school_filter,
+                         term_filter, uid_filter, sources_filter, after=None):
+    """
+    SQL + params for one page of the demographics master list.
+    With `after` (a cursor from encode_cursor) the page seeks directly past
+    the previous page's last row in ix_src_demographics_name_uid_term
+    instead of scanning and discarding OFFSET rows.
+    """
+    where_clause, params = _build_demo_where(
+        name_filter, major_filter, school_filter, term_filter, uid_filter, sources_filter
+    )
+    if not after:
+        pagination_clause, pagination_params = _pagination_clause(limit, offset)
+        demo_query = f"""
+            {_DEMO_SELECT.format(where_clause=where_clause)}
+            {_PAGE_ORDER}
+            {pagination_clause}
+        """
+        return demo_query, params + pagination_params
+
+    pagination_clause, pagination_params = _pagination_clause(limit, None)
+    seek_clause, seek_params, null_names = _keyset_clause(after)
+    seeks = [(seek_clause, seek_params)]
+    if null_names:
+        seeks.append(("d.payload->>'name' IS NULL", []))
+    # One ordered, limited index seek per branch; the outer query merges them
+    branches, branch_params = [], []
+    for clause, clause_params in seeks:
+        branches.append(f"""(
+            {_DEMO_SELECT.format(where_clause=f"{where_clause} AND {clause}")}
+            {_PAGE_ORDER}
+            {pagination_clause}
+        )""")
+        branch_params += params + clause_params + pagination_params
+    if len(branches) == 1:
+        return branches[0], branch_params
+    demo_query = f"""
+        SELECT * FROM ({" UNION ALL ".join(branches)}) page
+        {_PAGE_ORDER}
+        {pagination_clause}
+    """
+    return demo_query, branch_params + pagination_params
+
+
+def _students_page_with_count_query(limit, offset, name_filter, major_filter,
+                                    school_filter, term_filter, uid_filter,
+                                    sources_filter, after=None):
+    """
+    SQL + params returning one page of students *and* the exact total in a
+    single statement: the filtered set is materialized once, counted, and
+    paged. Every row carries `total_count`; an empty page comes back as a
+    single row whose uid is NULL (see _split_page_rows).
+    """
+    where_clause, params = _build_demo_where(
+        name_filter, major_filter, school_filter, term_filter, uid_filter, sources_filter
+    )
+    seek_clause, seek_params = "TRUE", []
+    if after:
+        # The page is cut from the materialized match set, so a plain filter will do
+        seek_clause, seek_params, null_names = _keyset_clause(after, "m.name", "m.uid", "m.term")
+        if null_names:
+            seek_clause = f"({seek_clause} OR m.name IS NULL)"
+        offset = None
+
+    pagination_clause, pagination_params = _pagination_clause(limit, offset)
+    query = f"""
+        WITH matched AS MATERIALIZED (
+            {_DEMO_SELECT.format(where_clause=where_clause)}
+        ),
+        page AS (
+            SELECT m.*
+            FROM matched m
+            WHERE {seek_clause}
+            {_PAGE_ORDER}
+            {pagination_clause}
+        )
+        SELECT c.total_count, p.uid, p.term, p.name, p.email, p.major, p.school
+        FROM (SELECT COUNT(DISTINCT uid) AS total_count FROM matched) c
+        LEFT JOIN page p ON TRUE
+        ORDER BY p.name NULLS LAST, p.uid, p.term NULLS LAST
+    """
+    return query, params + seek_params + pagination_params
+
+
+def _split_page_rows(rows):
+    """Split _students_page_with_count_query rows into (students, total)."""
+    total = rows[0]["total_count"] if rows else 0
+    students = []
+    for row in rows:
+        if row["uid"] is None:
+            continue
+        student = dict(row)
+        del student["total_count"]
+        students.append(student)
+    return students, total
+
+
+def _estimated_count_query(name_filter, major_filter, school_filter, term_filter,
+                           uid_filter, sources_filter):
+    """EXPLAIN of the count query — the planner's row estimate, no execution."""
+    where_clause, params = _build_demo_where(
+        name_filter, major_filter, school_filter, term_filter, uid_filter, sources_filter
+    )
+    return f"""
+        EXPLAIN (FORMAT JSON)
+        SELECT DISTINCT d.uid
+        FROM src.src_demographics d
+        WHERE {where_clause}
+    """, params
+
+
+def _plan_json(explain_row) -> dict:
+    """The top-level object of an EXPLAIN (FORMAT JSON) result row."""
+    plan = explain_row["QUERY PLAN"]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+
+def _plan_rows(explain_row) -> int:
+    """Pull the top-level row estimate out of an EXPLAIN (FORMAT JSON) row."""
+    return int(_plan_json(explain_row)["Plan"]["Plan Rows"])
+
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+def _master_outcomes_query(uids):
+    """SQL + params for the master graduate outcomes of a page of students."""
+    return """
+        SELECT student_id::text AS uid, graduation_term,
+               data_source, outcome_status,
+               employer_name, job_title, employment_modality,
+               employer_city, employer_state, employer_country,
+               continuing_education_institution, continuing_education_program,
+               continuing_education_degree,
+               business_name, business_description,
+               volunteer_organization, volunteer_role,
+               military_branch, military_rank,
+               linkedin_profile_url,
+               record_updated_at
+        FROM analytics.master_graduate_outcomes
+        WHERE student_id = ANY(%s)
+    """, [uids]
+
+
+def _master_data(uid, m):
+    """Shape a master_graduate_outcomes row into the frontend's masterData."""
+    return {
+        "id": f"m_{uid}",
+        "selectedSource": m.get("data_source") or "manual",
+        "currentActivity": m.get("outcome_status") or "",
+        "employmentStatus": m.get("outcome_status") or "",
+        "currentEmployer": m.get("employer_name") or "",
+        "currentPosition": m.get("job_title") or "",
+        "currentInstitution": m.get("continuing_education_institution") or "",
+        "lastUpdated": m["record_updated_at"].isoformat()
+            if m.get("record_updated_at") else "",
+    }
+
+
+def _index_master_rows(master_rows):
+    """Master outcome rows keyed by (uid, graduation_term)."""
+    return {(row["uid"], row["graduation_term"]): dict(row) for row in master_rows}
+
+
+def _student_master_data(student, master_by_key):
+    """masterData for a demographics row, if it has a master record for the same term."""
+    m = master_by_key.get((student["uid"], student["term"]))
+    return _master_data(student["uid"], m) if m else None
+
+
+def _merge_students(students, master_rows, qualtrics_by_uid, linkedin_by_uid,
+                    clearinghouse_by_uid):
+    """Attach source data and masterData to each demographics row in place."""
+    master_by_key = _index_master_rows(master_rows)
+
+    for student in students:
+        uid = student["uid"]
+        student["qualtrics_data"]     = qualtrics_by_uid.get(uid, [])
+        student["linkedin_data"]       = linkedin_by_uid.get(uid, [])
+        student["clearinghouse_data"]  = clearinghouse_by_uid.get(uid, [])
+        student["masterData"]          = _student_master_data(student, master_by_key)
+
+    return students
+
+
+def _summarize_students(students, master_rows, summaries_by_uid):
+    """Attach per-source summaries and masterData to each demographics row in place."""
+    master_by_key = _index_master_rows(master_rows)
+
+    for student in students:
+        summaries = summaries_by_uid.get(student["uid"], {})
+        student["sources"] = {
+            source: summaries.get(source, dict(_EMPTY_SOURCE_SUMMARY[source]))
+            for source in SOURCE_NAMES
+        }
+        student["masterData"] = _student_master_data(student, master_by_key)
+
+    return students
+
+
 def get_students_with_data(limit=None, offset=None, name_filter=None,
                            major_filter=None, school_filter=None,
                            term_filter=None, uid_filter=None,
-                           sources_filter=None):
+                           sources_filter=None, after=None):
     """
-    1. Fetch the paginated student list from demographics (master table).
+    1. Fetch the paginated student list from demographics (master table),
+       by OFFSET or, when `after` is given, by keyset cursor.
     2. Fetch qualtrics, linkedin, clearinghouse data for those UIDs in 3
        targeted queries (no joins, no aggregation in SQL).
     3. Merge in Python.
     """
+    demo_query, demo_params = _students_page_query(
+        limit, offset, name_filter, major_filter, school_filter,
+        term_filter, uid_filter, sources_filter, after,
+    )
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            # Step 1 — demographics (master list)
+            cur.execute(demo_query, demo_params)
+            students = [dict(row) for row in cur.fetchall()]
+            return _attach_student_data(cur, students)
+
+
+def _attach_student_data(cur, students, view="full"):
+    """
+    Master outcomes + source rows for a page of demographics rows, merged in.
+    With view="summary" only per-source summaries are fetched and attached.
+    """
+    if not students:
+        return []
+
+    uids = [s["uid"] for s in students]
+
+    if view == "summary":
+        master_rows, *summary_rows = _run_batch(
+            cur.connection, [_master_outcomes_query(uids)] + _source_summary_queries(uids)
+        )
+        return _summarize_students(students, master_rows,
+                                   _group_source_summaries(*summary_rows))
+
+    # Master graduate outcomes (one row per student+term) plus the three
+    # source tables matched on UID only — all four in one pipelined batch
+    master_rows, *source_rows = _run_batch(
+        cur.connection, [_master_outcomes_query(uids)] + _source_queries(uids)
+    )
+    qualtrics_by_uid, linkedin_by_uid, clearinghouse_by_uid = \
+        _group_source_rows(*source_rows)
+
+    return _merge_students(students, master_rows, qualtrics_by_uid,
+                           linkedin_by_uid, clearinghouse_by_uid)
+
+
+def _students_stream_query(name_filter, major_filter, school_filter,
+                           term_filter, uid_filter, sources_filter):
+    """SQL + params for the whole filtered demographics list in UID order."""
     where_clause, params = _build_demo_where(
         name_filter, major_filter, school_filter, term_filter, uid_filter, sources_filter
     )
+    query = f"""
+        {_DEMO_SELECT.format(where_clause=where_clause)}
+        ORDER BY uid, term NULLS LAST
+    """
+    return query, params
 
-    pagination_clause = ""
-    pagination_params = []
-    if limit is not None:
-        pagination_params.append(limit)
-        pagination_clause = "LIMIT %s"
-        if offset is not None:
-            pagination_params.append(offset)
-            pagination_clause += " OFFSET %s"
 
-    demo_query = f"""
-        SELECT DISTINCT
-            d.uid::text AS uid,
-            d.term,
-            d.payload->>'name'            AS name,
-            d.payload->>'email_address'   AS email,
-            d.payload->>'major1_major'    AS major,
-            d.payload->>'major1_coll'     AS school
-        FROM src.src_demographics d
-        WHERE {where_clause}
-        ORDER BY name NULLS LAST
-        {pagination_clause}
+def iter_student_chunks(name_filter=None, major_filter=None, school_filter=None,
+                        term_filter=None, uid_filter=None, sources_filter=None,
+                        chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield fully merged student records (same shape as get_students_with_data)
+    in UID-ordered lists of at most `chunk_size`.
+
+    Demographics are read through a named server-side cursor and master /
+    source rows are fetched per chunk, so memory stays bounded by the chunk
+    size instead of growing with the cohort. The pooled connection is held
+    until the generator is exhausted or closed.
+    """
+    query, params = _students_stream_query(
+        name_filter, major_filter, school_filter, term_filter, uid_filter, sources_filter
+    )
+
+    with get_db_connection() as conn:
+        with conn.cursor(name="students_stream") as stream, conn.cursor() as cur:
+            stream.itersize = chunk_size
+            stream.execute(query, params)
+            while True:
+                rows = stream.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield _attach_student_data(cur, [dict(row) for row in rows])
+
+
+def iter_students_with_data(name_filter=None, major_filter=None, school_filter=None,
+                            term_filter=None, uid_filter=None, sources_filter=None,
+                            chunk_size=STREAM_CHUNK_SIZE):
+    """Stream merged student records one at a time (see iter_student_chunks)."""
+    for chunk in iter_student_chunks(name_filter, major_filter, school_filter,
+                                     term_filter, uid_filter, sources_filter, chunk_size):
+        yield from chunk
+
+
+def get_students_page(limit=None, offset=None, name_filter=None,
+                      major_filter=None, school_filter=None,
+                      term_filter=None, uid_filter=None,
+                      sources_filter=None, after=None, count="exact", view="full"):
+    """
+    Like get_students_with_data, but also returns the total for the filters
+    without re-running them in a separate query. Returns (students, total).
+
+    count="exact"    – page and COUNT(DISTINCT uid) from one statement
+    count="estimate" – page plus the planner's row estimate (no count scan)
+    count="none"     – page only; total is None (infinite-scroll clients)
+
+    view="summary" replaces the *_data lists with per-source summaries
+    (see _source_summary_queries); full rows come from get_student_source.
     """
+    if count not in COUNT_MODES:
+        raise ValueError(f"Invalid count mode: {count}")
+    if view not in VIEWS:
+        raise ValueError(f"Invalid view: {view}")
+    filters = (name_filter, major_filter, school_filter, term_filter,
+               uid_filter, sources_filter)
 
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            # Step 1 — demographics (master list)
-            cur.execute(demo_query, params + pagination_params)
-            students = [dict(row) for row in cur.fetchall()]
+            if count == "exact":
+                cur.execute(*_students_page_with_count_query(limit, offset, *filters, after))
+                students, total = _split_page_rows(cur.fetchall())
+            else:
+                total = None
+                if count == "estimate":
+                    cur.execute(*_estimated_count_query(*filters))
+                    total = _plan_rows(cur.fetchone())
+                cur.execute(*_students_page_query(limit, offset, *filters, after))
+                students = [dict(row) for row in cur.fetchall()]
 
-            if not students:
-                return []
+            return _attach_student_data(cur, students, view), total
 
-            uids = [s["uid"] for s in students]
-            placeholders = ",".join(["%s"] * len(uids))
-
-            # Step 2 — master graduate outcomes (one row per student+term)
-            cur.execute(f"""
-                SELECT student_id::text AS uid, graduation_term,
-                       data_source, outcome_status,
-                       employer_name, job_title, employment_modality,
-                       employer_city, employer_state, employer_country,
-                       continuing_education_institution, continuing_education_program,
-                       continuing_education_degree,
-                       business_name, business_description,
-                       volunteer_organization, volunteer_role,
-                       military_branch, military_rank,
-                       linkedin_profile_url,
-                       record_updated_at
-                FROM analytics.master_graduate_outcomes
-                WHERE student_id::text IN ({placeholders})
-            """, uids)
-            master_by_uid = {}
-            for row in cur.fetchall():
-                master_by_uid[row["uid"]] = dict(row)
-
-            # Steps 3-5 — source tables, matched on UID only
-            qualtrics_by_uid, linkedin_by_uid, clearinghouse_by_uid = \
-                _fetch_source_data(cur, uids)
-
-            # Step 6 — merge
-            for student in students:
-                uid = student["uid"]
-                student["qualtrics_data"]     = qualtrics_by_uid.get(uid, [])
-                student["linkedin_data"]       = linkedin_by_uid.get(uid, [])
-                student["clearinghouse_data"]  = clearinghouse_by_uid.get(uid, [])
-
-                m = master_by_uid.get(uid)
-                if m and m.get("graduation_term") == student["term"]:
-                    student["masterData"] = {
-                        "id": f"m_{uid}",
-                        "selectedSource": m.get("data_source") or "manual",
-                        "currentActivity": m.get("outcome_status") or "",
-                        "employmentStatus": m.get("outcome_status") or "",
-                        "currentEmployer": m.get("employer_name") or "",
-                        "currentPosition": m.get("job_title") or "",
-                        "currentInstitution": m.get("continuing_education_institution") or "",
-                        "lastUpdated": m["record_updated_at"].isoformat()
-                            if m.get("record_updated_at") else "",
-                    }
-                else:
-                    student["masterData"] = None
-
-            return students
+
+def _student_count_query(name_filter, major_filter, school_filter, term_filter,
+                         uid_filter, sources_filter):
+    """SQL + params counting distinct students matching the filters."""
+    where_clause, params = _build_demo_where(
+        name_filter, major_filter, school_filter, term_filter, uid_filter, sources_filter
+    )
+    return f"""
+        SELECT COUNT(DISTINCT d.uid)
+        FROM src.src_demographics d
+        WHERE {where_clause}
+    """, params
 
 
 def get_total_student_count(name_filter=None, major_filter=None,
                             school_filter=None, term_filter=None,
                             uid_filter=None, sources_filter=None):
     """Count of distinct students in demographics matching the filters."""
-    where_clause, params = _build_demo_where(
+    query, params = _student_count_query(
         name_filter, major_filter, school_filter, term_filter, uid_filter, sources_filter
     )
 
-    query = f"""
-        SELECT COUNT(DISTINCT d.uid)
-        FROM src.src_demographics d
-        WHERE {where_clause}
-    """
-
     with get_db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute(query, params)
@@ -278,17 +790,27 @@ def get_total_student_count(name_filter=None, major_filter=None,
             return result["count"] if result else 0
 
 
+_DISTINCT_VALUES_SQL = """
+    SELECT DISTINCT payload->>%s AS val
+    FROM src.src_demographics
+    WHERE payload->>%s IS NOT NULL
+      AND payload->>%s <> ''
+    ORDER BY val
+"""
+
+_DISTINCT_TERMS_SQL = """
+    SELECT DISTINCT term
+    FROM src.src_demographics
+    WHERE term IS NOT NULL AND term <> ''
+    ORDER BY term DESC
+"""
+
+
 def get_distinct_values(payload_field: str) -> list:
     """Return sorted distinct non-null values for a demographics payload field."""
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(f"""
-                SELECT DISTINCT payload->>%s AS val
-                FROM src.src_demographics
-                WHERE payload->>%s IS NOT NULL
-                  AND payload->>%s <> ''
-                ORDER BY val
-            """, (payload_field, payload_field, payload_field))
+            cur.execute(_DISTINCT_VALUES_SQL, (payload_field, payload_field, payload_field))
             return [row["val"] for row in cur.fetchall()]
 
 
@@ -296,12 +818,7 @@ def get_distinct_terms() -> list:
     """Return distinct terms from demographics, newest first."""
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT term
-                FROM src.src_demographics
-                WHERE term IS NOT NULL AND term <> ''
-                ORDER BY term DESC
-            """)
+            cur.execute(_DISTINCT_TERMS_SQL)
             return [row["term"] for row in cur.fetchall()]
 
 
@@ -498,10 +1015,10 @@ def _extract_clearinghouse(payload: dict) -> dict:
     }
 
 
-def _upsert_master(cur, student_id, graduation_term, demo, source_name, fields):
-    """Run the actual INSERT ... ON CONFLICT upsert into master_graduate_outcomes."""
+def _upsert_master_query(student_id, graduation_term, demo, source_name, fields):
+    """SQL + params for the INSERT ... ON CONFLICT upsert into master_graduate_outcomes."""
     first_name, last_name = _parse_name(demo['name'])
-    cur.execute("""
+    return """
         INSERT INTO analytics.master_graduate_outcomes (
             student_id, graduation_term,
             first_name, last_name, full_name, email_address,
@@ -613,36 +1130,45 @@ def _upsert_master(cur, student_id, graduation_term, demo, source_name, fields):
         fields.get('military_branch'),
         fields.get('military_rank'),
         fields.get('linkedin_profile_url'),
-    ))
+    )
+
+
+def _upsert_master(cur, student_id, graduation_term, demo, source_name, fields):
+    """Run the actual INSERT ... ON CONFLICT upsert into master_graduate_outcomes."""
+    cur.execute(*_upsert_master_query(student_id, graduation_term, demo, source_name, fields))
+
+
+_DEMO_FOR_MASTER_SQL = """
+    SELECT payload->>'name'          AS name,
+           payload->>'email_address' AS email,
+           payload->>'major1_major'  AS major,
+           payload->>'major2_major'  AS secondary_major,
+           payload->>'major3_major'  AS tertiary_major
+    FROM src.src_demographics
+    WHERE uid = %s {term_clause}
+    LIMIT 1
+"""
+
+
+def _fetch_demo_queries(student_id, graduation_term):
+    """Demographics lookups for a master save: exact term first, then any term."""
+    return [
+        (_DEMO_FOR_MASTER_SQL.format(term_clause="AND term = %s"), (student_id, graduation_term)),
+        (_DEMO_FOR_MASTER_SQL.format(term_clause=""), (student_id,)),
+    ]
 
 
 def _fetch_demo(cur, student_id, graduation_term):
-    cur.execute("""
-        SELECT payload->>'name'          AS name,
-               payload->>'email_address' AS email,
-               payload->>'major1_major'  AS major,
-               payload->>'major2_major'  AS secondary_major,
-               payload->>'major3_major'  AS tertiary_major
-        FROM src.src_demographics
-        WHERE uid::text = %s AND term = %s
-        LIMIT 1
-    """, (student_id, graduation_term))
-    demo = cur.fetchone()
-    if not demo:
-        cur.execute("""
-            SELECT payload->>'name'          AS name,
-                   payload->>'email_address' AS email,
-                   payload->>'major1_major'  AS major,
-                   payload->>'major2_major'  AS secondary_major,
-                   payload->>'major3_major'  AS tertiary_major
-            FROM src.src_demographics
-            WHERE uid::text = %s
-            LIMIT 1
-        """, (student_id,))
-        demo = cur.fetchone()
-    if not demo:
-        raise ValueError(f"Student {student_id} not found in demographics")
-    return demo
+    try:
+        for query, params in _fetch_demo_queries(student_id, graduation_term):
+            cur.execute(query, params)
+            demo = cur.fetchone()
+            if demo:
+                return demo
+    except psycopg.DataError:
+        # Not castable to the native uid type (e.g. letters in a numeric key)
+        pass
+    raise ValueError(f"Student {student_id} not found in demographics")
 
 
 def _merge_clearinghouse_records(rows: list) -> dict:
@@ -732,6 +1258,58 @@ def _merge_qualtrics_submissions(rows: list) -> dict:
     return merged
 
 
+# source_name → (query, merge function, label used in "No ... data" errors)
+_MASTER_SOURCE_QUERIES = {
+    'qualtrics': ("""
+        SELECT payload, recorded_at FROM src.src_qualtrics_response
+        WHERE student_key = %s
+        ORDER BY recorded_at DESC NULLS LAST, id DESC
+    """, _merge_qualtrics_submissions, 'Qualtrics'),
+    'linkedin': ("""
+        SELECT payload FROM src.src_linkedin_position
+        WHERE student_key = %s
+        ORDER BY id DESC
+    """, _merge_linkedin_positions, 'LinkedIn'),
+    'clearinghouse': ("""
+        SELECT payload FROM src.src_clearinghouse_record
+        WHERE student_key = %s
+        ORDER BY id DESC
+    """, _merge_clearinghouse_records, 'Clearinghouse'),
+}
+
+
+def _master_source_query(source_name):
+    """Return (query, merge_fn, label) for a source-based master save."""
+    if source_name not in _MASTER_SOURCE_QUERIES:
+        raise ValueError(f"Unknown source: {source_name}")
+    return _MASTER_SOURCE_QUERIES[source_name]
+
+
+def _merge_master_source_rows(student_id, source_name, rows):
+    """Merge fetched source rows into master fields, or raise if there are none."""
+    _, merge, label = _master_source_query(source_name)
+    if not rows:
+        raise ValueError(f"No {label} data for student {student_id}")
+    return merge(rows)
+
+
+_master_write_listeners = []
+
+
+def add_master_write_listener(listener):
+    """
+    Register listener(student_id, graduation_term, major), called after every
+    committed master save or delete, sync or async (e.g. to invalidate cached
+    report results). `major` is the student's demographics major, or None.
+    """
+    _master_write_listeners.append(listener)
+
+
+def _notify_master_write(student_id, graduation_term, major):
+    for listener in _master_write_listeners:
+        listener(student_id, graduation_term, major)
+
+
 def save_master_from_source(student_id: str, graduation_term: str,
                             source_name: str) -> dict:
     """
@@ -743,48 +1321,41 @@ def save_master_from_source(student_id: str, graduation_term: str,
         with conn.cursor() as cur:
             demo = _fetch_demo(cur, student_id, graduation_term)
 
-            if source_name == 'qualtrics':
-                cur.execute("""
-                    SELECT payload, recorded_at FROM src.src_qualtrics_response
-                    WHERE student_key::text = %s
-                    ORDER BY recorded_at DESC NULLS LAST
-                """, (student_id,))
-                rows = cur.fetchall()
-                if not rows:
-                    raise ValueError(f"No Qualtrics data for student {student_id}")
-                fields = _merge_qualtrics_submissions(rows)
-
-            elif source_name == 'linkedin':
-                cur.execute("""
-                    SELECT payload FROM src.src_linkedin_position
-                    WHERE student_key::text = %s
-                    ORDER BY id DESC
-                """, (student_id,))
-                rows = cur.fetchall()
-                if not rows:
-                    raise ValueError(f"No LinkedIn data for student {student_id}")
-                fields = _merge_linkedin_positions(rows)
-
-            elif source_name == 'clearinghouse':
-                cur.execute("""
-                    SELECT payload FROM src.src_clearinghouse_record
-                    WHERE student_key::text = %s
-                    ORDER BY id DESC
-                """, (student_id,))
-                rows = cur.fetchall()
-                if not rows:
-                    raise ValueError(f"No Clearinghouse data for student {student_id}")
-                fields = _merge_clearinghouse_records(rows)
-
-            else:
-                raise ValueError(f"Unknown source: {source_name}")
+            query, _, _ = _master_source_query(source_name)
+            cur.execute(query, (student_id,))
+            fields = _merge_master_source_rows(student_id, source_name, cur.fetchall())
 
             _upsert_master(cur, student_id, graduation_term, demo, source_name, fields)
         conn.commit()
+    _notify_master_write(student_id, graduation_term, demo['major'])
 
     return {**fields, 'data_source': source_name, 'student_name': demo['name']}
 
 
+def _manual_master_fields(outcome_data: dict):
+    """Map a manual / edited save payload to (master fields, data_source)."""
+    fields = {
+        'outcome_status':                   _v(outcome_data.get('outcome_status')),
+        'employer_name':                    _v(outcome_data.get('employer_name')),
+        'job_title':                        _v(outcome_data.get('job_title')),
+        'employment_modality':              _v(outcome_data.get('employment_modality')),
+        'employer_city':                    _v(outcome_data.get('employer_city')),
+        'employer_state':                   _v(outcome_data.get('employer_state')),
+        'employer_country':                 _v(outcome_data.get('employer_country')),
+        'continuing_education_institution': _v(outcome_data.get('continuing_education_institution')),
+        'continuing_education_program':     _v(outcome_data.get('continuing_education_program')),
+        'continuing_education_degree':      _v(outcome_data.get('continuing_education_degree')),
+        'business_name':                    _v(outcome_data.get('business_name')),
+        'business_position_title':          _v(outcome_data.get('business_position_title')),
+        'military_branch':                  _v(outcome_data.get('military_branch')),
+        'military_rank':                    _v(outcome_data.get('military_rank')),
+        'volunteer_organization':           _v(outcome_data.get('volunteer_organization')),
+        'volunteer_role':                   _v(outcome_data.get('volunteer_role')),
+    }
+    source = _v(outcome_data.get('selected_source') or 'manual')
+    return fields, source
+
+
 def save_master_record(student_id: str, graduation_term: str, outcome_data: dict):
     """
     Upsert manual / edited data into analytics.master_graduate_outcomes.
@@ -794,42 +1365,36 @@ def save_master_record(student_id: str, graduation_term: str, outcome_data: dict
     with get_db_connection() as conn:
         with conn.cursor() as cur:
             demo = _fetch_demo(cur, student_id, graduation_term)
-            fields = {
-                'outcome_status':                   _v(outcome_data.get('outcome_status')),
-                'employer_name':                    _v(outcome_data.get('employer_name')),
-                'job_title':                        _v(outcome_data.get('job_title')),
-                'employment_modality':              _v(outcome_data.get('employment_modality')),
-                'employer_city':                    _v(outcome_data.get('employer_city')),
-                'employer_state':                   _v(outcome_data.get('employer_state')),
-                'employer_country':                 _v(outcome_data.get('employer_country')),
-                'continuing_education_institution': _v(outcome_data.get('continuing_education_institution')),
-                'continuing_education_program':     _v(outcome_data.get('continuing_education_program')),
-                'continuing_education_degree':      _v(outcome_data.get('continuing_education_degree')),
-                'business_name':                    _v(outcome_data.get('business_name')),
-                'business_position_title':          _v(outcome_data.get('business_position_title')),
-                'military_branch':                  _v(outcome_data.get('military_branch')),
-                'military_rank':                    _v(outcome_data.get('military_rank')),
-                'volunteer_organization':           _v(outcome_data.get('volunteer_organization')),
-                'volunteer_role':                   _v(outcome_data.get('volunteer_role')),
-            }
-            source = _v(outcome_data.get('selected_source') or 'manual')
+            fields, source = _manual_master_fields(outcome_data)
             _upsert_master(cur, student_id, graduation_term, demo, source, fields)
         conn.commit()
+    _notify_master_write(student_id, graduation_term, demo['major'])
+
+
+_DELETE_MASTER_SQL = """
+    DELETE FROM analytics.master_graduate_outcomes
+    WHERE student_id = %s AND graduation_term = %s
+    RETURNING primary_major AS major
+"""
 
 
 def delete_master_record(student_id: str, graduation_term: str):
     """Delete a student's master record."""
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
-                DELETE FROM analytics.master_graduate_outcomes
-                WHERE student_id::text = %s AND graduation_term = %s
-            """, (student_id, graduation_term))
+            try:
+                cur.execute(_DELETE_MASTER_SQL, (student_id, graduation_term))
+            except psycopg.DataError:
+                # Not castable to the native key type — nothing to delete
+                return
+            deleted = cur.fetchone()
         conn.commit()
+    if deleted:
+        _notify_master_write(student_id, graduation_term, deleted['major'])
 
 
-def get_master_records(term_filter=None, major_filter=None, school_filter=None) -> list:
-    """Fetch records from analytics.master_graduate_outcomes with optional filters."""
+def _master_records_query(term_filter=None, major_filter=None, school_filter=None):
+    """SQL + params for analytics.master_graduate_outcomes export rows."""
     clauses = []
     params = []
     if term_filter:
@@ -850,34 +1415,73 @@ def get_master_records(term_filter=None, major_filter=None, school_filter=None)
             params.append(f"%{major_filter}%")
 
     where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return f"""
+        SELECT student_id, graduation_term,
+               first_name, last_name, full_name, email_address,
+               primary_major, secondary_major, tertiary_major,
+               data_source,
+               outcome_status, outcome_recorded_date,
+               employer_name, job_title, employment_modality,
+               employer_city, employer_state, employer_country,
+               continuing_education_institution, continuing_education_program,
+               continuing_education_degree, continuing_education_city,
+               continuing_education_state, continuing_education_country,
+               business_name, business_position_title, business_description,
+               business_year_started,
+               business_city, business_state, business_country,
+               volunteer_organization, volunteer_role,
+               volunteer_city, volunteer_state, volunteer_country,
+               military_branch, military_rank,
+               linkedin_profile_url,
+               record_created_at, record_updated_at
+        FROM analytics.master_graduate_outcomes
+        {where}
+        ORDER BY full_name NULLS LAST
+    """, params
+
+
+def get_master_records(term_filter=None, major_filter=None, school_filter=None) -> list:
+    """Fetch records from analytics.master_graduate_outcomes with optional filters."""
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute(f"""
-                SELECT student_id, graduation_term,
-                       first_name, last_name, full_name, email_address,
-                       primary_major, secondary_major, tertiary_major,
-                       data_source,
-                       outcome_status, outcome_recorded_date,
-                       employer_name, job_title, employment_modality,
-                       employer_city, employer_state, employer_country,
-                       continuing_education_institution, continuing_education_program,
-                       continuing_education_degree, continuing_education_city,
-                       continuing_education_state, continuing_education_country,
-                       business_name, business_position_title, business_description,
-                       business_year_started,
-                       business_city, business_state, business_country,
-                       volunteer_organization, volunteer_role,
-                       volunteer_city, volunteer_state, volunteer_country,
-                       military_branch, military_rank,
-                       linkedin_profile_url,
-                       record_created_at, record_updated_at
-                FROM analytics.master_graduate_outcomes
-                {where}
-                ORDER BY full_name NULLS LAST
-            """, params)
+            cur.execute(*_master_records_query(term_filter, major_filter, school_filter))
             return [dict(row) for row in cur.fetchall()]
 
 
+def iter_master_records(term_filter=None, major_filter=None, school_filter=None,
+                        chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream get_master_records rows one at a time through a named server-side
+    cursor, fetching `chunk_size` rows per round trip. The pooled connection
+    is held until the generator is exhausted or closed.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor(name="master_records_stream") as cur:
+            cur.itersize = chunk_size
+            cur.execute(*_master_records_query(term_filter, major_filter, school_filter))
+            yield from cur
+
+
+_STUDENT_BY_UID_SQL = """
+    SELECT DISTINCT
+        d.uid::text AS uid,
+        d.term,
+        d.payload->>'name'           AS name,
+        d.payload->>'email_address'  AS email,
+        d.payload->>'major1_major'   AS major,
+        d.payload->>'major1_coll'    AS school
+    FROM src.src_demographics d
+    WHERE d.uid = %s
+"""
+
+_MASTER_BY_UID_SQL = """
+    SELECT data_source, outcome_status, employer_name, job_title,
+           continuing_education_institution, record_updated_at
+    FROM analytics.master_graduate_outcomes
+    WHERE student_id = %s AND graduation_term = %s
+"""
+
+
 def get_student_by_uid(uid: str):
     """
     Fetch a single student by exact UID.
@@ -885,17 +1489,11 @@ def get_student_by_uid(uid: str):
     """
     with get_db_connection() as conn:
         with conn.cursor() as cur:
-            cur.execute("""
-                SELECT DISTINCT
-                    d.uid::text AS uid,
-                    d.term,
-                    d.payload->>'name'           AS name,
-                    d.payload->>'email_address'  AS email,
-                    d.payload->>'major1_major'   AS major,
-                    d.payload->>'major1_coll'    AS school
-                FROM src.src_demographics d
-                WHERE d.uid::text = %s
-            """, (uid,))
+            try:
+                cur.execute(_STUDENT_BY_UID_SQL, (uid,))
+            except psycopg.DataError:
+                # Not castable to the native uid type — no such student
+                return None
             student = cur.fetchone()
 
             if not student:
@@ -908,25 +1506,20 @@ def get_student_by_uid(uid: str):
             student["clearinghouse_data"] = c.get(uid, [])
 
             # Attach master data if it exists
-            cur.execute("""
-                SELECT data_source, outcome_status, employer_name, job_title,
-                       continuing_education_institution, record_updated_at
-                FROM analytics.master_graduate_outcomes
-                WHERE student_id::text = %s AND graduation_term = %s
-            """, (uid, student["term"]))
+            cur.execute(_MASTER_BY_UID_SQL, (uid, student["term"]))
             m = cur.fetchone()
-            if m:
-                student["masterData"] = {
-                    "id": f"m_{uid}",
-                    "selectedSource": m.get("data_source") or "manual",
-                    "currentActivity": m.get("outcome_status") or "",
-                    "employmentStatus": m.get("outcome_status") or "",
-                    "currentEmployer": m.get("employer_name") or "",
-                    "currentPosition": m.get("job_title") or "",
-                    "currentInstitution": m.get("continuing_education_institution") or "",
-                    "lastUpdated": m["record_updated_at"].isoformat()
-                        if m.get("record_updated_at") else "",
-                }
-            else:
-                student["masterData"] = None
+            student["masterData"] = _master_data(uid, m) if m else None
             return student
+
+
+def get_student_source(uid: str, source: str) -> list:
+    """Full rows (with payloads) from one source table for one student."""
+    query, params = _student_source_query(uid, source)
+
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            try:
+                cur.execute(query, params)
+            except psycopg.DataError:
+                return []
+            return _group_student_source_rows(uid, source, cur.fetchall())
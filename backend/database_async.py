@@ -0,0 +1,297 @@
+"""
+Asyncio variant of the data-access layer used by the `async def` endpoints.
+
+Built on psycopg's AsyncConnection / AsyncConnectionPool so a single worker
+can keep hundreds of requests in flight while Postgres does the waiting.
+SQL text, row grouping and field extraction are shared with `database`,
+so the two layers always return identical shapes.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import psycopg
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+import database
+from database import DB_CONFIG, POOL_CONFIG
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_pool() -> AsyncConnectionPool:
+    """Return the process-wide async pool, opening it on first use."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                pool = AsyncConnectionPool(
+                    kwargs={**DB_CONFIG, "row_factory": dict_row},
+                    check=AsyncConnectionPool.check_connection,
+                    name="gradsurvey-async",
+                    open=False,
+                    **POOL_CONFIG,
+                )
+                await pool.open()
+                _pool = pool
+    return _pool
+
+
+async def close_pool():
+    """Close the async pool (called on application shutdown)."""
+    global _pool
+    async with _pool_lock:
+        if _pool is not None:
+            await _pool.close()
+            _pool = None
+
+
+def get_pool_stats() -> dict:
+    """Async pool configuration plus live counters."""
+    stats = {"config": dict(POOL_CONFIG), "open": _pool is not None}
+    if _pool is not None:
+        stats.update(_pool.get_stats())
+    return stats
+
+
+@asynccontextmanager
+async def get_db_connection():
+    """Borrow an AsyncConnection from the pool (commit on exit, rollback on error)."""
+    pool = await get_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+async def _run_batch(conn, queries, pipeline=True):
+    """Async counterpart of database._run_batch."""
+    cursors = [conn.cursor() for _ in queries]
+    try:
+        if pipeline and psycopg.Pipeline.is_supported():
+            async with conn.pipeline():
+                for cur, (query, params) in zip(cursors, queries):
+                    await cur.execute(query, params)
+        else:
+            for cur, (query, params) in zip(cursors, queries):
+                await cur.execute(query, params)
+        return [await cur.fetchall() for cur in cursors]
+    finally:
+        for cur in cursors:
+            await cur.close()
+
+
+async def _fetch_source_data(cur, uids):
+    """Async counterpart of database._fetch_source_data."""
+    if not uids:
+        return {}, {}, {}
+
+    return database._group_source_rows(
+        *await _run_batch(cur.connection, database._source_queries(uids))
+    )
+
+
+async def get_students_with_data(limit=None, offset=None, name_filter=None,
+                                 major_filter=None, school_filter=None,
+                                 term_filter=None, uid_filter=None,
+                                 sources_filter=None, after=None):
+    """Async counterpart of database.get_students_with_data."""
+    demo_query, demo_params = database._students_page_query(
+        limit, offset, name_filter, major_filter, school_filter,
+        term_filter, uid_filter, sources_filter, after,
+    )
+
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(demo_query, demo_params)
+            students = [dict(row) for row in await cur.fetchall()]
+            return await _attach_student_data(cur, students)
+
+
+async def _attach_student_data(cur, students, view="full"):
+    """Async counterpart of database._attach_student_data."""
+    if not students:
+        return []
+
+    uids = [s["uid"] for s in students]
+
+    if view == "summary":
+        master_rows, *summary_rows = await _run_batch(
+            cur.connection,
+            [database._master_outcomes_query(uids)] + database._source_summary_queries(uids),
+        )
+        return database._summarize_students(students, master_rows,
+                                            database._group_source_summaries(*summary_rows))
+
+    master_rows, *source_rows = await _run_batch(
+        cur.connection,
+        [database._master_outcomes_query(uids)] + database._source_queries(uids),
+    )
+    qualtrics_by_uid, linkedin_by_uid, clearinghouse_by_uid = \
+        database._group_source_rows(*source_rows)
+
+    return database._merge_students(students, master_rows, qualtrics_by_uid,
+                                    linkedin_by_uid, clearinghouse_by_uid)
+
+
+async def get_students_page(limit=None, offset=None, name_filter=None,
+                            major_filter=None, school_filter=None,
+                            term_filter=None, uid_filter=None,
+                            sources_filter=None, after=None, count="exact", view="full"):
+    """Async counterpart of database.get_students_page; returns (students, total)."""
+    if count not in database.COUNT_MODES:
+        raise ValueError(f"Invalid count mode: {count}")
+    if view not in database.VIEWS:
+        raise ValueError(f"Invalid view: {view}")
+    filters = (name_filter, major_filter, school_filter, term_filter,
+               uid_filter, sources_filter)
+
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            if count == "exact":
+                await cur.execute(*database._students_page_with_count_query(
+                    limit, offset, *filters, after
+                ))
+                students, total = database._split_page_rows(await cur.fetchall())
+            else:
+                total = None
+                if count == "estimate":
+                    await cur.execute(*database._estimated_count_query(*filters))
+                    total = database._plan_rows(await cur.fetchone())
+                await cur.execute(*database._students_page_query(
+                    limit, offset, *filters, after
+                ))
+                students = [dict(row) for row in await cur.fetchall()]
+
+            return await _attach_student_data(cur, students, view), total
+
+
+async def get_total_student_count(name_filter=None, major_filter=None,
+                                  school_filter=None, term_filter=None,
+                                  uid_filter=None, sources_filter=None):
+    """Async counterpart of database.get_total_student_count."""
+    query, params = database._student_count_query(
+        name_filter, major_filter, school_filter, term_filter, uid_filter, sources_filter
+    )
+
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(query, params)
+            result = await cur.fetchone()
+            return result["count"] if result else 0
+
+
+async def get_distinct_values(payload_field: str) -> list:
+    """Async counterpart of database.get_distinct_values."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(database._DISTINCT_VALUES_SQL,
+                              (payload_field, payload_field, payload_field))
+            return [row["val"] for row in await cur.fetchall()]
+
+
+async def get_distinct_terms() -> list:
+    """Async counterpart of database.get_distinct_terms."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(database._DISTINCT_TERMS_SQL)
+            return [row["term"] for row in await cur.fetchall()]
+
+
+async def _fetch_demo(cur, student_id, graduation_term):
+    try:
+        for query, params in database._fetch_demo_queries(student_id, graduation_term):
+            await cur.execute(query, params)
+            demo = await cur.fetchone()
+            if demo:
+                return demo
+    except psycopg.DataError:
+        pass
+    raise ValueError(f"Student {student_id} not found in demographics")
+
+
+async def save_master_from_source(student_id: str, graduation_term: str,
+                                  source_name: str) -> dict:
+    """Async counterpart of database.save_master_from_source."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            demo = await _fetch_demo(cur, student_id, graduation_term)
+
+            query, _, _ = database._master_source_query(source_name)
+            await cur.execute(query, (student_id,))
+            fields = database._merge_master_source_rows(
+                student_id, source_name, await cur.fetchall()
+            )
+
+            await cur.execute(*database._upsert_master_query(
+                student_id, graduation_term, demo, source_name, fields
+            ))
+        await conn.commit()
+    database._notify_master_write(student_id, graduation_term, demo['major'])
+
+    return {**fields, 'data_source': source_name, 'student_name': demo['name']}
+
+
+async def save_master_record(student_id: str, graduation_term: str, outcome_data: dict):
+    """Async counterpart of database.save_master_record."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            demo = await _fetch_demo(cur, student_id, graduation_term)
+            fields, source = database._manual_master_fields(outcome_data)
+            await cur.execute(*database._upsert_master_query(
+                student_id, graduation_term, demo, source, fields
+            ))
+        await conn.commit()
+    database._notify_master_write(student_id, graduation_term, demo['major'])
+
+
+async def delete_master_record(student_id: str, graduation_term: str):
+    """Async counterpart of database.delete_master_record."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            try:
+                await cur.execute(database._DELETE_MASTER_SQL, (student_id, graduation_term))
+            except psycopg.DataError:
+                return
+            deleted = await cur.fetchone()
+        await conn.commit()
+    if deleted:
+        database._notify_master_write(student_id, graduation_term, deleted['major'])
+
+
+async def get_student_by_uid(uid: str):
+    """Async counterpart of database.get_student_by_uid."""
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            try:
+                await cur.execute(database._STUDENT_BY_UID_SQL, (uid,))
+            except psycopg.DataError:
+                return None
+            student = await cur.fetchone()
+
+            if not student:
+                return None
+
+            student = dict(student)
+            q, l, c = await _fetch_source_data(cur, [uid])
+            student["qualtrics_data"]    = q.get(uid, [])
+            student["linkedin_data"]     = l.get(uid, [])
+            student["clearinghouse_data"] = c.get(uid, [])
+
+            await cur.execute(database._MASTER_BY_UID_SQL, (uid, student["term"]))
+            m = await cur.fetchone()
+            student["masterData"] = database._master_data(uid, m) if m else None
+            return student
+
+
+async def get_student_source(uid: str, source: str) -> list:
+    """Async counterpart of database.get_student_source."""
+    query, params = database._student_source_query(uid, source)
+
+    async with get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            try:
+                await cur.execute(query, params)
+            except psycopg.DataError:
+                return []
+            return database._group_student_source_rows(uid, source, await cur.fetchall())
@@ -0,0 +1,120 @@
+"""
+Streaming serializers for the master-record export (/api/export).
+
+Rows come one at a time from database.iter_master_records (a server-side
+cursor) and are encoded into CSV or NDJSON lines that are yielded in
+batches, so memory stays constant however many records are exported.
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+
+FORMATS = ("json", "csv", "ndjson")
+
+MEDIA_TYPES = {
+    "csv":    "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# (column, CSV header) — same headers as the Download page's client-side CSV
+CSV_COLUMNS = [
+    ("student_id",                       "UID"),
+    ("full_name",                        "Full Name"),
+    ("first_name",                       "First Name"),
+    ("last_name",                        "Last Name"),
+    ("email_address",                    "Email"),
+    ("primary_major",                    "Primary Major"),
+    ("secondary_major",                  "Secondary Major"),
+    ("tertiary_major",                   "Tertiary Major"),
+    ("graduation_term",                  "Graduation Term"),
+    ("data_source",                      "Data Source"),
+    ("outcome_status",                   "Outcome Status"),
+    ("outcome_recorded_date",            "Outcome Recorded Date"),
+    # Employment
+    ("employer_name",                    "Employer Name"),
+    ("job_title",                        "Job Title"),
+    ("employment_modality",              "Employment Modality"),
+    ("employer_city",                    "Employer City"),
+    ("employer_state",                   "Employer State"),
+    ("employer_country",                 "Employer Country"),
+    # Continuing Education
+    ("continuing_education_institution", "CE Institution"),
+    ("continuing_education_program",     "CE Program"),
+    ("continuing_education_degree",      "CE Degree"),
+    ("continuing_education_city",        "CE City"),
+    ("continuing_education_state",       "CE State"),
+    ("continuing_education_country",     "CE Country"),
+    # Business / Entrepreneur
+    ("business_name",                    "Business Name"),
+    ("business_position_title",          "Business Position Title"),
+    ("business_description",             "Business Description"),
+    ("business_year_started",            "Business Year Started"),
+    ("business_city",                    "Business City"),
+    ("business_state",                   "Business State"),
+    ("business_country",                 "Business Country"),
+    # Volunteer
+    ("volunteer_organization",           "Volunteer Organization"),
+    ("volunteer_role",                   "Volunteer Role"),
+    ("volunteer_city",                   "Volunteer City"),
+    ("volunteer_state",                  "Volunteer State"),
+    ("volunteer_country",                "Volunteer Country"),
+    # Military
+    ("military_branch",                  "Military Branch"),
+    ("military_rank",                    "Military Rank"),
+    # Other
+    ("linkedin_profile_url",             "LinkedIn Profile URL"),
+    ("record_created_at",                "Record Created"),
+    ("record_updated_at",                "Last Updated"),
+]
+
+# Rows encoded per yielded chunk — keeps send() calls reasonably large
+ROWS_PER_CHUNK = 500
+
+
+def _json_value(value):
+    """Timestamps as ISO strings, everything else as-is (matches the JSON export)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def serialize_record(row: dict) -> dict:
+    return {key: _json_value(value) for key, value in row.items()}
+
+
+def iter_csv(rows):
+    """Yield a header line, then CSV text for `rows` in chunks of ROWS_PER_CHUNK."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([header for _, header in CSV_COLUMNS])
+
+    for n, row in enumerate(rows, 1):
+        writer.writerow([
+            "" if row.get(column) is None else _json_value(row[column])
+            for column, _ in CSV_COLUMNS
+        ])
+        if n % ROWS_PER_CHUNK == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def iter_ndjson(rows):
+    """Yield one JSON object per line for `rows`, in chunks of ROWS_PER_CHUNK."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(serialize_record(row), default=str))
+        if len(lines) == ROWS_PER_CHUNK:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+SERIALIZERS = {
+    "csv":    iter_csv,
+    "ndjson": iter_ndjson,
+}
@@ -0,0 +1,349 @@
+"""
+Materialized per-student outcome facts (analytics.student_facts).
+
+One row per cohort record holding the fields the aggregations derive from
+raw JSONB payloads — resolved outcome, survey employment flags, salary
+midpoint, counted employer state, modality and internship counts — as
+narrow typed columns, computed by report.student_facts so they always
+match what the report would derive.
+
+Freshness is incremental: triggers on the source tables, demographics and
+analytics.master_graduate_outcomes (so every save_master_* / delete write,
+sync or async) queue the affected UID in analytics.student_fact_queue in
+the writing transaction; rows without a student key, or whose key matches
+no student, queue nothing. Readers drain the queue before reading (waiting
+for students another reader is still recomputing), and only the queued
+students are recomputed. The outcome cube cells (cube.py) those
+students leave or join are rewritten in the same transaction.
+
+    python facts.py rebuild    # recompute every row (also run by migrations.py apply)
+    python facts.py refresh    # recompute queued students now
+    python facts.py verify     # compare the table with freshly derived facts
+"""
+
+import argparse
+import sys
+from collections import Counter
+
+import psycopg
+from psycopg import sql
+
+import cube
+import database
+import report
+
+# (column, SQL type) — the keys of report.student_facts
+COLUMNS = [
+    ("uid",                   "{uid_type} NOT NULL"),
+    ("term",                  "text"),
+    ("major",                 "text"),
+    ("school",                "text"),
+    ("outcome",               "text NOT NULL"),
+    ("has_survey",            "boolean NOT NULL"),
+    ("has_linkedin",          "boolean NOT NULL"),
+    ("has_clearinghouse",     "boolean NOT NULL"),
+    ("employed_survey",       "boolean NOT NULL"),   # Qualtrics STATUS employed, not seeking
+    ("full_time_survey",      "boolean NOT NULL"),   # Qualtrics EMP_TYPE full-time / employee
+    ("salary_midpoint",       "double precision"),   # any Qualtrics salary answer
+    ("employer_state",        "text"),               # state the geography section counts
+    ("survey_modality",       "text"),
+    ("linkedin_modality",     "text"),
+    ("internship_respondent", "boolean NOT NULL"),
+    ("internships",           "integer"),
+    ("paid_internships",      "integer NOT NULL"),
+    ("credit_internships",    "integer NOT NULL"),
+    ("internship_wages",      "double precision[] NOT NULL"),
+]
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+
+# (table, student key column) whose writes queue a refresh
+WATCHED_TABLES = [
+    ("src.src_demographics",               "uid"),
+    ("src.src_qualtrics_response",         "student_key"),
+    ("src.src_linkedin_position",          "student_key"),
+    ("src.src_clearinghouse_record",       "student_key"),
+    ("analytics.master_graduate_outcomes", "student_id"),
+]
+
+REFRESH_BATCH = 1000
+
+_available = None
+_triggers_installed = None
+
+
+# ── Schema ────────────────────────────────────────────────────────────────────
+
+def _ddl(uid_type):
+    columns = ",\n        ".join(f"{name} {type_}" for name, type_ in COLUMNS)
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS analytics.student_facts (
+        {columns},
+        refreshed_at timestamptz NOT NULL DEFAULT now()
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS ix_student_facts_uid_term "
+        "ON analytics.student_facts (uid, term)",
+        """
+        CREATE TABLE IF NOT EXISTS analytics.student_fact_queue (
+            uid       {uid_type} PRIMARY KEY,
+            queued_at timestamptz NOT NULL DEFAULT now()
+        )
+        """,
+    ] + [_trigger_function(table, key) for table, key in WATCHED_TABLES]
+
+
+def _trigger_function(table, key):
+    """
+    Per-table trigger function queueing the old and new row's student.
+    NULL keys are skipped; source keys are matched against demographics
+    on their native types, so a key with no student queues nothing.
+    """
+    name = table.split(".")[-1]
+    if table == "src.src_demographics":
+        queue = lambda row: f"VALUES ({row}.{key})"
+    else:
+        queue = lambda row: f"SELECT d.uid FROM src.src_demographics d WHERE d.uid = {row}.{key}"
+    return f"""
+        CREATE OR REPLACE FUNCTION analytics.queue_student_fact_{name}() RETURNS trigger
+        LANGUAGE plpgsql AS $fn$
+        BEGIN
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.{key} IS DISTINCT FROM NEW.{key}) THEN
+                IF OLD.{key} IS NOT NULL THEN
+                    INSERT INTO analytics.student_fact_queue (uid)
+                    {queue("OLD")}
+                    ON CONFLICT (uid) DO NOTHING;
+                END IF;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                IF NEW.{key} IS NOT NULL THEN
+                    INSERT INTO analytics.student_fact_queue (uid)
+                    {queue("NEW")}
+                    ON CONFLICT (uid) DO NOTHING;
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $fn$
+        """
+
+
+def _uid_type(cur):
+    cur.execute("""
+        SELECT format_type(atttypid, atttypmod) AS type
+        FROM pg_attribute
+        WHERE attrelid = 'src.src_demographics'::regclass AND attname = 'uid'
+    """)
+    return cur.fetchone()["type"]
+
+
+def apply(cur):
+    """Create the fact table, queue and triggers (called by migrations.apply); populate if empty."""
+    global _triggers_installed
+    _triggers_installed = None
+    uid_type = _uid_type(cur)
+    for statement in _ddl(uid_type):
+        cur.execute(statement.replace("{uid_type}", uid_type))
+
+    for table, key in WATCHED_TABLES:
+        trigger = f"queue_student_fact_{table.split('.')[-1]}"
+        names = {"trigger": sql.Identifier(trigger), "table": sql.Identifier(*table.split("."))}
+        try:
+            with cur.connection.transaction():
+                cur.execute(sql.SQL("DROP TRIGGER IF EXISTS {trigger} ON {table}").format(**names))
+                cur.execute(sql.SQL("""
+                    CREATE TRIGGER {trigger}
+                    AFTER INSERT OR UPDATE OR DELETE ON {table}
+                    FOR EACH ROW EXECUTE FUNCTION {function}()
+                """).format(function=sql.Identifier("analytics", trigger), **names))
+            print(f"  ensured  trigger {trigger}")
+        except psycopg.errors.InsufficientPrivilege:
+            print(f"  skipped  trigger on {table} — not the table owner; "
+                  f"run `python facts.py rebuild` after loading new {table} rows")
+    try:
+        # Shared to_jsonb trigger function of earlier versions; kept while a
+        # trigger that could not be replaced above still uses it
+        with cur.connection.transaction():
+            cur.execute("DROP FUNCTION IF EXISTS analytics.queue_student_fact()")
+    except psycopg.errors.DependentObjectsStillExist:
+        pass
+
+    cur.execute("SELECT EXISTS (SELECT 1 FROM analytics.student_facts) AS populated")
+    if not cur.fetchone()["populated"]:
+        print(f"  rebuilt  analytics.student_facts ({rebuild()} rows)")
+
+
+def available() -> bool:
+    """Whether analytics.student_facts exists (cached per process, like search's pg_trgm check)."""
+    global _available
+    if _available is None:
+        with database.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('analytics.student_facts') IS NOT NULL AS ok")
+                _available = cur.fetchone()["ok"]
+    return _available
+
+
+def triggers_installed() -> bool:
+    """
+    Whether every WATCHED_TABLES trigger exists and is enabled, i.e. every
+    write to them queues a refresh (cached per process, like available()).
+    """
+    global _triggers_installed
+    if _triggers_installed is None:
+        with database.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT count(*) AS n
+                    FROM pg_trigger t
+                    JOIN pg_class c ON c.oid = t.tgrelid
+                    JOIN pg_namespace n ON n.oid = c.relnamespace
+                    JOIN pg_proc p ON p.oid = t.tgfoid
+                    WHERE NOT t.tgisinternal AND t.tgenabled <> 'D'
+                      AND t.tgname = 'queue_student_fact_' || c.relname
+                      AND p.proname = t.tgname
+                      AND n.nspname || '.' || c.relname = ANY(%s)
+                """, [[table for table, _ in WATCHED_TABLES]])
+                _triggers_installed = cur.fetchone()["n"] == len(WATCHED_TABLES)
+    return _triggers_installed
+
+
+# ── Refresh ───────────────────────────────────────────────────────────────────
+
+def _copy_facts(cur, students):
+    """COPY report.student_facts rows for merged student records; returns the row count."""
+    n = 0
+    with cur.copy(sql.SQL("COPY analytics.student_facts ({}) FROM STDIN").format(
+        sql.SQL(", ").join(map(sql.Identifier, COLUMN_NAMES))
+    )) as copy:
+        for student in students:
+            facts = report.student_facts(student)
+            copy.write_row([facts[name] for name in COLUMN_NAMES])
+            n += 1
+    return n
+
+
+def _refresh_students(cur, uids):
+    """
+    Replace the fact rows of `uids` (all their terms) and the cube cells they
+    were or now are in, inside the caller's transaction.
+    """
+    cur.execute("DELETE FROM analytics.student_facts WHERE uid = ANY(%s) "
+                "RETURNING term, major, school", [uids])
+    cells = {(row["term"], row["major"], row["school"]) for row in cur.fetchall()}
+    cur.execute(
+        database._DEMO_SELECT.format(where_clause="d.uid = ANY(%s)") + " ORDER BY uid, term",
+        [uids],
+    )
+    students = database._attach_student_data(cur, [dict(row) for row in cur.fetchall()])
+    cells.update((s.get("term"), s.get("major"), s.get("school")) for s in students)
+    n = _copy_facts(cur, students)
+    if cube.available():
+        cube.refresh_cells(cur, cells)
+    return n
+
+
+def refresh_pending(batch=REFRESH_BATCH) -> int:
+    """
+    Recompute the students queued by the write triggers; returns how many.
+    Each batch is claimed (deleted from the queue) and rewritten in one
+    transaction, so a failed refresh leaves its students queued. Queue rows
+    another session is still refreshing are waited for, not skipped: once
+    this returns, the facts include every write queued before the call.
+    """
+    refreshed = 0
+    with database.get_db_connection() as conn:
+        while True:
+            with conn.transaction(), conn.cursor() as cur:
+                # A batch can come back short after waiting on rows another
+                # session claimed, so only an empty claim means drained
+                cur.execute("""
+                    DELETE FROM analytics.student_fact_queue
+                    WHERE uid IN (
+                        SELECT uid FROM analytics.student_fact_queue
+                        ORDER BY queued_at, uid
+                        LIMIT %s
+                        FOR UPDATE
+                    )
+                    RETURNING uid::text AS uid
+                """, [batch])
+                uids = [row["uid"] for row in cur.fetchall()]
+                if uids:
+                    _refresh_students(cur, uids)
+            if not uids:
+                return refreshed
+            refreshed += len(uids)
+
+
+def rebuild() -> int:
+    """Recompute every fact row from the streamed cohort in one transaction; returns the row count."""
+    with database.get_db_connection() as conn:
+        with conn.transaction(), conn.cursor() as cur:
+            # Queued students are covered by the rebuild; writes after this
+            # point queue again and are picked up by the next refresh
+            cur.execute("DELETE FROM analytics.student_fact_queue")
+            cur.execute("DELETE FROM analytics.student_facts")
+            n = _copy_facts(cur, database.iter_students_with_data())
+            if cube.available():
+                cube.rebuild(cur)
+            return n
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+def _facts_query(major_filter=None, school_filter=None, term_filter=None):
+    clauses, params = database._cohort_filter_clauses(
+        major_filter, school_filter, term_filter,
+        major_col="f.major", school_col="f.school", term_col="f.term",
+    )
+    query = f"""
+        SELECT f.uid::text AS uid, {", ".join(f"f.{name}" for name in COLUMN_NAMES[1:])}
+        FROM analytics.student_facts f
+        WHERE {" AND ".join(clauses) or "true"}
+        ORDER BY f.uid, f.term NULLS LAST
+    """
+    return query, params
+
+
+def iter_facts(major_filter=None, school_filter=None, term_filter=None,
+               chunk_size=database.STREAM_CHUNK_SIZE):
+    """Yield fact rows (dicts shaped like report.student_facts) for the report filters, fresh."""
+    refresh_pending()
+    with database.get_db_connection() as conn:
+        with conn.cursor(name="student_facts_stream") as cur:
+            cur.itersize = chunk_size
+            cur.execute(*_facts_query(major_filter, school_filter, term_filter))
+            yield from cur
+
+
+def _fact_key(facts):
+    return tuple(tuple(facts[name]) if name == "internship_wages" else facts[name]
+                 for name in COLUMN_NAMES)
+
+
+def verify() -> bool:
+    """Compare the stored facts with facts derived from the live payloads."""
+    stored = Counter(_fact_key(row) for row in iter_facts())
+    derived = Counter(_fact_key(report.student_facts(s))
+                      for s in database.iter_students_with_data())
+    stale = sum((stored - derived).values())
+    passed = stored == derived
+    print(f"  {'ok  ' if passed else 'FAIL'} student facts           "
+          f"{sum(stored.values())} stored, {sum(derived.values())} derived, {stale} stale")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialized student outcome facts")
+    parser.add_argument("command", choices=["rebuild", "refresh", "verify"])
+    args = parser.parse_args()
+    if args.command == "rebuild":
+        print(f"rebuilt {rebuild()} fact rows")
+    elif args.command == "refresh":
+        print(f"refreshed {refresh_pending()} queued students")
+    else:
+        sys.exit(0 if verify() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,39 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
+from contextlib import asynccontextmanager
 import database
+import database_async
+import search
 import report as report_module
+import export as export_module
+import result_cache
+import artifacts
+import singleflight
+import report_jobs
+import report_batch
 from datetime import datetime
-import io
+from uuid import UUID
+import itertools
+import os
 
-app = FastAPI(title="Graduate Outcomes Data Management API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    report_jobs.workers.start()
+    yield
+    # Stop claiming report jobs; one still running is reclaimed after its lease
+    report_jobs.workers.stop(timeout=10)
+    report_batch.shutdown()
+    # Release pooled database connections on shutdown
+    await database_async.close_pool()
+    database.close_pool()
+
+
+app = FastAPI(title="Graduate Outcomes Data Management API", lifespan=lifespan)
 
 # CORS configuration - allow frontend to access API
 app.add_middleware(
@@ -37,13 +62,30 @@ class MasterDataCreate(BaseModel):
     current_position: Optional[str] = None
     current_institution: Optional[str] = None
 
+
+class ReportJobCreate(BaseModel):
+    major: Optional[List[str]] = None
+    school: Optional[str] = None
+    term: Optional[List[str]] = None
+
 @app.get("/")
 def read_root():
     """Root endpoint"""
     return {"message": "Graduate Outcomes Data Management API", "status": "running"}
 
+@app.get("/api/health/db-pool")
+def get_db_pool_stats():
+    """Connection pool configuration and usage counters (for pool sizing)."""
+    return {"sync": database.get_pool_stats(), "async": database_async.get_pool_stats()}
+
+@app.get("/api/health/result-cache")
+def get_result_cache_stats():
+    """Report / dashboard result cache counters, plus single-flight coalescing counters."""
+    return {**result_cache.results.stats(), "single_flight": singleflight.flights.stats(),
+            "artifacts": artifacts.store.stats()}
+
 @app.get("/api/students")
-def get_all_students(
+async def get_all_students(
     name: Optional[str] = None,
     major: Optional[List[str]] = Query(default=None),
     school: Optional[str] = None,
@@ -51,27 +93,26 @@ def get_all_students(
     uid: Optional[str] = None,
     sources: Optional[List[str]] = Query(default=None),
     limit: Optional[int] = 20,
-    offset: Optional[int] = 0
+    offset: Optional[int] = 0,
+    after: Optional[str] = None,
+    count: str = "exact",
+    view: str = "full",
 ):
     """
     Get students with their associated data from all sources.
     Optionally filter by name, major, school, term, uid, or data sources.
-    Supports pagination with limit and offset.
+    Supports pagination with limit and offset, or with an opaque `after`
+    cursor (the previous response's `next_cursor`), which seeks directly to
+    the next page and ignores `offset`.
+    `count` controls the total: "exact" (default, computed in the same
+    statement as the page), "estimate" (planner estimate) or "none".
+    `view=summary` returns per-source counts, latest dates and badge fields
+    instead of full source payloads; expand a row with
+    /api/students/{uid}/sources/{source}.
     All filtering and pagination happens at the database level for efficiency.
     """
     try:
-        # Get total count with filters
-        total_count = database.get_total_student_count(
-            name_filter=name,
-            major_filter=major,
-            school_filter=school,
-            term_filter=term,
-            uid_filter=uid,
-            sources_filter=sources
-        )
-
-        # Get paginated students with filters
-        students = database.get_students_with_data(
+        students, total_count = await database_async.get_students_page(
             limit=limit,
             offset=offset,
             name_filter=name,
@@ -79,25 +120,51 @@ def get_all_students(
             school_filter=school,
             term_filter=term,
             uid_filter=uid,
-            sources_filter=sources
+            sources_filter=sources,
+            after=after,
+            count=count,
+            view=view,
         )
 
+        if after or count != "exact":
+            has_more = len(students) == limit
+        else:
+            has_more = offset + limit < total_count
+
         return {
             "count": len(students),
             "total": total_count,
-            "offset": offset,
+            "offset": None if after else offset,
             "limit": limit,
-            "has_more": offset + limit < total_count,
+            "has_more": has_more,
+            "next_cursor": database.encode_cursor(students[-1]) if has_more and students else None,
             "students": students
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@app.get("/api/search/students")
+async def search_students(
+    q: str,
+    limit: int = 10,
+    term: Optional[List[str]] = Query(default=None),
+):
+    """
+    Typeahead search by name or UID, ranked best match first.
+    Served by the pg_trgm indexes, so it is safe to call on every keystroke.
+    """
+    try:
+        return {"query": q, "results": await search.typeahead(q, limit=limit, term_filter=term)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/students/{uid}")
-def get_student(uid: str):
+async def get_student(uid: str):
     """Get a single student by UID with all associated data"""
     try:
-        student = database.get_student_by_uid(uid)
+        student = await database_async.get_student_by_uid(uid)
 
         if not student:
             raise HTTPException(status_code=404, detail=f"Student with UID {uid} not found")
@@ -108,8 +175,19 @@ def get_student(uid: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+@app.get("/api/students/{uid}/sources/{source}")
+async def get_student_source(uid: str, source: str):
+    """Full source rows (with payloads) for one student — qualtrics, linkedin or clearinghouse."""
+    try:
+        records = await database_async.get_student_source(uid, source)
+        return {"uid": uid, "source": source, "records": records}
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
 @app.post("/api/students/{uid}/master")
-def save_master_data(uid: str, master_data: MasterDataCreate):
+async def save_master_data(uid: str, master_data: MasterDataCreate):
     """
     Save or update master data for a student.
     - For qualtrics/linkedin/clearinghouse: fetches source data from DB and extracts all fields.
@@ -118,13 +196,13 @@ def save_master_data(uid: str, master_data: MasterDataCreate):
     """
     try:
         if master_data.selected_source in ('qualtrics', 'linkedin', 'clearinghouse'):
-            result = database.save_master_from_source(
+            result = await database_async.save_master_from_source(
                 student_id=uid,
                 graduation_term=master_data.term,
                 source_name=master_data.selected_source,
             )
         else:
-            database.save_master_record(
+            await database_async.save_master_record(
                 student_id=uid,
                 graduation_term=master_data.term,
                 outcome_data=master_data.dict(exclude={"term"}),
@@ -138,33 +216,33 @@ def save_master_data(uid: str, master_data: MasterDataCreate):
         raise HTTPException(status_code=500, detail=f"Error saving master data: {str(e)}")
 
 @app.delete("/api/students/{uid}/master")
-def delete_master_data(uid: str, term: str):
+async def delete_master_data(uid: str, term: str):
     """Delete the master record for a student."""
     try:
-        database.delete_master_record(student_id=uid, graduation_term=term)
+        await database_async.delete_master_record(student_id=uid, graduation_term=term)
         return {"message": "Master record deleted", "uid": uid}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting master record: {str(e)}")
 
 
 @app.get("/api/filters/majors")
-def get_unique_majors():
+async def get_unique_majors():
     try:
-        return {"majors": database.get_distinct_values("major1_major")}
+        return {"majors": await database_async.get_distinct_values("major1_major")}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/filters/schools")
-def get_unique_schools():
+async def get_unique_schools():
     try:
-        return {"schools": database.get_distinct_values("major1_coll")}
+        return {"schools": await database_async.get_distinct_values("major1_coll")}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @app.get("/api/filters/terms")
-def get_unique_terms():
+async def get_unique_terms():
     try:
-        return {"terms": database.get_distinct_terms()}
+        return {"terms": await database_async.get_distinct_terms()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
@@ -173,37 +251,78 @@ def export_master_records(
     major: Optional[List[str]] = Query(default=None),
     school: Optional[str] = None,
     term: Optional[List[str]] = Query(default=None),
+    format: str = "json",
 ):
-    """Return all records from analytics.master_graduate_outcomes for CSV export."""
+    """
+    Return all records from analytics.master_graduate_outcomes for CSV export.
+    `format=csv` / `format=ndjson` stream the rows from a server-side cursor
+    instead of building one JSON document, so memory stays constant.
+    """
+    if format not in export_module.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {format}")
+    filters = {"term_filter": term, "major_filter": major, "school_filter": school}
+
+    if format == "json":
+        try:
+            records = database.get_master_records(**filters)
+            return {"count": len(records),
+                    "records": [export_module.serialize_record(r) for r in records]}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
+
+    rows = database.iter_master_records(**filters)
     try:
-        records = database.get_master_records(
-            term_filter=term,
-            major_filter=major,
-            school_filter=school,
-        )
-        # Serialise timestamps to ISO strings
-        for r in records:
-            if r.get("record_updated_at"):
-                r["record_updated_at"] = r["record_updated_at"].isoformat()
-            if r.get("record_created_at"):
-                r["record_created_at"] = r["record_created_at"].isoformat()
-        return {"count": len(records), "records": records}
+        # Pull the first row now so connection/query errors still become a 500
+        first = next(rows, None)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
+    if first is not None:
+        rows = itertools.chain([first], rows)
+
+    filename = f"GraduateSurvey_export_{datetime.now().strftime('%Y-%m-%d')}.{format}"
+    return StreamingResponse(
+        export_module.SERIALIZERS[format](rows),
+        media_type=export_module.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _iter_file(f, chunk_size=64 * 1024):
+    """Read `f` in chunks, closing it when done or when the client goes away."""
+    with f:
+        yield from iter(lambda: f.read(chunk_size), b"")
+
+
+def _docx_response(chunks, size: int, filename: str, headers=None) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=DOCX_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(size),
+            **(headers or {}),
+        },
+    )
 
 
 @app.get("/api/report/data")
-def get_report_data(
+async def get_report_data(
     major: Optional[List[str]] = Query(default=None),
     school: Optional[str] = None,
     term: Optional[List[str]] = Query(default=None),
 ):
     """Return aggregated JSON statistics for the report preview."""
     try:
-        data = report_module.aggregate_report_data(
-            major_filter=major,
-            school_filter=school,
-            term_filter=term,
+        data = await result_cache.results.get_or_compute_async(
+            result_cache.cache_key("report/data", major, school, term),
+            lambda: report_module.aggregate_report_data(
+                major_filter=major,
+                school_filter=school,
+                term_filter=term,
+            ),
         )
         return data
     except Exception as e:
@@ -211,51 +330,114 @@ def get_report_data(
 
 
 @app.get("/api/report/download")
-def download_report(
+async def download_report(
     major: Optional[List[str]] = Query(default=None),
     school: Optional[str] = None,
     term: Optional[List[str]] = Query(default=None),
+    if_none_match: Optional[str] = Header(default=None),
 ):
-    """Generate and stream a DOCX report file."""
+    """Generate and stream a DOCX report file (served from the artifact store when unchanged)."""
     try:
-        data = report_module.aggregate_report_data(
-            major_filter=major,
-            school_filter=school,
-            term_filter=term,
-        )
-        docx_bytes = report_module.generate_report_docx(data)
-
-        major_part = ("_".join(major) if major else "AllMajors").replace(" ", "_")
-        term_part = ("_".join(term) if term else "AllTerms").replace(" ", "_")
-        date_part = datetime.now().strftime("%Y%m%d")
-        filename = f"GradOutcomesReport_{major_part}_{term_part}_{date_part}.docx"
+        filename = report_module.report_filename(major, term)
+        key = await run_in_threadpool(artifacts.artifact_key, major, school, term)
+        if key is None:
+            # No data stamp to address a stored file by: render into a spooled
+            # temporary file from the cached aggregation and stream that
+            data = await result_cache.results.get_or_compute_async(
+                result_cache.cache_key("report/data", major, school, term),
+                lambda: report_module.aggregate_report_data(
+                    major_filter=major,
+                    school_filter=school,
+                    term_filter=term,
+                ),
+            )
+            spool, size = await run_in_threadpool(report_module.spool_report_docx, data)
+            return _docx_response(_iter_file(spool), size, filename)
 
-        return StreamingResponse(
-            io.BytesIO(docx_bytes),
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-        )
+        headers = {"ETag": artifacts.etag(key), "Cache-Control": "private, no-cache"}
+        if artifacts.etag_matches(if_none_match, key):
+            return Response(status_code=304, headers=headers)
+        # An open file, so eviction cannot remove the artifact mid-response
+        f = await artifacts.store.get_or_render_async(key, major, school, term)
+        return _docx_response(_iter_file(f), os.fstat(f.fileno()).st_size, filename, headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report generation error: {str(e)}")
 
 
+@app.get("/api/report/batch")
+def download_report_batch(
+    term: List[str] = Query(...),
+    major: Optional[List[str]] = Query(default=None),
+    school: Optional[str] = None,
+):
+    """Stream a ZIP of per-major DOCX reports for the listed majors, or every major of a school."""
+    if not major and not school:
+        raise HTTPException(status_code=400, detail="Pass major (one or more) or school")
+    try:
+        cohorts = report_batch.load_cohorts(term, major, school)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Report batch error: {str(e)}")
+    filename = report_batch.zip_filename(term, major, school)
+    return StreamingResponse(
+        report_batch.iter_zip(cohorts, school, term),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/api/report/jobs", status_code=202)
+def create_report_job(job: ReportJobCreate):
+    """Queue a DOCX report for background generation; poll the returned job for status."""
+    if not report_jobs.available():
+        raise HTTPException(status_code=503,
+                            detail="Report jobs are not set up — run `python migrations.py apply`")
+    try:
+        return report_jobs.submit(report_module.report_filename(job.major, job.term),
+                                  major_filter=job.major, school_filter=job.school, term_filter=job.term)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Report job error: {str(e)}")
+
+
+@app.get("/api/report/jobs/{job_id}")
+def get_report_job(job_id: UUID):
+    """Status, stage and progress of a report job."""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+
+@app.get("/api/report/jobs/{job_id}/download")
+def download_report_job(job_id: UUID):
+    """Stream the DOCX of a finished report job."""
+    job = report_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Report job is {job['status']}")
+    return _docx_response(report_jobs.iter_artifact(job_id, job["size"]), job["size"], job["filename"])
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
 
 
 @app.get("/api/dashboard")
-def get_dashboard_data(
+async def get_dashboard_data(
     major: Optional[List[str]] = Query(default=None),
     school: Optional[str] = None,
     term: Optional[List[str]] = Query(default=None),
 ):
     """Return comprehensive longitudinal dashboard data."""
     try:
-        data = report_module.aggregate_dashboard_data(
-            major_filter=major,
-            school_filter=school,
-            term_filter=term,
+        data = await result_cache.results.get_or_compute_async(
+            result_cache.cache_key("dashboard", major, school, term),
+            lambda: report_module.aggregate_dashboard_data(
+                major_filter=major,
+                school_filter=school,
+                term_filter=term,
+            ),
         )
         return data
     except Exception as e:
@@ -263,17 +445,20 @@ def get_dashboard_data(
 
 
 @app.get("/api/dashboard/majors")
-def get_major_comparison(
+async def get_major_comparison(
     major: Optional[List[str]] = Query(default=None),
     school: Optional[str] = None,
     term: Optional[List[str]] = Query(default=None),
 ):
     """Per-major outcome stats for the Major Analytics dashboard tab."""
     try:
-        data = report_module.aggregate_major_comparison(
-            major_filter=major,
-            school_filter=school,
-            term_filter=term,
+        data = await result_cache.results.get_or_compute_async(
+            result_cache.cache_key("dashboard/majors", major, school, term),
+            lambda: report_module.aggregate_major_comparison(
+                major_filter=major,
+                school_filter=school,
+                term_filter=term,
+            ),
         )
         return {"majors": data}
     except Exception as e:
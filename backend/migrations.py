@@ -0,0 +1,314 @@
+"""
+Supporting indexes for the data layer's student-key lookups.
+
+database.py compares student keys on their native column types
+(`student_key = ANY(%s)`, `qf.student_key = d.uid`), which lets Postgres
+serve every source lookup and every sources-filter EXISTS from a btree
+index instead of a sequential scan. This module creates those indexes and
+checks with EXPLAIN that the planner actually uses them.
+
+It also creates the (name, uid, term) expression index that /api/students
+cursor pages seek in, and pg_trgm GIN indexes on the normalized
+expressions the name / UID / major / school filters and the typeahead
+search compare against, so leading-wildcard LIKE and word-similarity
+matches stop scanning all of demographics. `apply` also installs the SQL outcome
+functions from analytics.py, the student fact table from facts.py and the
+outcome cube from cube.py.
+
+    python migrations.py apply     # create missing indexes (CONCURRENTLY)
+    python migrations.py verify    # EXPLAIN the hot queries, report index use
+"""
+
+import argparse
+import sys
+
+import psycopg
+from psycopg.rows import dict_row
+
+import analytics
+import cube
+import database
+import facts
+import report_jobs
+import search
+from database import DB_CONFIG
+
+# (index name, table, key columns)
+INDEXES = [
+    ("ix_src_qualtrics_response_student_key",   "src.src_qualtrics_response",   ("student_key",)),
+    ("ix_src_linkedin_position_student_key",    "src.src_linkedin_position",    ("student_key",)),
+    ("ix_src_clearinghouse_record_student_key", "src.src_clearinghouse_record", ("student_key",)),
+    ("ix_master_graduate_outcomes_student_term", "analytics.master_graduate_outcomes",
+     ("student_id", "graduation_term")),
+    ("ix_src_demographics_uid_term",            "src.src_demographics",         ("uid", "term")),
+]
+
+# (index name, table, expression) — GIN trigram indexes; the expressions
+# must match database._build_demo_where / search._search_query exactly
+TRGM_INDEXES = [
+    ("ix_src_demographics_name_trgm",   "src.src_demographics", "lower(payload->>'name')"),
+    ("ix_src_demographics_uid_trgm",    "src.src_demographics", "(uid::text)"),
+    ("ix_src_demographics_major_trgm",  "src.src_demographics", "lower(payload->>'major1_major')"),
+    ("ix_src_demographics_school_trgm", "src.src_demographics", "lower(payload->>'major1_coll')"),
+]
+
+# (index name, table, expressions) — btree expression indexes; the
+# expressions must match database._PAGE_ORDER / database._keyset_clause
+EXPRESSION_INDEXES = [
+    ("ix_src_demographics_name_uid_term", "src.src_demographics",
+     "(payload->>'name'), (uid::text), term"),
+]
+
+# Student key columns that are compared with each other in joins
+KEY_COLUMNS = [
+    ("src.src_demographics",          "uid"),
+    ("src.src_qualtrics_response",    "student_key"),
+    ("src.src_linkedin_position",     "student_key"),
+    ("src.src_clearinghouse_record",  "student_key"),
+    ("analytics.master_graduate_outcomes", "student_id"),
+]
+
+
+def _connect():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    return psycopg.connect(**DB_CONFIG, row_factory=dict_row, autocommit=True)
+
+
+def _existing_index(cur, table, columns):
+    """Name of an index on `table` whose leading key columns are `columns`, if any."""
+    # Expression keys (attnum 0) come back as NULL, so they never match a column
+    cur.execute("""
+        SELECT i.indexrelid::regclass::text AS name,
+               array_agg(a.attname ORDER BY k.ord) AS cols
+        FROM pg_index i
+        CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+        LEFT JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+        WHERE i.indrelid = %s::regclass AND i.indisvalid
+        GROUP BY i.indexrelid
+    """, (table,))
+    for row in cur.fetchall():
+        if tuple(row["cols"][:len(columns)]) == tuple(columns):
+            return row["name"]
+    return None
+
+
+def _key_types(cur):
+    types = {}
+    for table, column in KEY_COLUMNS:
+        cur.execute("""
+            SELECT format_type(atttypid, atttypmod) AS type
+            FROM pg_attribute
+            WHERE attrelid = %s::regclass AND attname = %s AND NOT attisdropped
+        """, (table, column))
+        row = cur.fetchone()
+        types[f"{table}.{column}"] = row["type"] if row else None
+    return types
+
+
+def _incomparable_keys(cur, types) -> list:
+    """Key columns whose type has no `=` with src.src_demographics.uid's type."""
+    uid_type = types["src.src_demographics.uid"]
+    incomparable = []
+    for column, type_ in types.items():
+        if type_ is None or uid_type is None or type_ == uid_type:
+            continue
+        try:
+            with cur.connection.transaction():
+                cur.execute(f"SELECT NULL::{uid_type} = NULL::{type_}")
+        except psycopg.errors.UndefinedFunction:
+            incomparable.append(column)
+    return incomparable
+
+
+def _has_trgm(cur):
+    cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    return cur.fetchone() is not None
+
+
+def _apply_trgm(cur):
+    """Install pg_trgm if the server ships it, then create the trigram indexes."""
+    if not _has_trgm(cur):
+        cur.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cur.fetchone() is None:
+            print("  skipped  trigram indexes — pg_trgm is not available on this server")
+            return
+        cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        print("  created  extension pg_trgm")
+    for name, table, expression in TRGM_INDEXES:
+        cur.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+            f"ON {table} USING gin ({expression} gin_trgm_ops)"
+        )
+        print(f"  ensured  {name}")
+
+
+def apply():
+    """Create any missing supporting index, then refresh planner statistics."""
+    with _connect() as conn, conn.cursor() as cur:
+        for name, table, columns in INDEXES:
+            existing = _existing_index(cur, table, columns)
+            if existing:
+                print(f"  exists   {table} ({', '.join(columns)}) — {existing}")
+                continue
+            cur.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} ({', '.join(columns)})"
+            )
+            print(f"  created  {name}")
+        for name, table, expressions in EXPRESSION_INDEXES:
+            cur.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({expressions})")
+            print(f"  ensured  {name}")
+        _apply_trgm(cur)
+        analytics.apply(cur)
+        facts.apply(cur)
+        cube.apply(cur)
+        report_jobs.apply(cur)
+        for table in sorted({table for _, table, _ in INDEXES}):
+            cur.execute(f"ANALYZE {table}")
+
+
+def _index_scans(plan):
+    """Index names used anywhere in an EXPLAIN (FORMAT JSON) plan tree."""
+    found = []
+    if "Index Name" in plan:
+        found.append(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_index_scans(child))
+    return found
+
+
+def _explain(cur, query, params):
+    cur.execute("EXPLAIN (FORMAT JSON) " + query, params)
+    return _index_scans(database._plan_json(cur.fetchone())["Plan"])
+
+
+def _verify_queries(cur):
+    """(label, query, params, tables whose key index should be used) for the hot lookups."""
+    cur.execute("SELECT uid::text AS uid FROM src.src_demographics WHERE uid IS NOT NULL LIMIT 20")
+    uids = [row["uid"] for row in cur.fetchall()] or ["0"]
+
+    source_tables = ["src.src_qualtrics_response", "src.src_linkedin_position",
+                     "src.src_clearinghouse_record"]
+    checks = []
+    labels = ("qualtrics lookup", "linkedin lookup", "clearinghouse lookup")
+    for label, table, (query, params) in zip(labels, source_tables, database._source_queries(uids)):
+        checks.append((label, query, params, [table]))
+    checks.append(("master lookup", *database._master_outcomes_query(uids),
+                   ["analytics.master_graduate_outcomes"]))
+    checks.append(("sources filter EXISTS", *database._student_count_query(
+        None, None, None, None, None, ["qualtrics", "linkedin", "clearinghouse"]
+    ), source_tables))
+    checks.append(("student by uid", database._STUDENT_BY_UID_SQL, (uids[0],),
+                   ["src.src_demographics"]))
+    return checks
+
+
+def _verify_keyset_queries():
+    """(label, query, params, expected index names) for the keyset page seeks."""
+    after = database.encode_cursor({"name": "M", "uid": "0", "term": None})
+    after_null = database.encode_cursor({"name": None, "uid": "0", "term": None})
+    return [
+        ("keyset page",           *database._students_page_query(20, None, *([None] * 6), after),
+         {"ix_src_demographics_name_uid_term"}),
+        ("keyset page, no name",  *database._students_page_query(20, None, *([None] * 6), after_null),
+         {"ix_src_demographics_name_uid_term"}),
+    ]
+
+
+def _verify_trgm_queries():
+    """(label, query, params, expected index names) for the trigram-served filters."""
+    page = lambda *filters: database._students_page_query(20, 0, *filters, None)
+    return [
+        ("name filter",   *page("smi", None, None, None, None),
+         {"ix_src_demographics_name_trgm"}),
+        ("uid filter",    *page(None, None, None, None, "123"),
+         {"ix_src_demographics_uid_trgm"}),
+        ("major filter",  *page(None, "engineer", None, None, None),
+         {"ix_src_demographics_major_trgm"}),
+        ("school filter", *page(None, None, "science", None, None),
+         {"ix_src_demographics_school_trgm"}),
+        ("typeahead",     *search._search_query("smith", 10),
+         {"ix_src_demographics_name_trgm", "ix_src_demographics_uid_trgm"}),
+    ]
+
+
+def _check(cur, label, query, params, expected):
+    """Print and return whether the plan uses every index in `expected`."""
+    used = _explain(cur, query, params)
+    note = ""
+    if not expected <= set(used):
+        cur.execute("SET enable_seqscan = off")
+        used = _explain(cur, query, params)
+        cur.execute("RESET enable_seqscan")
+        note = " (usable; planner prefers seq scan at current size)"
+    passed = None not in expected and expected <= set(used)
+    detail = ", ".join(sorted(expected & set(used))) if passed else (
+        "missing index — run `python migrations.py apply`" if None in expected
+        else f"not used (plan: {', '.join(used) or 'sequential scan'})"
+    )
+    print(f"  {'ok  ' if passed else 'FAIL'} {label:24} {detail}{note if passed else ''}")
+    return passed
+
+
+def verify() -> bool:
+    """
+    Fail at once if a student key column's type cannot be compared with
+    demographics.uid's (every join on it would error). Otherwise EXPLAIN
+    each hot query and check it uses the key index of every table it
+    probes. If the planner picks a sequential scan (typical on small tables)
+    the query is re-planned with enable_seqscan off to prove the index is at
+    least usable.
+    """
+    ok = True
+    with _connect() as conn, conn.cursor() as cur:
+        types = _key_types(cur)
+        print("student key column types:")
+        for column, type_ in types.items():
+            print(f"  {column:45} {type_}")
+        incomparable = _incomparable_keys(cur, types)
+        if incomparable:
+            print(f"  ERROR: {', '.join(incomparable)} cannot be compared with "
+                  f"src.src_demographics.uid ({types['src.src_demographics.uid']}); every join "
+                  f"on student key fails with \"operator does not exist\" — convert the "
+                  f"key columns to one type")
+            return False
+
+        key_index = {}
+        for _, table, columns in INDEXES:
+            existing = _existing_index(cur, table, columns)
+            # regclass text is schema-qualified only outside the search_path
+            key_index[table] = existing.split(".")[-1] if existing else None
+
+        for label, query, params, tables in _verify_queries(cur):
+            ok = _check(cur, label, query, params, {key_index[t] for t in tables}) and ok
+
+        cur.execute("""
+            SELECT indexrelid::regclass::text AS name FROM pg_index
+            WHERE indrelid = 'src.src_demographics'::regclass AND indisvalid
+        """)
+        demo_index = {row["name"].split(".")[-1] for row in cur.fetchall()}
+        for label, query, params, expected in _verify_keyset_queries():
+            expected = {name if name in demo_index else None for name in expected}
+            ok = _check(cur, label, query, params, expected) and ok
+
+        if not _has_trgm(cur):
+            print("  skip trigram checks — pg_trgm is not installed")
+            return ok
+        for label, query, params, expected in _verify_trgm_queries():
+            expected = {name if name in demo_index else None for name in expected}
+            ok = _check(cur, label, query, params, expected) and ok
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Student-key and trigram index migrations")
+    parser.add_argument("command", choices=["apply", "verify"])
+    args = parser.parse_args()
+    if args.command == "apply":
+        apply()
+    else:
+        sys.exit(0 if verify() else 1)
+
+
+if __name__ == "__main__":
+    main()
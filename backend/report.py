@@ -21,15 +21,20 @@ Qualtrics, LinkedIn, and Clearinghouse payloads are all read directly.
 
 import io
 import re
+import tempfile
 from datetime import datetime
 from collections import defaultdict
+from functools import lru_cache
+from xml.sax.saxutils import escape
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml.ns import nsdecls, qn
+from docx.oxml import OxmlElement, parse_xml
 
+import cube
 import database
+import facts as facts_module
 
 # ── Lookup tables ──────────────────────────────────────────────────────────────
 
@@ -92,6 +97,7 @@ STATE_ABBR = {
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=1024)
 def _map_status(status_str: str) -> str:
     s = status_str.lower()
     for key, label in STATUS_TO_OUTCOME.items():
@@ -154,6 +160,7 @@ def _percentile(sorted_vals, p):
     return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (idx - lo)
 
 
+@lru_cache(maxsize=256)
 def _get_term_cutoff(term: str):
     """
     Return the Phase 1 cutoff date for a graduation term.
@@ -173,8 +180,34 @@ def _get_term_cutoff(term: str):
 
 
 # ── Per-student multi-source helpers ─────────────────────────────────────────
+# Resolutions are cached on the student record itself, so a record fed to
+# several aggregators (dashboard overall / per-term / per-school) is resolved
+# once, and the cache is freed with the record when the stream moves on.
+
+_RESOLVED_KEY = "_resolved"
+
+
+def _resolved(student: dict, name: str, resolve):
+    """Return resolve(student), computed once per record and cached under _RESOLVED_KEY."""
+    cache = student.get(_RESOLVED_KEY)
+    if cache is None:
+        cache = student[_RESOLVED_KEY] = {}
+    if name not in cache:
+        cache[name] = resolve(student)
+    return cache[name]
+
 
 def _student_outcome(student: dict) -> str:
+    """Best available outcome for a student (see _resolve_outcome), memoized on the record."""
+    return _resolved(student, "outcome", _resolve_outcome)
+
+
+def _student_employer_state(student: dict):
+    """(state_full_name, is_employed) for a student (see _resolve_employer_state), memoized on the record."""
+    return _resolved(student, "employer_state", _resolve_employer_state)
+
+
+def _resolve_outcome(student: dict) -> str:
     """
     Derive the best available outcome for a student, checking all sources in order:
     Qualtrics STATUS → LinkedIn status/employment → Clearinghouse (always CE)
@@ -242,7 +275,7 @@ def _student_outcome(student: dict) -> str:
     return "Unresolved"
 
 
-def _student_employer_state(student: dict):
+def _resolve_employer_state(student: dict):
     """Return (state_full_name, is_employed) using EMP_STATE (primary) then EMP_CITY1_1 fallback."""
     if student.get("qualtrics_data"):
         p = student["qualtrics_data"][0]["payload"]
@@ -267,290 +300,561 @@ def _student_employer_state(student: dict):
     return None, False
 
 
+def _employed_survey(p) -> bool:
+    """Qualtrics STATUS says employed (and not seeking) — gates the survey-only employment stats."""
+    status = p.get("STATUS", "").lower()
+    return "employed" in status and "seeking" not in status
+
+
+def _full_time_survey(p) -> bool:
+    emp_type = p.get("EMP_TYPE", "").lower()
+    return "full-time" in emp_type or "full time" in emp_type or "employee" in emp_type
+
+
+def _survey_salary_midpoint(p):
+    """Midpoint of the reported Qualtrics salary range, or None."""
+    sal = (p.get("EMP_SAL_1") or p.get("EMP_SAL") or p.get("EMP_SALARY") or "").strip()
+    if sal:
+        mid = _parse_salary_midpoint(sal)
+        if mid:
+            return mid
+    return None
+
+
+def _geography_state(student: dict, outcome: str):
+    """
+    State counted in the geographic section — FT/PT employed, military and
+    business starters; EMP_STATE primary (fall back to extracting from
+    EMP_CITY1_1), then LinkedIn. None when the student is not counted.
+    """
+    if outcome not in ("Employed full-time", "Employed part-time",
+                       "Serving in the U.S. Armed Forces", "Starting a business"):
+        return None
+    # Qualtrics: prefer EMP_STATE directly, fall back to EMP_CITY1_1 parsing
+    if student.get("qualtrics_data"):
+        p = student["qualtrics_data"][0]["payload"]
+        emp_state = p.get("EMP_STATE", "").strip()
+        if emp_state:
+            return _resolve_state(emp_state)
+        city_str = p.get("EMP_CITY1_1", "").strip()
+        if city_str:
+            return _extract_state_from_city_str(city_str)
+    # LinkedIn: employer_state + employer_country
+    elif student.get("linkedin_data"):
+        li = student["linkedin_data"][0]["payload"]
+        state   = (li.get("employer_state")   or "").strip()
+        country = (li.get("employer_country") or "").strip()
+        if state:
+            return _resolve_state(state, country)
+    return None
+
+
+def _survey_modality(p):
+    mod = p.get("EMP_JOBSITE", "").strip()
+    return mod if mod and not _skip_other(mod) else None
+
+
+def _linkedin_modality(li):
+    mod = (li.get("modality_(hybrid_etc.if_known)") or li.get("employment_modality") or "").strip()
+    return mod if mod and not _skip_other(mod) else None
+
+
+def _survey_internships(p):
+    """
+    (NUMINTERN as int or None, per-internship entries) — or None when the
+    question was left blank. An unparseable count still marks a respondent.
+    """
+    nin_str = p.get("NUMINTERN", "").strip()
+    if nin_str == "":
+        return None
+    try:
+        nin = int(nin_str)
+    except ValueError:
+        return None, []
+
+    entries = []
+    for i in range(1, nin + 1):
+        paid    = p.get(f"{i}_INT_PAID",   "").strip()
+        credit  = p.get(f"{i}_INT_CREDIT", "").strip()
+        howmuch = p.get(f"{i}_INT_HOWMUCH","").strip()
+        wage = None
+        if howmuch:
+            try:
+                wage = float(howmuch)
+            except ValueError:
+                pass
+        entries.append({
+            "org":       p.get(f"{i}_INT_ORG_1", "").strip(),
+            "title":     p.get(f"{i}_INT_TITLE", "").strip(),
+            "is_paid":   paid.lower().startswith("yes") if paid else False,
+            "is_credit": credit.lower() == "yes" if credit else False,
+            "wage":      wage,
+        })
+    return nin, entries
+
+
+def student_facts(student: dict) -> dict:
+    """
+    The narrow, typed per-student fields the aggregations need — one row of
+    analytics.student_facts (see facts.py). Derived with the same helpers the
+    report sections use, so fact-based and payload-based numbers agree.
+    """
+    outcome = _student_outcome(student)
+    p  = student["qualtrics_data"][0]["payload"] if student.get("qualtrics_data") else None
+    li = student["linkedin_data"][0]["payload"]  if student.get("linkedin_data")  else None
+    employed = "employed" in outcome.lower()
+    internships = _survey_internships(p) if p is not None else None
+    nin, entries = internships if internships is not None else (None, [])
+
+    return {
+        "uid":                   student["uid"],
+        "term":                  student.get("term"),
+        "major":                 student.get("major"),
+        "school":                student.get("school"),
+        "outcome":               outcome,
+        "has_survey":            p is not None,
+        "has_linkedin":          li is not None,
+        "has_clearinghouse":     bool(student.get("clearinghouse_data")),
+        "employed_survey":       p is not None and _employed_survey(p),
+        "full_time_survey":      p is not None and _full_time_survey(p),
+        "salary_midpoint":       _survey_salary_midpoint(p) if p is not None else None,
+        "employer_state":        _geography_state(student, outcome),
+        "survey_modality":       _survey_modality(p) if p is not None and employed else None,
+        "linkedin_modality":     _linkedin_modality(li) if li is not None and employed else None,
+        "internship_respondent": internships is not None,
+        "internships":           nin,
+        "paid_internships":      sum(e["is_paid"] for e in entries),
+        "credit_internships":    sum(e["is_credit"] for e in entries),
+        "internship_wages":      [e["wage"] for e in entries if e["wage"] is not None],
+    }
+
+
 # ── Data aggregation ──────────────────────────────────────────────────────────
 
 def aggregate_report_data(major_filter=None, school_filter=None, term_filter=None) -> dict:
     """
     Aggregate all statistics needed for the report.
     Reads raw Qualtrics, LinkedIn, and Clearinghouse payloads plus master DB.
+    Students are streamed through a server-side cursor straight into the
+    single-pass ReportAggregator, so the cohort is never held in memory.
     """
 
-    students = database.get_students_with_data(
-        limit=None, offset=None,
+    students = database.iter_students_with_data(
         major_filter=major_filter,
         school_filter=school_filter,
         term_filter=term_filter,
     )
+    return _aggregate_students(students, major_filter, school_filter, term_filter)
 
-    total_graduates = len(students)
 
-    # ── Response / knowledge rates ────────────────────────────────────────────
-    with_survey       = [s for s in students if s.get("qualtrics_data")]
-    with_linkedin     = [s for s in students if s.get("linkedin_data")]
-    with_clearinghouse= [s for s in students if s.get("clearinghouse_data")]
-    with_any          = [s for s in students if (
-        s.get("qualtrics_data") or s.get("linkedin_data") or s.get("clearinghouse_data")
-    )]
-    survey_count = len(with_survey)
+def _aggregate_students(students, major_filter=None, school_filter=None, term_filter=None) -> dict:
+    """
+    Report statistics for a cohort of merged student records — a list or any
+    iterable, including the database stream, consumed in a single pass.
+    The filters are not applied here; they only label the meta block.
+    """
+    aggregator = ReportAggregator()
+    for s in students:
+        aggregator.add(s)
+    return aggregator.result(major_filter, school_filter, term_filter)
+
 
-    # ── Career outcomes — all sources ─────────────────────────────────────────
-    outcomes = defaultdict(int)
-    not_seeking_count = 0
+# ── Section accumulators ──────────────────────────────────────────────────────
+# Each section of the report keeps its own running state; ReportAggregator
+# feeds every student to every section once. Students arrive in stream (UID)
+# order, so detail lists are kept in report order explicitly — by student
+# name (missing names last), then uid and term, as the report has always
+# listed them — and count labels keep the order of their first student.
 
-    for s in students:
-        outcome = _student_outcome(s)
+
+def _student_order(s: dict) -> tuple:
+    name = s.get("name")
+    return (name is None, name or "", s.get("uid") or "", s.get("term") or "")
+
+
+class _Entries:
+    """A detail list kept in student order whatever order students are added in."""
+
+    def __init__(self):
+        self._entries = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, s: dict, entry):
+        self._entries.append((_student_order(s), len(self._entries), entry))
+
+    def sorted(self) -> list:
+        return [entry for _, _, entry in sorted(self._entries, key=lambda x: x[:2])]
+
+
+class _Tally:
+    """Counts per label; labels are ordered by their first student in student order."""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self._first = {}
+        self._adds  = 0
+
+    def add(self, s: dict, label):
+        self.counts[label] += 1
+        self._adds += 1
+        first = (_student_order(s), self._adds)
+        if label not in self._first or first < self._first[label]:
+            self._first[label] = first
+
+    def items(self) -> list:
+        return sorted(self.counts.items(), key=lambda x: self._first[x[0]])
+
+    def ranked(self) -> list:
+        """(label, count) by count, ties in items() order."""
+        return sorted(self.items(), key=lambda x: -x[1])
+
+
+OUTCOME_ORDER = [
+    "Continuing education",
+    "Employed full-time",
+    "Employed part-time",
+    "Volunteering or service program",
+    "Serving in the U.S. Armed Forces",
+    "Starting a business",
+    "Unplaced",
+    "Unresolved",
+]
+
+_OTHER_SKIP = {"other - none of the above", "other – none of the above",
+               "other-none of the above", "none of the above", "other"}
+
+_UNSPECIFIED = {"unspecified", "unknown", "n/a", "na", "none", "", "other"}
+
+_BLANK_SET = {"unspecified", "unknown", "n/a", "na", "none", ""}
+
+
+def _skip_other(val: str) -> bool:
+    return val.lower().strip() in _OTHER_SKIP
+
+
+def _blank_or_unspecified(val: str) -> bool:
+    return not val or val.lower().strip() in _UNSPECIFIED
+
+
+def _clean_field(val: str) -> str | None:
+    v = val.strip() if val else ""
+    return v if v.lower() not in _BLANK_SET else None
+
+
+class _Totals:
+    """Graduates and per-source response counts."""
+
+    def __init__(self):
+        self.total = self.survey = self.linkedin = self.clearinghouse = 0
+
+    def add(self, has_survey, has_linkedin, has_clearinghouse):
+        self.total += 1
+        self.survey += has_survey
+        self.linkedin += has_linkedin
+        self.clearinghouse += has_clearinghouse
+
+    def result(self, unresolved):
+        # Knowledge rate: students with ANY resolved outcome (excl. Unresolved) / total graduates
+        # Includes NOT seeking — we know their outcome; excludes only students with no resolvable data.
+        total_graduates = self.total
+        known_count     = total_graduates - unresolved
+        survey_count    = self.survey
+        return {
+            "total_graduates":       total_graduates,
+            "survey_count":          survey_count,
+            "linkedin_count":        self.linkedin,
+            "clearinghouse_count":   self.clearinghouse,
+            "known_count":           known_count,
+            "survey_response_rate":  round(survey_count / total_graduates * 100, 1) if total_graduates else 0,
+            "knowledge_rate":        round(known_count  / total_graduates * 100, 1) if total_graduates else 0,
+        }
+
+
+class _Outcomes:
+    """Career outcomes — all sources."""
+
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.not_seeking = 0
+
+    def add(self, outcome):
         if outcome == "NOT seeking":
-            not_seeking_count += 1
+            self.not_seeking += 1
         else:
-            outcomes[outcome] += 1
-
-    # Knowledge rate: students with ANY resolved outcome (excl. Unresolved) / total graduates
-    # Includes NOT seeking — we know their outcome; excludes only students with no resolvable data.
-    known_count = total_graduates - outcomes.get("Unresolved", 0)
-
-    outcome_order = [
-        "Continuing education",
-        "Employed full-time",
-        "Employed part-time",
-        "Volunteering or service program",
-        "Serving in the U.S. Armed Forces",
-        "Starting a business",
-        "Unplaced",
-        "Unresolved",
-    ]
-    outcomes_table = []
-    grand_total = 0
-    for label in outcome_order:
-        n = outcomes.get(label, 0)
-        outcomes_table.append({"label": label, "n": n})
-        grand_total += n
-    outcomes_table.append({"label": "Grand Total", "n": grand_total})
-    if not_seeking_count:
-        outcomes_table.append({"label": "NOT seeking", "n": not_seeking_count})
-
-    employed_count = outcomes.get("Employed full-time", 0) + outcomes.get("Employed part-time", 0)
-
-    # % in workforce: Employed FT/PT + Volunteering + Military + Business
-    # Denominator: grand_total (all resolved outcomes excl. NOT seeking, per spec)
-    in_workforce_count = (
-        outcomes.get("Employed full-time", 0) +
-        outcomes.get("Employed part-time", 0) +
-        outcomes.get("Volunteering or service program", 0) +
-        outcomes.get("Serving in the U.S. Armed Forces", 0) +
-        outcomes.get("Starting a business", 0)
-    )
-
-    # ── Students whose outcome is "employed" — for Qualtrics-specific stats ───
-    employed_qualtrics = [
-        s for s in with_survey
-        if "employed" in s["qualtrics_data"][0]["payload"].get("STATUS", "").lower()
-        and "seeking" not in s["qualtrics_data"][0]["payload"].get("STATUS", "").lower()
-    ]
+            self.counts[outcome] += 1
+
+    def result(self):
+        outcomes = self.counts
+        table = []
+        grand_total = 0
+        for label in OUTCOME_ORDER:
+            n = outcomes.get(label, 0)
+            table.append({"label": label, "n": n})
+            grand_total += n
+        table.append({"label": "Grand Total", "n": grand_total})
+        if self.not_seeking:
+            table.append({"label": "NOT seeking", "n": self.not_seeking})
+
+        employed_count = outcomes.get("Employed full-time", 0) + outcomes.get("Employed part-time", 0)
+
+        # % in workforce: Employed FT/PT + Volunteering + Military + Business
+        # Denominator: grand_total (all resolved outcomes excl. NOT seeking, per spec)
+        in_workforce_count = (
+            outcomes.get("Employed full-time", 0) +
+            outcomes.get("Employed part-time", 0) +
+            outcomes.get("Volunteering or service program", 0) +
+            outcomes.get("Serving in the U.S. Armed Forces", 0) +
+            outcomes.get("Starting a business", 0)
+        )
+
+        return {
+            "table":          table,
+            "grand_total":    grand_total,
+            # Placement: Placed / (Placed + Unplaced + Unresolved), excl. NOT seeking
+            "placement_rate": round(
+                (grand_total - outcomes.get("Unplaced", 0) - outcomes.get("Unresolved", 0)) /
+                max(grand_total, 1) * 100, 1
+            ) if grand_total else 0,
+            "employed_count":     employed_count,
+            "employed_pct":       round(employed_count / max(grand_total, 1) * 100, 1) if grand_total else 0,
+            # % in workforce: Employed FT/PT + Volunteering + Military + Business
+            # Denominator = people with data about them, excl. NOT seeking and Unresolved
+            "in_workforce_count": in_workforce_count,
+            "in_workforce_pct":   round(
+                in_workforce_count /
+                max(grand_total - outcomes.get("Unresolved", 0), 1) * 100, 1
+            ) if grand_total else 0,
+        }
 
-    # ── Nature / modality / status of positions — Qualtrics + LinkedIn (all sources) ────
-    nature_counts   = defaultdict(int)
-    field_counts    = defaultdict(int)
-    modality_counts = defaultdict(int)
-    emp_status_counts = defaultdict(int)
 
-    _OTHER_SKIP = {"other - none of the above", "other – none of the above",
-                   "other-none of the above", "none of the above", "other"}
+class _Nature:
+    """Nature / modality / status of positions — Qualtrics + LinkedIn (all sources)."""
 
-    def _skip_other(val: str) -> bool:
-        return val.lower().strip() in _OTHER_SKIP
+    def __init__(self):
+        self.respondents       = 0   # Qualtrics STATUS employed (not seeking)
+        self.nature_counts     = _Tally()
+        self.field_counts      = _Tally()
+        self.modality_counts   = _Tally()
+        self.emp_status_counts = _Tally()
 
-    for s in students:
-        outcome = _student_outcome(s)
+    def add(self, s, outcome, employed_qualtrics):
+        if employed_qualtrics:
+            self.respondents += 1
         if "employed" not in outcome.lower():
-            continue
+            return
         # Qualtrics
         if s.get("qualtrics_data"):
             p = s["qualtrics_data"][0]["payload"]
             nat = p.get("EMP_NATURE", "").strip()
             if nat and not _skip_other(nat):
-                nature_counts[nat] += 1
+                self.nature_counts.add(s, nat)
             fld = p.get("EMP_FIELD", "").strip()
             if fld and not _skip_other(fld):
-                field_counts[fld] += 1
-            mod = p.get("EMP_JOBSITE", "").strip()
-            if mod and not _skip_other(mod):
-                modality_counts[mod] += 1
+                self.field_counts.add(s, fld)
+            mod = _survey_modality(p)
+            if mod:
+                self.modality_counts.add(s, mod)
             status = p.get("EMP_TYPE", "").strip()
             if status and not _skip_other(status):
-                emp_status_counts[status] += 1
+                self.emp_status_counts.add(s, status)
         # LinkedIn
         if s.get("linkedin_data"):
-            li  = s["linkedin_data"][0]["payload"]
-            mod = (li.get("modality_(hybrid_etc.if_known)") or li.get("employment_modality") or "").strip()
-            if mod and not _skip_other(mod):
-                modality_counts[mod] += 1
-
-    # ── Salary (Qualtrics-only) ───────────────────────────────────────────────
-    salaries = []
-    bonus_values = []   # raw EMP_BONUS amounts for median calculation
-    bonus_list   = []   # full list fallback if median can't be computed
-    full_time_salary_respondents = 0
-    for s in employed_qualtrics:
-        p = s["qualtrics_data"][0]["payload"]
-        emp_type = p.get("EMP_TYPE", "").lower()
-        sal      = (p.get("EMP_SAL_1") or p.get("EMP_SAL") or p.get("EMP_SALARY") or "").strip()
-        if "full-time" in emp_type or "full time" in emp_type or "employee" in emp_type:
-            full_time_salary_respondents += 1
-            if sal:
-                mid = _parse_salary_midpoint(sal)
-                if mid:
-                    salaries.append(mid)
+            mod = _linkedin_modality(s["linkedin_data"][0]["payload"])
+            if mod:
+                self.modality_counts.add(s, mod)
+
+    def result(self):
+        return {
+            "respondents":       self.respondents,
+            "nature_counts":     dict(self.nature_counts.items()),
+            "field_counts":      dict(self.field_counts.items()),
+            "modality_counts":   dict(self.modality_counts.items()),
+            "emp_status_counts": dict(self.emp_status_counts.items()),
+        }
+
+
+def _salary_quartiles(salaries):
+    """p25 / p50 / p75 of the salary midpoints, or None below the 5-response floor."""
+    salaries_sorted = sorted(salaries)
+    if len(salaries_sorted) < 5:
+        return None
+    return {
+        "p25": int(_percentile(salaries_sorted, 25)),
+        "p50": int(_percentile(salaries_sorted, 50)),
+        "p75": int(_percentile(salaries_sorted, 75)),
+    }
+
+
+def _sketch_quartiles(sketch, floor):
+    """
+    _salary_quartiles over a sketches.QuantileSketch (cube cells), or None
+    below `floor` values. Approximate once the sketch has compacted; the
+    DOCX report keeps exact lists.
+    """
+    if sketch.count < floor:
+        return None
+    return {
+        "p25": int(sketch.quantile(25)),
+        "p50": int(sketch.quantile(50)),
+        "p75": int(sketch.quantile(75)),
+    }
+
+
+class _Salary:
+    """Salary and bonus (Qualtrics-only, employed respondents)."""
+
+    def __init__(self):
+        self.salaries     = []
+        self.bonus_values = []   # raw EMP_BONUS amounts for median calculation
+        self.bonus_list   = _Entries()   # full list fallback if median can't be computed
+        self.full_time_respondents = 0
+
+    def add(self, s, p):
+        if _full_time_survey(p):
+            self.full_time_respondents += 1
+            mid = _survey_salary_midpoint(p)
+            if mid:
+                self.salaries.append(mid)
         bonus = p.get("EMP_BONUS", "").strip()
         if bonus and bonus.lower() not in ("", "no", "0", "none"):
-            bonus_list.append(bonus)
+            self.bonus_list.append(s, bonus)
             # Try to parse a numeric value for median calculation
             try:
                 nums = re.findall(r"[\d,]+", bonus)
                 if nums:
-                    bonus_values.append(float(nums[0].replace(",", "")))
+                    self.bonus_values.append(float(nums[0].replace(",", "")))
             except (ValueError, IndexError):
                 pass
 
-    bonus_count = len(bonus_list)
-    bonus_sorted = sorted(bonus_values)
-    bonus_median = int(_percentile(bonus_sorted, 50)) if len(bonus_sorted) >= 3 else None
-
-    salaries_sorted = sorted(salaries)
-    salary_stats = None
-    if len(salaries_sorted) >= 5:
-        salary_stats = {
-            "n_reported":      len(salaries_sorted),
-            "n_full_time":     full_time_salary_respondents,
-            "bonus_count":     bonus_count,
+    def result(self):
+        bonus_sorted = sorted(self.bonus_values)
+        bonus_median = int(_percentile(bonus_sorted, 50)) if len(bonus_sorted) >= 3 else None
+
+        quartiles = _salary_quartiles(self.salaries)
+        if quartiles is None:
+            return None
+        return {
+            "n_reported":      len(self.salaries),
+            "n_full_time":     self.full_time_respondents,
+            "bonus_count":     len(self.bonus_list),
             "bonus_median":    bonus_median,
-            "bonus_list":      bonus_list if bonus_median is None else [],
-            "p25": int(_percentile(salaries_sorted, 25)),
-            "p50": int(_percentile(salaries_sorted, 50)),
-            "p75": int(_percentile(salaries_sorted, 75)),
+            "bonus_list":      self.bonus_list.sorted() if bonus_median is None else [],
+            **quartiles,
         }
 
-    # ── Employment search methods (Qualtrics-only) ────────────────────────────
-    emp_how_counts     = defaultdict(int)
-    emp_how_respondents = 0
-    for s in employed_qualtrics:
-        p = s["qualtrics_data"][0]["payload"]
+
+class _EmpSearch:
+    """Employment search methods (Qualtrics-only, employed respondents)."""
+
+    def __init__(self):
+        self.counts      = _Tally()
+        self.respondents = 0
+
+    def add(self, s, p):
         found_any = False
         for i in range(1, 13):
             v = p.get(f"EMP_HOW_{i}", "").strip()
             if v and v in EMP_HOW_LABEL:
-                emp_how_counts[EMP_HOW_LABEL[v]] += 1
+                self.counts.add(s, EMP_HOW_LABEL[v])
                 found_any = True
         if found_any:
-            emp_how_respondents += 1
-    emp_how_table = sorted(emp_how_counts.items(), key=lambda x: -x[1])
+            self.respondents += 1
 
-    # ── Geographic distribution — FT/PT employed only, EMP_STATE primary ───────
-    # Per spec: only graduates who reported full or part time employment;
-    # based on EMP_STATE column (fall back to extracting from EMP_CITY1_1).
-    geo_counts      = defaultdict(int)
-    geo_respondents = 0
+    def result(self):
+        return {
+            "respondents": self.respondents,
+            "table":       self.counts.ranked(),
+        }
 
-    for s in students:
-        outcome = _student_outcome(s)
-        # Per spec: FT/PT employed, military, and business starters
-        if outcome not in ("Employed full-time", "Employed part-time",
-                           "Serving in the U.S. Armed Forces", "Starting a business"):
-            continue
-        # Qualtrics: prefer EMP_STATE directly, fall back to EMP_CITY1_1 parsing
-        if s.get("qualtrics_data"):
-            p = s["qualtrics_data"][0]["payload"]
-            emp_state = p.get("EMP_STATE", "").strip()
-            if emp_state:
-                geo_counts[_resolve_state(emp_state)] += 1
-                geo_respondents += 1
-            else:
-                city_str = p.get("EMP_CITY1_1", "").strip()
-                if city_str:
-                    geo_counts[_extract_state_from_city_str(city_str)] += 1
-                    geo_respondents += 1
-        # LinkedIn: employer_state + employer_country
-        elif s.get("linkedin_data"):
-            li = s["linkedin_data"][0]["payload"]
-            state   = (li.get("employer_state")   or "").strip()
-            country = (li.get("employer_country") or "").strip()
-            if state:
-                geo_counts[_resolve_state(state, country)] += 1
-                geo_respondents += 1
 
-    geo_table = sorted(geo_counts.items(), key=lambda x: -x[1])
+class _Geography:
+    """Geographic distribution — the state _geography_state counts for each student."""
 
-    # ── Starting a business — Qualtrics + LinkedIn (all sources) ─────────────
-    biz_details = []
+    def __init__(self):
+        self.counts      = _Tally()
+        self.respondents = 0
 
-    for s in students:
-        # Qualtrics
+    def add(self, s, state):
+        if state is not None:
+            self.counts.add(s, state)
+            self.respondents += 1
+
+    def result(self):
+        return {
+            "respondents": self.respondents,
+            "table":       self.counts.ranked(),
+        }
+
+
+class _Business:
+    """Starting a business — Qualtrics + LinkedIn (all sources)."""
+
+    def __init__(self):
+        self.details = _Entries()
+
+    def add(self, s):
         if s.get("qualtrics_data"):
             p = s["qualtrics_data"][0]["payload"]
             if "business" in p.get("STATUS", "").lower():
                 org     = p.get("STBUS_ORG",     "").strip()
                 purpose = p.get("STBUS_PURPOSE", "").strip()
-                biz_details.append({"org": org or "N/A", "purpose": purpose or "N/A"})
-        # LinkedIn
+                self.details.append(s, {"org": org or "N/A", "purpose": purpose or "N/A"})
         if s.get("linkedin_data"):
             li = s["linkedin_data"][0]["payload"]
             biz_name = (li.get("name_of_started_business") or "").strip()
             biz_desc = (li.get("started_business_description") or "").strip()
             if biz_name:
-                biz_details.append({"org": biz_name, "purpose": biz_desc or "N/A"})
+                self.details.append(s, {"org": biz_name, "purpose": biz_desc or "N/A"})
 
-    biz_count = outcomes.get("Starting a business", 0)
 
-    # ── Volunteer / service — Qualtrics + LinkedIn (all sources) ─────────────
-    vol_details = []
+class _Volunteer:
+    """Volunteer / service — Qualtrics + LinkedIn (all sources)."""
 
-    for s in students:
-        # Qualtrics
+    def __init__(self):
+        self.details = _Entries()
+
+    def add(self, s):
         if s.get("qualtrics_data"):
             p = s["qualtrics_data"][0]["payload"]
             if "service" in p.get("STATUS", "").lower() or "volunteer" in p.get("STATUS", "").lower():
                 org  = (p.get("VOL_ORG", "") or p.get("VOL_ORG_1", "")).strip()
                 role = p.get("VOL_ROLE",  "").strip()
-                vol_details.append({"org": org or "N/A", "role": role or "N/A"})
-        # LinkedIn
+                self.details.append(s, {"org": org or "N/A", "role": role or "N/A"})
         if s.get("linkedin_data"):
             li = s["linkedin_data"][0]["payload"]
             vol_org  = (li.get("volunteer_organization") or "").strip()
             vol_role = (li.get("volunteer_role")         or "").strip()
             if vol_org:
-                vol_details.append({"org": vol_org, "role": vol_role or "N/A"})
-
-    vol_count = outcomes.get("Volunteering or service program", 0)
-    mil_count = outcomes.get("Serving in the U.S. Armed Forces", 0)
+                self.details.append(s, {"org": vol_org, "role": vol_role or "N/A"})
 
-    # ── Continuing education — Qualtrics + Clearinghouse + LinkedIn (all sources)
-    cont_edu_count     = outcomes.get("Continuing education", 0)
-    cont_edu_umd_count = 0
-    degree_counts      = defaultdict(int)
-    cont_edu_programs  = []
 
-    _UNSPECIFIED = {"unspecified", "unknown", "n/a", "na", "none", "", "other"}
+class _ContinuingEducation:
+    """Continuing education — Qualtrics + Clearinghouse + LinkedIn (all sources); feeds Appendix B."""
 
-    def _blank_or_unspecified(val: str) -> bool:
-        return not val or val.lower().strip() in _UNSPECIFIED
+    def __init__(self):
+        self.umd_count     = 0
+        self.degree_counts = _Tally()
+        self.programs      = _Entries()
 
-    def _add_ce(inst: str, prog: str, deg: str):
-        nonlocal cont_edu_umd_count
+    def _add_ce(self, s, inst: str, prog: str, deg: str):
         inst_clean = inst.split(",")[0].strip() if inst else ""
         if inst and "university of maryland" in inst.lower() and "college park" in inst.lower():
-            cont_edu_umd_count += 1
+            self.umd_count += 1
         deg_val = deg if not _blank_or_unspecified(deg) else None
         if deg_val:
-            degree_counts[deg_val] += 1
+            self.degree_counts.add(s, deg_val)
         inst_val = inst_clean if not _blank_or_unspecified(inst_clean) else None
         prog_val = prog if not _blank_or_unspecified(prog) else None
         if inst_val or prog_val:
-            cont_edu_programs.append({
+            self.programs.append(s, {
                 "institution": inst_val or "",
                 "program":     prog_val or "",
                 "degree":      deg_val  or "",
             })
 
-    for s in students:
+    def add(self, s, outcome):
         # Qualtrics CE entries
         if s.get("qualtrics_data"):
             p = s["qualtrics_data"][0]["payload"]
@@ -559,7 +863,7 @@ def aggregate_report_data(major_filter=None, school_filter=None, term_filter=Non
                 prog = p.get("CONTEDU_PROGRAM", "").strip()
                 deg  = p.get("CONTEDU_DEGREE",  "").strip()
                 if inst or prog or deg:
-                    _add_ce(inst, prog, deg)
+                    self._add_ce(s, inst, prog, deg)
         # Clearinghouse CE entries
         if s.get("clearinghouse_data"):
             ch = s["clearinghouse_data"][0]["payload"]
@@ -575,117 +879,132 @@ def aggregate_report_data(major_filter=None, school_filter=None, term_filter=Non
                 ch.get("Credential Level") or ch.get("degree") or ""
             ).strip()
             if inst or prog:
-                _add_ce(inst, prog, deg)
+                self._add_ce(s, inst, prog, deg)
         # LinkedIn CE entries
         if s.get("linkedin_data"):
-            if _student_outcome(s) == "Continuing education":
+            if outcome == "Continuing education":
                 li = s["linkedin_data"][0]["payload"]
                 inst = (li.get("continuing_education_institution") or "").strip()
                 prog = (li.get("continuing_education_program")     or "").strip()
                 deg  = (li.get("continuing_education_degree")      or "").strip()
                 if inst or prog:
-                    _add_ce(inst, prog, deg)
+                    self._add_ce(s, inst, prog, deg)
+
+    def programs_sorted(self):
+        """Appendix B: programs deduplicated by (institution, program), first in student order wins."""
+        seen: set = set()
+        deduped = []
+        for prog in self.programs.sorted():
+            key = (prog["institution"].lower(), prog["program"].lower())
+            if key not in seen:
+                seen.add(key)
+                deduped.append(prog)
+        return sorted(deduped, key=lambda x: (x["institution"], x["program"]))
 
-    degree_table = sorted(degree_counts.items(), key=lambda x: -x[1])
 
-    # ── Out-of-classroom experience (Qualtrics-only) ──────────────────────────
-    otherexp_counts     = defaultdict(int)
-    otherexp_respondents = 0
-    for s in with_survey:
-        p = s["qualtrics_data"][0]["payload"]
+class _OtherExperience:
+    """Out-of-classroom experience (Qualtrics-only)."""
+
+    def __init__(self):
+        self.counts      = _Tally()
+        self.respondents = 0
+
+    def add(self, s, p):
         found_any = False
         for field, label in OTHEREXP_LABEL.items():
             v = p.get(field, "")
             if v and str(v).strip() not in ("", "0"):
-                otherexp_counts[label] += 1
+                self.counts.add(s, label)
                 found_any = True
         if found_any:
-            otherexp_respondents += 1
-    otherexp_table = sorted(otherexp_counts.items(), key=lambda x: -x[1])
-
-    # ── Internship participation (Qualtrics-only) ─────────────────────────────
-    intern_respondents      = 0
-    interns_with_any        = 0
-    intern_two_plus         = 0
-    intern_paid_count       = 0
-    intern_credit_count     = 0
-    intern_paid_students    = 0   # students with ≥1 paid internship
-    intern_credit_students  = 0   # students with ≥1 credit internship
-    total_internships_reported = 0
-    intern_hourly_wages     = []
-    intern_list             = []
-
-    for s in with_survey:
-        p = s["qualtrics_data"][0]["payload"]
-        nin_str = p.get("NUMINTERN", "").strip()
-        if nin_str == "":
-            continue
-        intern_respondents += 1
-        try:
-            nin = int(nin_str)
-        except ValueError:
-            continue
+            self.respondents += 1
+
+    def result(self):
+        return {
+            "respondents": self.respondents,
+            "table":       self.counts.ranked(),
+        }
+
+
+class _Internships:
+    """Internship participation (Qualtrics-only)."""
+
+    def __init__(self):
+        self.respondents     = 0
+        self.with_any        = 0
+        self.two_plus        = 0
+        self.paid_count      = 0
+        self.credit_count    = 0
+        self.paid_students   = 0   # students with ≥1 paid internship
+        self.credit_students = 0   # students with ≥1 credit internship
+        self.total_reported  = 0
+        self.hourly_wages    = []
+        self.intern_list     = _Entries()
+
+    def add(self, s, p):
+        internships = _survey_internships(p)
+        if internships is None:
+            return
+        self.respondents += 1
+        nin, entries = internships
+        if nin is None:
+            return
 
         if nin > 0:
-            interns_with_any += 1
-            total_internships_reported += nin
+            self.with_any += 1
+            self.total_reported += nin
             if nin >= 2:
-                intern_two_plus += 1
-
-        student_had_paid   = False
-        student_had_credit = False
-        for i in range(1, nin + 1):
-            org     = p.get(f"{i}_INT_ORG_1",  "").strip()
-            title   = p.get(f"{i}_INT_TITLE",  "").strip()
-            paid    = p.get(f"{i}_INT_PAID",   "").strip()
-            credit  = p.get(f"{i}_INT_CREDIT", "").strip()
-            howmuch = p.get(f"{i}_INT_HOWMUCH","").strip()
-
-            is_paid   = paid.lower().startswith("yes") if paid else False
-            is_credit = credit.lower() == "yes" if credit else False
-
-            if is_paid:
-                intern_paid_count += 1
-                student_had_paid = True
-            if is_credit:
-                intern_credit_count += 1
-                student_had_credit = True
-            if howmuch:
-                try:
-                    intern_hourly_wages.append(float(howmuch))
-                except ValueError:
-                    pass
-            if org or title:
-                intern_list.append({
-                    "org":    org.split(",")[0].strip() if org else "Unknown",
-                    "title":  title or "Unknown",
-                    "paid":   "Paid" if is_paid else "Unpaid",
-                    "credit": "Yes" if is_credit else "No",
+                self.two_plus += 1
+
+        for e in entries:
+            if e["is_paid"]:
+                self.paid_count += 1
+            if e["is_credit"]:
+                self.credit_count += 1
+            if e["wage"] is not None:
+                self.hourly_wages.append(e["wage"])
+            if e["org"] or e["title"]:
+                self.intern_list.append(s, {
+                    "org":    e["org"].split(",")[0].strip() if e["org"] else "Unknown",
+                    "title":  e["title"] or "Unknown",
+                    "paid":   "Paid" if e["is_paid"] else "Unpaid",
+                    "credit": "Yes" if e["is_credit"] else "No",
                 })
-        if student_had_paid:   intern_paid_students += 1
-        if student_had_credit: intern_credit_students += 1
-
-    intern_avg_wage = intern_med_wage = None
-    if intern_hourly_wages:
-        intern_avg_wage = sum(intern_hourly_wages) / len(intern_hourly_wages)
-        intern_med_wage = _percentile(sorted(intern_hourly_wages), 50)
+        if any(e["is_paid"] for e in entries):   self.paid_students += 1
+        if any(e["is_credit"] for e in entries): self.credit_students += 1
+
+    def result(self):
+        avg_wage = med_wage = None
+        if self.hourly_wages:
+            avg_wage = sum(self.hourly_wages) / len(self.hourly_wages)
+            med_wage = _percentile(sorted(self.hourly_wages), 50)
+        return {
+            "respondents":      self.respondents,
+            "with_any":         self.with_any,
+            "two_plus":         self.two_plus,
+            "paid_count":       self.paid_count,
+            "credit_count":     self.credit_count,
+            "paid_students":    self.paid_students,
+            "credit_students":  self.credit_students,
+            "total_reported":   self.total_reported,
+            "avg_hourly_wage":  round(avg_wage, 2) if avg_wage else None,
+            "median_hourly_wage": round(med_wage, 2) if med_wage else None,
+            "intern_list":      self.intern_list.sorted(),
+        }
 
-    # ── Appendix A: Employers — filter to FT/PT employed; EMP_ORG + EMP_TITLES ─
-    _BLANK_SET = {"unspecified", "unknown", "n/a", "na", "none", ""}
 
-    def _clean_field(val: str) -> str | None:
-        v = val.strip() if val else ""
-        return v if v.lower() not in _BLANK_SET else None
+class _Employers:
+    """Appendix A: one employer/title per FT/PT employed student (Qualtrics, else LinkedIn)."""
 
-    employer_positions = []
-    _seen_employer_uids: set = set()
+    def __init__(self):
+        self.positions = _Entries()
+        self.seen_uids: set = set()
 
-    for s in students:
-        uid     = s.get("uid", "")
-        outcome = _student_outcome(s)
+    def add(self, s, outcome):
+        uid = s.get("uid", "")
         # Deduplicate: one entry per student (uid) — skip if already recorded
-        if uid and uid in _seen_employer_uids:
-            continue
+        if uid and uid in self.seen_uids:
+            return
         # Qualtrics: filter by STATUS to FT or PT employed
         if s.get("qualtrics_data"):
             p      = s["qualtrics_data"][0]["payload"]
@@ -694,122 +1013,142 @@ def aggregate_report_data(major_filter=None, school_filter=None, term_filter=Non
                 org   = _clean_field(p.get("EMP_ORG",   "") or p.get("EMP_ORG_1",   ""))
                 title = _clean_field(p.get("EMP_TITLES", "") or p.get("EMP_TITLE", ""))
                 if org and title:
-                    employer_positions.append({
+                    self.positions.append(s, {
                         "employer": org.split(",")[0].strip(),
                         "title":    title,
                     })
                     if uid:
-                        _seen_employer_uids.add(uid)
+                        self.seen_uids.add(uid)
         # LinkedIn: outcome must be employed
         elif s.get("linkedin_data") and "employed" in outcome.lower():
             li    = s["linkedin_data"][0]["payload"]
             org   = _clean_field(li.get("name_of_employer") or "")
             title = _clean_field(li.get("job_title") or "")
             if org and title:
-                employer_positions.append({
+                self.positions.append(s, {
                     "employer": org.split(",")[0].strip(),
                     "title":    title,
                 })
                 if uid:
-                    _seen_employer_uids.add(uid)
-
-    employer_positions_sorted = sorted(employer_positions, key=lambda x: x["employer"])
-
-    # ── Appendix B: CE programs — Qualtrics + Clearinghouse + LinkedIn ────────
-    # Deduplicate by (institution, program) key
-    _seen_ce: set = set()
-    cont_edu_programs_deduped = []
-    for prog in cont_edu_programs:
-        key = (prog["institution"].lower(), prog["program"].lower())
-        if key not in _seen_ce:
-            _seen_ce.add(key)
-            cont_edu_programs_deduped.append(prog)
-
-    cont_edu_programs_sorted = sorted(
-        cont_edu_programs_deduped,
-        key=lambda x: (x["institution"], x["program"]),
-    )
+                    self.seen_uids.add(uid)
 
-    # ── Build and return ───────────────────────────────────────────────────────
-    return {
-        "meta": {
-            "major":        (", ".join(major_filter) if isinstance(major_filter, list) else major_filter) or "All Majors",
-            "school":       school_filter or "All Schools",
-            "term":         (", ".join(term_filter) if isinstance(term_filter, list) else term_filter) or "All Terms",
-            "generated_at": datetime.now().isoformat(),
-        },
-        "totals": {
-            "total_graduates":       total_graduates,
-            "survey_count":          survey_count,
-            "linkedin_count":        len(with_linkedin),
-            "clearinghouse_count":   len(with_clearinghouse),
-            "known_count":           known_count,
-            "survey_response_rate":  round(survey_count / total_graduates * 100, 1) if total_graduates else 0,
-            "knowledge_rate":        round(known_count  / total_graduates * 100, 1) if total_graduates else 0,
-        },
-        "outcomes": {
-            "table":          outcomes_table,
-            "grand_total":    grand_total,
-            # Placement: Placed / (Placed + Unplaced + Unresolved), excl. NOT seeking
-            "placement_rate": round(
-                (grand_total - outcomes.get("Unplaced", 0) - outcomes.get("Unresolved", 0)) /
-                max(grand_total, 1) * 100, 1
-            ) if grand_total else 0,
-            "employed_count":     employed_count,
-            "employed_pct":       round(employed_count / max(grand_total, 1) * 100, 1) if grand_total else 0,
-            # % in workforce: Employed FT/PT + Volunteering + Military + Business
-            # Denominator = people with data about them, excl. NOT seeking and Unresolved
-            "in_workforce_count": in_workforce_count,
-            "in_workforce_pct":   round(
-                in_workforce_count /
-                max(grand_total - outcomes.get("Unresolved", 0), 1) * 100, 1
-            ) if grand_total else 0,
-        },
-        "nature": {
-            "respondents":       len(employed_qualtrics),
-            "nature_counts":     dict(nature_counts),
-            "field_counts":      dict(field_counts),
-            "modality_counts":   dict(modality_counts),
-            "emp_status_counts": dict(emp_status_counts),
-        },
-        "salary":    salary_stats,
-        "emp_search": {
-            "respondents": emp_how_respondents,
-            "table":       emp_how_table,
-        },
-        "geography": {
-            "respondents": geo_respondents,
-            "table":       geo_table,
-        },
-        "business":  {"count": biz_count, "details": biz_details},
-        "volunteer": {"count": vol_count, "details": vol_details},
-        "military":  {"count": mil_count},
-        "continuing_education": {
-            "count":       cont_edu_count,
-            "umd_count":   cont_edu_umd_count,
-            "degree_table": degree_table,
-            "programs":    cont_edu_programs_sorted,
-        },
-        "otherexp": {
-            "respondents": otherexp_respondents,
-            "table":       otherexp_table,
-        },
-        "internships": {
-            "respondents":      intern_respondents,
-            "with_any":         interns_with_any,
-            "two_plus":         intern_two_plus,
-            "paid_count":       intern_paid_count,
-            "credit_count":     intern_credit_count,
-            "paid_students":    intern_paid_students,
-            "credit_students":  intern_credit_students,
-            "total_reported":   total_internships_reported,
-            "avg_hourly_wage":  round(intern_avg_wage, 2) if intern_avg_wage else None,
-            "median_hourly_wage": round(intern_med_wage, 2) if intern_med_wage else None,
-            "intern_list":      intern_list,
-        },
-        "appendix_a": employer_positions_sorted,
-        "appendix_b": cont_edu_programs_sorted,
-    }
+    def result(self):
+        return sorted(self.positions.sorted(), key=lambda x: x["employer"])
+
+
+class ReportAggregator:
+    """
+    Single-pass report engine: add() each merged student record once, then
+    result() builds the same dict aggregate_report_data returns. Holds only
+    per-section counters and the report's own detail lists, never the cohort.
+    """
+
+    def __init__(self):
+        self.totals        = _Totals()
+        self.outcomes      = _Outcomes()
+        self.nature        = _Nature()
+        self.salary        = _Salary()
+        self.emp_search    = _EmpSearch()
+        self.geography     = _Geography()
+        self.business      = _Business()
+        self.volunteer     = _Volunteer()
+        self.cont_edu      = _ContinuingEducation()
+        self.otherexp      = _OtherExperience()
+        self.internships   = _Internships()
+        self.employers     = _Employers()
+
+    def add(self, s: dict):
+        outcome = _student_outcome(s)
+        p = s["qualtrics_data"][0]["payload"] if s.get("qualtrics_data") else None
+
+        # Students whose survey STATUS is "employed" — for Qualtrics-specific stats
+        employed_qualtrics = p is not None and _employed_survey(p)
+
+        self.totals.add(bool(s.get("qualtrics_data")), bool(s.get("linkedin_data")),
+                        bool(s.get("clearinghouse_data")))
+        self.outcomes.add(outcome)
+        self.nature.add(s, outcome, employed_qualtrics)
+        if employed_qualtrics:
+            self.salary.add(s, p)
+            self.emp_search.add(s, p)
+        self.geography.add(s, _geography_state(s, outcome))
+        self.business.add(s)
+        self.volunteer.add(s)
+        self.cont_edu.add(s, outcome)
+        if p is not None:
+            self.otherexp.add(s, p)
+            self.internships.add(s, p)
+        self.employers.add(s, outcome)
+
+    def result(self, major_filter=None, school_filter=None, term_filter=None) -> dict:
+        outcomes = self.outcomes.counts
+        cont_edu_programs_sorted = self.cont_edu.programs_sorted()
+
+        return {
+            "meta": {
+                "major":        (", ".join(major_filter) if isinstance(major_filter, list) else major_filter) or "All Majors",
+                "school":       school_filter or "All Schools",
+                "term":         (", ".join(term_filter) if isinstance(term_filter, list) else term_filter) or "All Terms",
+                "generated_at": datetime.now().isoformat(),
+            },
+            "totals":     self.totals.result(outcomes.get("Unresolved", 0)),
+            "outcomes":   self.outcomes.result(),
+            "nature":     self.nature.result(),
+            "salary":     self.salary.result(),
+            "emp_search": self.emp_search.result(),
+            "geography":  self.geography.result(),
+            "business":   {"count": outcomes.get("Starting a business", 0),
+                           "details": self.business.details.sorted()},
+            "volunteer":  {"count": outcomes.get("Volunteering or service program", 0),
+                           "details": self.volunteer.details.sorted()},
+            "military":   {"count": outcomes.get("Serving in the U.S. Armed Forces", 0)},
+            "continuing_education": {
+                "count":        outcomes.get("Continuing education", 0),
+                "umd_count":    self.cont_edu.umd_count,
+                "degree_table": self.cont_edu.degree_counts.ranked(),
+                "programs":     cont_edu_programs_sorted,
+            },
+            "otherexp":    self.otherexp.result(),
+            "internships": self.internships.result(),
+            "appendix_a":  self.employers.result(),
+            "appendix_b":  cont_edu_programs_sorted,
+        }
+
+
+class FactSummary:
+    """
+    Headline numbers — totals, outcomes, salary quartiles, paid internships —
+    over a cube.OutcomeCell, fed report.student_facts rows one at a time or
+    whole pre-aggregated cells from analytics.outcome_cube. Each section
+    matches the same section of ReportAggregator.result().
+    """
+
+    def __init__(self):
+        self.cell = cube.OutcomeCell()
+
+    def add(self, f: dict):
+        self.cell.add_fact(f)
+
+    def add_cell(self, cell):
+        self.cell.merge(cell)
+
+    def result(self) -> dict:
+        cell = self.cell
+        totals = _Totals()
+        totals.total, totals.survey = cell.students, cell.survey_count
+        totals.linkedin, totals.clearinghouse = cell.linkedin_count, cell.clearinghouse_count
+        outcomes = _Outcomes()
+        for label, n in cell.outcome_counts.items():
+            if label == "NOT seeking":
+                outcomes.not_seeking = n
+            else:
+                outcomes.counts[label] = n
+        return {
+            "totals":      totals.result(outcomes.counts.get("Unresolved", 0)),
+            "outcomes":    outcomes.result(),
+            "salary":      _sketch_quartiles(cell.report_salaries, 5),
+            "internships": {"paid_students": cell.paid_students},
+        }
 
 
 # ── DOCX helpers ──────────────────────────────────────────────────────────────
@@ -876,6 +1215,57 @@ def _data_row(table, row_idx, values, alt=True):
                 run.bold = True
 
 
+_RUN_BREAKS = re.compile(r"(\t|\r|\n)")
+
+
+def _run_xml(text: str, rpr: str) -> str:
+    """<w:r> for `text` as python-docx writes it: tabs → w:tab, line breaks → w:br."""
+    content = []
+    for i, piece in enumerate(_RUN_BREAKS.split(text)):
+        if i % 2:
+            content.append("<w:tab/>" if piece == "\t" else "<w:br/>")
+        elif piece:
+            space = ' xml:space="preserve"' if piece.strip() != piece else ""
+            content.append(f"<w:t{space}>{escape(piece)}</w:t>")
+    return f"<w:r>{rpr}{''.join(content)}</w:r>"
+
+
+def _data_rows(table, rows, alt=True):
+    """
+    Append `rows` to `table` as _data_row would fill them, from one XML
+    fragment: each row is formatted from per-column cell templates and the
+    whole batch is parsed once, instead of building every cell, run and
+    shading element through python-docx. Used for the long list tables.
+    """
+    widths = [tc.tcPr.find(qn("w:tcW")).get(qn("w:w")) for tc in table._tbl.tr_lst[0].tc_lst]
+    shd = f'<w:shd w:val="clear" w:color="auto" w:fill="{TABLE_ROW_ALT}"/>'
+    cell_open = {
+        shaded: [f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{w}"/>{shd if shaded else ""}</w:tcPr>'
+                 f'<w:p><w:pPr><w:jc w:val="left"/></w:pPr>' for w in widths]
+        for shaded in (False, True)
+    }
+    xml = []
+    for row_idx, values in enumerate(rows, start=len(table.rows)):
+        values = [str(v) for v in values]
+        opens = cell_open[alt and row_idx % 2 == 0]
+        rpr = "<w:rPr><w:b/></w:rPr>" if values and values[0] == "Grand Total" else ""
+        xml.append("<w:tr>")
+        xml.extend(f"{tc}{_run_xml(val, rpr)}</w:p></w:tc>" for tc, val in zip(opens, values))
+        xml.append("</w:tr>")
+    if xml:
+        table._tbl.extend(parse_xml(f"<w:tbl {nsdecls('w')}>{''.join(xml)}</w:tbl>"))
+
+
+def _list_table(doc, headers, rows):
+    """Bordered table with a header row and `rows` appended in bulk (_data_rows)."""
+    table = doc.add_table(rows=1, cols=len(headers))
+    _add_table_borders(table)
+    table.style = "Table Grid"
+    _header_row(table, headers)
+    _data_rows(table, rows)
+    return table
+
+
 def _section_heading(doc, text):
     h = doc.add_heading(text, level=1)
     for run in h.runs:
@@ -904,7 +1294,43 @@ def _bullet(doc, text):
 
 # ── DOCX generation ───────────────────────────────────────────────────────────
 
+def report_filename(major_filter=None, term_filter=None) -> str:
+    """Download filename of the DOCX report for the filters."""
+    major_part = ("_".join(major_filter) if major_filter else "AllMajors").replace(" ", "_")
+    term_part = ("_".join(term_filter) if term_filter else "AllTerms").replace(" ", "_")
+    date_part = datetime.now().strftime("%Y%m%d")
+    return f"GradOutcomesReport_{major_part}_{term_part}_{date_part}.docx"
+
+
+# In-memory size of a spooled report before it moves to a temporary file
+DOCX_SPOOL_BYTES = 1 << 20
+
+
 def generate_report_docx(data: dict) -> bytes:
+    buf = io.BytesIO()
+    write_report_docx(data, buf)
+    return buf.getvalue()
+
+
+def spool_report_docx(data: dict):
+    """
+    (file, size): the report written to a SpooledTemporaryFile, rewound —
+    kept in memory up to DOCX_SPOOL_BYTES, on disk past that. The caller
+    closes the file.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=DOCX_SPOOL_BYTES)
+    try:
+        write_report_docx(data, spool)
+        size = spool.tell()
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool, size
+
+
+def write_report_docx(data: dict, fp):
+    """Render the report into the binary file object `fp`."""
     doc = Document()
 
     for section in doc.sections:
@@ -1228,12 +1654,8 @@ def generate_report_docx(data: dict) -> bytes:
                 f"${internships['avg_hourly_wage']:.2f} per hour, and the median reported income "
                 f"was ${internships['median_hourly_wage']:.2f} per hour.")
         doc.add_paragraph()
-        int_tbl = doc.add_table(rows=len(internships["intern_list"]) + 1, cols=4)
-        _add_table_borders(int_tbl)
-        int_tbl.style = "Table Grid"
-        _header_row(int_tbl, ["Organization", "Position", "Paid", "Credit"])
-        for idx, entry in enumerate(internships["intern_list"]):
-            _data_row(int_tbl, idx + 1, [entry["org"], entry["title"], entry["paid"], entry["credit"]])
+        _list_table(doc, ["Organization", "Position", "Paid", "Credit"],
+                    ([e["org"], e["title"], e["paid"], e["credit"]] for e in internships["intern_list"]))
         doc.add_paragraph()
 
     # ── Appendix A ─────────────────────────────────────────────────────────────
@@ -1244,12 +1666,8 @@ def generate_report_docx(data: dict) -> bytes:
         f"graduates (Qualtrics survey and LinkedIn). "
         f"This list only includes positions if both the employer and position were reported.")
     if appendix_a:
-        app_a_tbl = doc.add_table(rows=len(appendix_a) + 1, cols=2)
-        _add_table_borders(app_a_tbl)
-        app_a_tbl.style = "Table Grid"
-        _header_row(app_a_tbl, ["Employer", "Job Title"])
-        for idx, entry in enumerate(appendix_a):
-            _data_row(app_a_tbl, idx + 1, [entry["employer"], entry["title"]])
+        _list_table(doc, ["Employer", "Job Title"],
+                    ([e["employer"], e["title"]] for e in appendix_a))
     else:
         _body_text(doc, "No employer data available for this cohort.")
     doc.add_paragraph()
@@ -1261,43 +1679,79 @@ def generate_report_docx(data: dict) -> bytes:
         "(Qualtrics survey, National Student Clearinghouse, and LinkedIn). "
         "This list only includes programs if the university or program were known.")
     if appendix_b:
-        app_b_tbl = doc.add_table(rows=len(appendix_b) + 1, cols=3)
-        _add_table_borders(app_b_tbl)
-        app_b_tbl.style = "Table Grid"
-        _header_row(app_b_tbl, ["Institution", "Program", "Degree"])
-        for idx, entry in enumerate(appendix_b):
-            _data_row(app_b_tbl, idx + 1, [entry["institution"], entry["program"], entry["degree"]])
+        _list_table(doc, ["Institution", "Program", "Degree"],
+                    ([e["institution"], e["program"], e["degree"]] for e in appendix_b))
     else:
         _body_text(doc, "No continuing education data available for this cohort.")
 
     # ── Serialise ──────────────────────────────────────────────────────────────
-    buf = io.BytesIO()
-    doc.save(buf)
-    buf.seek(0)
-    return buf.getvalue()
+    doc.save(fp)
 
 
 # ── Dashboard longitudinal aggregation ────────────────────────────────────────
 
+def _matches_school(value, school: str) -> bool:
+    """In-memory twin of the school filter in database._build_demo_where (case-insensitive substring)."""
+    return school.lower() in (value or "").lower()
+
+
 def aggregate_dashboard_data(
     major_filter=None,
     school_filter=None,
     term_filter=None,
 ):
-    """Aggregate comprehensive dashboard data including per-term longitudinal trends."""
-    import database as _db
+    """
+    Aggregate comprehensive dashboard data including per-term longitudinal trends.
+    The cohort is streamed once for the full overall report. The per-term and
+    per-school summaries merge the matching analytics.outcome_cube cells
+    (cube.py) — O(cells), not O(students) — or, without the cube, cells
+    built in-process from the same stream; each sees the same students as
+    the equivalent filtered load.
+    """
+    all_terms = sorted(database.get_distinct_terms())
+    if term_filter:
+        all_terms = [t for t in all_terms if t in term_filter]
+    # Per-school comparison (skip when a school is already selected)
+    schools = [] if school_filter else sorted(database.get_distinct_values("major1_coll"))
+
+    # The overall report keeps per-student detail (appendices, programs,
+    # free-text fields) that cells cannot merge, so it still streams.
+    # Drain the fact queue first so the cells reflect the same writes
+    use_cube = cube.available()
+    if use_cube:
+        facts_module.refresh_pending()
+    overall_agg = ReportAggregator()
+    students = database.iter_students_with_data(
+        major_filter=major_filter,
+        school_filter=school_filter,
+        term_filter=term_filter,
+    )
+    if use_cube:
+        for s in students:
+            overall_agg.add(s)
+        cells = cube.load_cells(major_filter, school_filter, term_filter)
+    else:
+        cells = {}
+        for s in students:
+            overall_agg.add(s)
+            cube.add_to_cells(cells, student_facts(s))
+
+    term_aggs   = {term: FactSummary() for term in all_terms}
+    school_aggs = {school: FactSummary() for school in schools}
+    for (term, _major, cell_school), cell in cells.items():
+        if term in term_aggs:
+            term_aggs[term].add_cell(cell)
+        for school, agg in school_aggs.items():
+            if _matches_school(cell_school, school):
+                agg.add_cell(cell)
 
     # Overall summary (all selected terms combined)
-    overall = aggregate_report_data(major_filter, school_filter, term_filter)
+    overall = overall_agg.result(major_filter, school_filter, term_filter)
 
     # Per-term longitudinal breakdowns
-    all_terms = sorted(_db.get_distinct_terms())
-    if term_filter:
-        all_terms = [t for t in all_terms if t in term_filter]
-
     longitudinal = []
     for term in all_terms:
-        td = aggregate_report_data(major_filter, school_filter, [term])
+        td = term_aggs[term].result()
         total_grads = td["totals"]["total_graduates"]
         if total_grads == 0:
             continue
@@ -1317,20 +1771,19 @@ def aggregate_dashboard_data(
             "outcomes":             {row["label"]: row["n"] for row in td["outcomes"]["table"]},
         })
 
-    # Per-school comparison (skip when a school is already selected)
+    # Per-school comparison
     school_comparison = []
-    if not school_filter:
-        for school in sorted(_db.get_distinct_values("major1_coll")):
-            sd = aggregate_report_data(major_filter, school, term_filter)
-            if sd["totals"]["total_graduates"] == 0:
-                continue
-            school_comparison.append({
-                "school":           school,
-                "total":            sd["totals"]["total_graduates"],
-                "placement_rate":   sd["outcomes"]["placement_rate"],
-                "knowledge_rate":   sd["totals"]["knowledge_rate"],
-                "in_workforce_pct": sd["outcomes"]["in_workforce_pct"],
-            })
+    for school in schools:
+        sd = school_aggs[school].result()
+        if sd["totals"]["total_graduates"] == 0:
+            continue
+        school_comparison.append({
+            "school":           school,
+            "total":            sd["totals"]["total_graduates"],
+            "placement_rate":   sd["outcomes"]["placement_rate"],
+            "knowledge_rate":   sd["totals"]["knowledge_rate"],
+            "in_workforce_pct": sd["outcomes"]["in_workforce_pct"],
+        })
 
     return {
         "overall":           overall,
@@ -1344,63 +1797,62 @@ def aggregate_major_comparison(
     school_filter=None,
     term_filter=None,
 ):
-    """Per-major outcome stats for the Major Analytics dashboard tab."""
-    students = database.get_students_with_data(
-        limit=None, offset=None,
-        major_filter=major_filter,
-        school_filter=school_filter,
-        term_filter=term_filter,
-    )
-
-    from collections import defaultdict
+    """
+    Per-major outcome stats for the Major Analytics dashboard tab.
+    Merges the matching analytics.outcome_cube cells (cube.py) per major and
+    school when the cube exists; otherwise builds the same cells from the
+    analytics.student_facts rows (facts.py) or from the streamed cohort. Either
+    way memory grows with the number of cells, not the cohort size.
+    """
+    if cube.available():
+        facts_module.refresh_pending()
+        cells = cube.load_cells(major_filter, school_filter, term_filter)
+    elif facts_module.available():
+        cells = cube.cells_from_facts(facts_module.iter_facts(major_filter, school_filter, term_filter))
+    else:
+        cells = cube.cells_from_facts(student_facts(s) for s in database.iter_students_with_data(
+            major_filter=major_filter,
+            school_filter=school_filter,
+            term_filter=term_filter,
+        ))
 
-    major_groups: dict = defaultdict(list)
-    for s in students:
-        major  = (s.get("major")  or "Unknown").strip()
-        school = (s.get("school") or "").strip()
-        major_groups[(major, school)].append(s)
+    merged: dict = {}
+    for (_term, major, school), cell in cells.items():
+        key = ((major or "Unknown").strip(), (school or "").strip())
+        merged.setdefault(key, cube.OutcomeCell()).merge(cell)
 
     results = []
-    for (major, school), group in sorted(major_groups.items(), key=lambda x: -len(x[1])):
-        if len(group) < 3:
+    for (major, school), cell in sorted(merged.items(), key=lambda x: (-x[1].students, x[0])):
+        total = cell.students
+        if total < 3:
             continue
 
-        outcomes_list   = [_student_outcome(s) for s in group]
-        not_seeking_cnt = sum(1 for o in outcomes_list if o == "NOT seeking")
-        known_cnt       = sum(1 for o in outcomes_list if o != "Unresolved")
-        placed_cnt      = sum(1 for o in outcomes_list if o not in ("Unresolved", "Unplaced", "NOT seeking"))
-        workforce_cnt   = sum(1 for o in outcomes_list if o in (
+        outcomes        = cell.outcome_counts
+        not_seeking_cnt = outcomes["NOT seeking"]
+        known_cnt       = total - outcomes["Unresolved"]
+        placed_cnt      = known_cnt - outcomes["Unplaced"] - not_seeking_cnt
+        workforce_cnt   = sum(outcomes[label] for label in (
             "Employed full-time", "Employed part-time",
             "Serving in the U.S. Armed Forces", "Starting a business",
             "Volunteering or service program",
         ))
+        salaries        = _sketch_quartiles(cell.salaries, 3) or {}
 
-        salaries = []
-        for s in group:
-            if s.get("qualtrics_data"):
-                p   = s["qualtrics_data"][0]["payload"]
-                sal = (p.get("EMP_SAL_1") or p.get("EMP_SAL") or p.get("EMP_SALARY") or "").strip()
-                if sal:
-                    mid = _parse_salary_midpoint(sal)
-                    if mid:
-                        salaries.append(mid)
-
-        sal_sorted = sorted(salaries)
         denom = max(known_cnt - not_seeking_cnt, 1)
 
         results.append({
             "major":           major,
             "school":          school,
-            "total":           len(group),
+            "total":           total,
             "placed":          placed_cnt,
             "known":           known_cnt,
             "in_workforce":    workforce_cnt,
             "placement_rate":  round(placed_cnt / denom * 100, 1),
-            "knowledge_rate":  round(known_cnt  / len(group) * 100, 1),
+            "knowledge_rate":  round(known_cnt  / total * 100, 1),
             "in_workforce_pct": round(workforce_cnt / max(known_cnt, 1) * 100, 1),
-            "salary_p25":      int(_percentile(sal_sorted, 25)) if len(sal_sorted) >= 3 else None,
-            "salary_median":   int(_percentile(sal_sorted, 50)) if len(sal_sorted) >= 3 else None,
-            "salary_p75":      int(_percentile(sal_sorted, 75)) if len(sal_sorted) >= 3 else None,
+            "salary_p25":      salaries.get("p25"),
+            "salary_median":   salaries.get("p50"),
+            "salary_p75":      salaries.get("p75"),
         })
 
     return sorted(results, key=lambda x: -x["total"])
@@ -0,0 +1,196 @@
+"""
+Batch per-major DOCX reports, zipped.
+
+Departments want one report per major every term. Instead of one
+/api/report/download per major — each reloading the cohort and rendering
+single-threaded — a batch streams the term's cohort once (for the listed
+majors, or every major of a school), splits it into each major's report
+cohort in memory, and fans aggregation + generate_report_docx out over a
+process pool. Reports are written into a ZIP as they finish, and the ZIP
+is streamed to the client while it is assembled.
+
+Each report is what /api/report/download returns for major=<major>, the
+batch's terms and school: a student belongs to every major whose filter
+matches it (database._cohort_filter_clauses: case-insensitive substring),
+and cohort order is preserved, so the DOCX parts are identical.
+
+    REPORT_BATCH_PROCESSES=4    # worker processes (default: CPU count)
+
+    python report_batch.py --term "Spring 2024" --majors Biology Chemistry -o reports.zip
+    python report_batch.py --term "Spring 2024" --school CMNS --verify
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import database
+import report
+
+PROCESSES = int(os.getenv("REPORT_BATCH_PROCESSES", "0")) or os.cpu_count() or 1
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def new_executor(processes=PROCESSES) -> ProcessPoolExecutor:
+    """Worker pool started by forkserver / spawn: forking a process with pool threads is unsafe."""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=processes, mp_context=context)
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Process-wide worker pool, started on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = new_executor()
+        return _executor
+
+
+def shutdown():
+    """Stop the worker pool (called on application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+def _matches_major(value, major: str) -> bool:
+    """In-memory twin of a single-major filter in database._cohort_filter_clauses."""
+    return major.lower() in (value or "").lower()
+
+
+def load_cohorts(term_filter, majors=None, school_filter=None) -> dict:
+    """
+    {major: [student records]} from one stream of the cohort. Without
+    `majors`, every major of the (school-filtered) cohort, sorted.
+    """
+    students = database.iter_students_with_data(
+        major_filter=majors or None, school_filter=school_filter, term_filter=term_filter,
+    )
+    if not majors:
+        students = list(students)
+        majors = sorted({s["major"] for s in students if s.get("major")})
+    cohorts = {major: [] for major in majors}
+    for s in students:
+        for major in majors:
+            if _matches_major(s.get("major"), major):
+                cohorts[major].append(s)
+    return cohorts
+
+
+def render(students, major, school_filter, term_filter) -> bytes:
+    """One major's DOCX from its cohort (runs in a worker process)."""
+    data = report._aggregate_students(students, [major], school_filter, term_filter)
+    return report.generate_report_docx(data)
+
+
+class _Sink(io.RawIOBase):
+    """Unseekable write target whose bytes are drained as they are produced."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def iter_zip(cohorts: dict, school_filter=None, term_filter=None, executor=None):
+    """
+    Yield the bytes of a ZIP holding one DOCX per major, each report
+    written as soon as its worker finishes. DOCX files are already
+    deflated, so entries are stored.
+    """
+    executor = executor or get_executor()
+    pending = {
+        executor.submit(render, students, major, school_filter, term_filter): major
+        for major, students in cohorts.items()
+    }
+    sink = _Sink()
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    major = pending.pop(future)
+                    archive.writestr(report.report_filename([major], term_filter), future.result())
+                    yield sink.drain()
+        yield sink.drain()
+    finally:
+        # Client went away or a report failed: drop the reports not yet started
+        for future in pending:
+            future.cancel()
+
+
+def zip_filename(term_filter, majors=None, school_filter=None) -> str:
+    scope = school_filter or ("_".join(majors) if majors else "AllMajors")
+    terms = "_".join(term_filter) if isinstance(term_filter, list) else term_filter
+    return f"GradOutcomesReports_{scope}_{terms}_{time.strftime('%Y%m%d')}.zip".replace(" ", "_")
+
+
+# ── CLI ───────────────────────────────────────────────────────────────────────
+
+def _docx_parts(content: bytes) -> dict:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def verify(path, cohorts, school_filter, term_filter) -> bool:
+    """Compare every report in the ZIP with a separate per-major download's DOCX."""
+    passed = True
+    with zipfile.ZipFile(path) as archive:
+        for major in cohorts:
+            name = report.report_filename([major], term_filter)
+            expected = report.generate_report_docx(
+                report.aggregate_report_data([major], school_filter, term_filter))
+            ok = _docx_parts(archive.read(name)) == _docx_parts(expected)
+            passed &= ok
+            print(f"  {'ok  ' if ok else 'FAIL'} {major:<40} {len(cohorts[major])} students")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch per-major DOCX reports as one ZIP")
+    parser.add_argument("--term", nargs="+", required=True)
+    scope = parser.add_mutually_exclusive_group(required=True)
+    scope.add_argument("--majors", nargs="+")
+    scope.add_argument("--school")
+    parser.add_argument("-o", "--output", default=None)
+    parser.add_argument("--processes", type=int, default=PROCESSES)
+    parser.add_argument("--verify", action="store_true",
+                        help="compare each report with a separate per-major download")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cohorts = load_cohorts(args.term, args.majors, args.school)
+    loaded = time.perf_counter()
+    output = args.output or zip_filename(args.term, args.majors, args.school)
+    with new_executor(args.processes) as executor, open(output, "wb") as f:
+        for chunk in iter_zip(cohorts, args.school, args.term, executor):
+            f.write(chunk)
+    print(f"{len(cohorts)} reports → {output}  "
+          f"(cohort {loaded - start:.1f} s, reports {time.perf_counter() - loaded:.1f} s, "
+          f"{args.processes} processes)")
+    if args.verify:
+        sys.exit(0 if verify(output, cohorts, args.school, args.term) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""
+Background report jobs (analytics.report_jobs).
+
+/api/report/download aggregates and renders inside the request. For large
+cohorts, POST /api/report/jobs instead queues a job row and returns its id
+at once. Worker threads in each API process claim queued jobs (FOR UPDATE
+SKIP LOCKED), run aggregate_report_data (through the result cache, so a job
+and a preview of the same filters share one aggregation) and
+generate_report_docx, and store the DOCX in the job row. Clients poll
+GET /api/report/jobs/{id} for status, stage and progress, then fetch
+GET /api/report/jobs/{id}/download, which streams the artifact out of the
+row in ARTIFACT_CHUNK slices.
+
+Jobs live in Postgres, so they survive a restart and any API process can
+serve their status and artifact. A running job's worker refreshes
+heartbeat_at; a job whose heartbeat is older than REPORT_JOB_LEASE (its
+process died) is claimed again, up to REPORT_JOB_ATTEMPTS times. A worker
+thread survives errors of its own (a database outage, say): it requeues
+the job it held, backs off and keeps polling. Finished jobs and their
+artifacts are deleted after REPORT_JOB_RETENTION.
+
+    REPORT_JOB_WORKERS=2        # worker threads per API process; 0: only `python report_jobs.py work`
+    REPORT_JOB_LEASE=120        # seconds without a heartbeat before a running job is reclaimed
+    REPORT_JOB_ATTEMPTS=3       # claims before a job is marked failed
+    REPORT_JOB_RETENTION=86400  # seconds finished jobs are kept
+    REPORT_JOB_POLL=5           # seconds an idle worker waits before checking for jobs again
+
+    python report_jobs.py work  # run workers in the foreground
+    python report_jobs.py list  # recent jobs
+"""
+
+import argparse
+import logging
+import os
+import threading
+import uuid
+
+import psycopg
+from psycopg.types.json import Jsonb
+
+import database
+import report
+import result_cache
+
+WORKERS   = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+LEASE     = float(os.getenv("REPORT_JOB_LEASE", "120"))
+ATTEMPTS  = int(os.getenv("REPORT_JOB_ATTEMPTS", "3"))
+RETENTION = float(os.getenv("REPORT_JOB_RETENTION", "86400"))
+POLL      = float(os.getenv("REPORT_JOB_POLL", "5"))
+
+ARTIFACT_CHUNK = 1 << 20   # bytes per slice when streaming an artifact
+BACKOFF_MAX    = 60        # longest wait (seconds) between failing worker iterations
+
+# (stage, progress %) a job reports as it moves through the worker
+STAGES = {
+    "queued":      0,
+    "aggregating": 10,
+    "rendering":   60,
+    "done":        100,
+}
+
+log = logging.getLogger(__name__)
+
+_available = None
+
+_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS analytics.report_jobs (
+        id           uuid PRIMARY KEY,
+        status       text NOT NULL DEFAULT 'queued',   -- queued | running | done | failed
+        stage        text NOT NULL DEFAULT 'queued',
+        progress     smallint NOT NULL DEFAULT 0,
+        filters      jsonb NOT NULL,
+        filename     text NOT NULL,
+        attempts     integer NOT NULL DEFAULT 0,
+        error        text,
+        artifact     bytea,
+        created_at   timestamptz NOT NULL DEFAULT now(),
+        started_at   timestamptz,
+        heartbeat_at timestamptz,
+        finished_at  timestamptz
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_report_jobs_queued "
+    "ON analytics.report_jobs (created_at) WHERE status IN ('queued', 'running')",
+    # DOCX is already deflated; uncompressed TOAST lets substring() read slices
+    "ALTER TABLE analytics.report_jobs ALTER COLUMN artifact SET STORAGE EXTERNAL",
+]
+
+_STATUS_COLUMNS = """
+    id::text AS id, status, stage, progress, filters, filename, attempts, error,
+    octet_length(artifact) AS size, created_at, started_at, finished_at
+"""
+
+
+# ── Schema ────────────────────────────────────────────────────────────────────
+
+def apply(cur):
+    """Create the job table (called by migrations.apply)."""
+    global _available
+    for statement in _DDL:
+        cur.execute(statement)
+    _available = True
+
+
+def available() -> bool:
+    """Whether analytics.report_jobs exists (cached per process once it does)."""
+    global _available
+    if not _available:
+        with database.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT to_regclass('analytics.report_jobs') IS NOT NULL AS ok")
+                _available = cur.fetchone()["ok"]
+    return _available
+
+
+# ── Jobs ──────────────────────────────────────────────────────────────────────
+
+def submit(filename, major_filter=None, school_filter=None, term_filter=None) -> dict:
+    """Queue a report job for the filters; returns its status row."""
+    filters = {"major": major_filter, "school": school_filter, "term": term_filter}
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                INSERT INTO analytics.report_jobs (id, filters, filename)
+                VALUES (%s, %s, %s)
+                RETURNING {_STATUS_COLUMNS}
+            """, (uuid.uuid4(), Jsonb(filters), filename))
+            job = cur.fetchone()
+        conn.commit()
+    workers.wake()
+    return job
+
+
+def get(job_id) -> dict | None:
+    """Status row of a job (without the artifact), or None."""
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT {_STATUS_COLUMNS} FROM analytics.report_jobs WHERE id = %s",
+                        (job_id,))
+            return cur.fetchone()
+
+
+def iter_artifact(job_id, size, chunk_size=ARTIFACT_CHUNK):
+    """
+    Yield the `size` bytes of a finished job's DOCX in slices, each read
+    on its own pooled connection so a slow client does not hold one.
+    """
+    for offset in range(0, size, chunk_size):
+        with database.get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT substring(artifact FROM %s FOR %s) AS chunk "
+                            "FROM analytics.report_jobs WHERE id = %s",
+                            (offset + 1, chunk_size, job_id))
+                row = cur.fetchone()
+        if row is None or not row["chunk"]:
+            raise RuntimeError(f"report job {job_id} artifact was purged while streaming")
+        yield bytes(row["chunk"])
+
+
+def recent(limit=20) -> list:
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                SELECT {_STATUS_COLUMNS} FROM analytics.report_jobs
+                ORDER BY created_at DESC LIMIT %s
+            """, (limit,))
+            return cur.fetchall()
+
+
+def _claim() -> dict | None:
+    """
+    Claim the oldest queued job — or a running one whose worker stopped
+    heartbeating — and mark it running; None when there is nothing to do.
+    Jobs out of attempts are failed instead of claimed.
+    """
+    with database.get_db_connection() as conn:
+        with conn.transaction(), conn.cursor() as cur:
+            cur.execute("""
+                UPDATE analytics.report_jobs
+                SET status = 'failed', finished_at = now(),
+                    error = 'worker stopped responding after ' || attempts || ' attempts'
+                WHERE status = 'running' AND attempts >= %(attempts)s
+                  AND heartbeat_at < now() - make_interval(secs => %(lease)s)
+            """, {"attempts": ATTEMPTS, "lease": LEASE})
+            cur.execute("""
+                UPDATE analytics.report_jobs j
+                SET status = 'running', stage = 'aggregating', progress = %(progress)s,
+                    attempts = j.attempts + 1, error = NULL,
+                    started_at = now(), heartbeat_at = now()
+                WHERE id = (
+                    SELECT id FROM analytics.report_jobs
+                    WHERE status = 'queued'
+                       OR (status = 'running'
+                           AND heartbeat_at < now() - make_interval(secs => %(lease)s))
+                    ORDER BY created_at
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, filters, attempts
+            """, {"progress": STAGES["aggregating"], "lease": LEASE})
+            return cur.fetchone()
+
+
+def _update(job, sql, params=()) -> bool:
+    """Apply `SET sql` to a job this worker still owns (not reclaimed since); whether it did."""
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"""
+                UPDATE analytics.report_jobs SET {sql}, heartbeat_at = now()
+                WHERE id = %s AND status = 'running' AND attempts = %s
+            """, (*params, job["id"], job["attempts"]))
+            owned = cur.rowcount == 1
+        conn.commit()
+    return owned
+
+
+def _heartbeat(job, stop: threading.Event):
+    while not stop.wait(LEASE / 4):
+        try:
+            _update(job, "progress = progress")
+        except psycopg.Error:
+            log.warning("report job %s: heartbeat failed", job["id"], exc_info=True)
+
+
+def _stage(job, stage):
+    _update(job, "stage = %s, progress = %s", (stage, STAGES[stage]))
+
+
+def run(job):
+    """Aggregate and render a claimed job, then store the artifact or the error."""
+    filters = job["filters"]
+    args = (filters["major"], filters["school"], filters["term"])
+    stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(job, stop), daemon=True).start()
+    try:
+        data = result_cache.results.get_or_compute(
+            result_cache.cache_key("report/data", *args),
+            lambda: report.aggregate_report_data(*args),
+        )
+        _stage(job, "rendering")
+        content = report.generate_report_docx(data)
+        _update(job, "status = 'done', stage = 'done', progress = %s, artifact = %s, "
+                     "finished_at = now()", (STAGES["done"], content))
+    except Exception as e:
+        log.exception("report job %s failed", job["id"])
+        _update(job, "status = 'failed', error = %s, finished_at = now()", (f"{type(e).__name__}: {e}",))
+    finally:
+        stop.set()
+
+
+def _release(job):
+    """
+    Requeue a job whose worker hit an unexpected error outside run()'s own
+    handling (e.g. the database went away mid-update), or fail it once out
+    of attempts. If this update fails too, the job is reclaimed when its
+    lease expires.
+    """
+    try:
+        _update(job, """
+            status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'queued' END,
+            finished_at = CASE WHEN attempts >= %s THEN now() END,
+            stage = 'queued', progress = 0,
+            error = 'worker error after ' || attempts || ' attempts'
+        """, (ATTEMPTS, ATTEMPTS))
+    except psycopg.Error:
+        log.warning("report job %s: release failed; reclaimed after its lease", job["id"], exc_info=True)
+
+
+def purge() -> int:
+    """Delete finished jobs older than RETENTION; returns how many."""
+    with database.get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("""
+                DELETE FROM analytics.report_jobs
+                WHERE status IN ('done', 'failed')
+                  AND finished_at < now() - make_interval(secs => %s)
+            """, (RETENTION,))
+            purged = cur.rowcount
+        conn.commit()
+    return purged
+
+
+# ── Workers ───────────────────────────────────────────────────────────────────
+
+class JobWorkers:
+    """Threads that claim and run jobs until stopped; woken early by submit()."""
+
+    def __init__(self):
+        self._threads = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def start(self, count=WORKERS):
+        self._stop.clear()
+        for i in range(count - len(self._threads)):
+            thread = threading.Thread(target=self._loop, name=f"report-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Stop claiming jobs and wait for running ones (a lost job is reclaimed after LEASE)."""
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def wake(self):
+        self._wake.set()
+
+    def _loop(self):
+        failures = 0
+        while not self._stop.is_set():
+            job = None
+            try:
+                if available():
+                    job = _claim()
+                    if job is None:
+                        purge()
+                if job is not None:
+                    run(job)
+            except Exception:
+                # Never let an error end the thread: queued jobs would wait forever
+                log.exception("report jobs: worker iteration failed")
+                if job is not None:
+                    _release(job)
+                failures += 1
+                self._stop.wait(min(POLL * 2 ** (failures - 1), BACKOFF_MAX))
+                continue
+            failures = 0
+            if job is not None:
+                continue
+            self._wake.wait(POLL)
+            self._wake.clear()
+
+
+workers = JobWorkers()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Background report jobs")
+    parser.add_argument("command", choices=["work", "list"])
+    parser.add_argument("--workers", type=int, default=max(WORKERS, 1))
+    args = parser.parse_args()
+    if args.command == "list":
+        for job in recent():
+            print(f"{job['id']}  {job['status']:<8} {job['stage']:<12} {job['progress']:>3}%  "
+                  f"{job['created_at']:%Y-%m-%d %H:%M:%S}  {job['filename']}"
+                  + (f"  {job['error']}" if job["error"] else ""))
+        return
+    logging.basicConfig(level=logging.INFO)
+    workers.start(args.workers)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        workers.stop()
+
+
+if __name__ == "__main__":
+    main()
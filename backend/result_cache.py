@@ -0,0 +1,143 @@
+"""
+In-process LRU cache of report and dashboard results.
+
+/api/report/data, /api/dashboard and /api/dashboard/majors are pure
+functions of their filters and the data, so results are cached under the
+normalized (endpoint, majors, school, terms) key. Generated DOCX files are
+kept on disk instead (artifacts.py). Empty filters normalize to "no filter", as in
+database._cohort_filter_clauses; non-empty filters are kept as given
+because the report metadata and DOCX title echo them in request order and
+case. The frontend sends the same parameters for the same selection, so
+repeat views still hit.
+
+Concurrent misses for the same key share one computation (singleflight.py).
+
+Master saves and deletes (sync or async) drop every entry whose term and
+major filters could include the written student — see
+database.add_master_write_listener. Writes that bypass the API (source
+imports, other worker processes) are bounded by RESULT_CACHE_TTL.
+
+    RESULT_CACHE_SIZE=64     # entries kept (LRU eviction); 0 disables caching
+    RESULT_CACHE_TTL=900     # seconds an entry may be served
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import database
+import singleflight
+
+MAX_ENTRIES = int(os.getenv("RESULT_CACHE_SIZE", "64"))
+TTL         = float(os.getenv("RESULT_CACHE_TTL", "900"))
+
+
+def _filter_values(values):
+    if isinstance(values, str):
+        values = [values]
+    return tuple(values) if values else None
+
+
+def cache_key(endpoint, major_filter=None, school_filter=None, term_filter=None) -> tuple:
+    """Normalized cache key for an endpoint's filters."""
+    return (endpoint, _filter_values(major_filter), school_filter or None, _filter_values(term_filter))
+
+
+class ResultCache:
+    """Thread-safe LRU of computed results with hit / miss / eviction counters."""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+        self._generation = 0             # bumped by every invalidate()
+
+    def get(self, key):
+        """(True, value) for a live entry, else (False, None); counts the hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, generation=None):
+        """Store `value`; skipped if an invalidation ran since `generation` was read."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _compute(self, key, compute):
+        generation = self._generation
+        value = compute()
+        # A write that landed mid-compute may not be in `value`: put() skips it
+        self.put(key, value, generation)
+        return value
+
+    def get_or_compute(self, key, compute):
+        """Cached value for `key`; on a miss, computed once per concurrent flight (singleflight.py)."""
+        hit, value = self.get(key)
+        if hit:
+            return value
+        return singleflight.flights.do(key, lambda: self._compute(key, compute))
+
+    async def get_or_compute_async(self, key, compute):
+        """get_or_compute for async handlers; `compute` runs in a worker thread."""
+        hit, value = self.get(key)
+        if hit:
+            return value
+        return await singleflight.flights.do_async(key, lambda: self._compute(key, compute))
+
+    def invalidate(self, term=None, major=None) -> int:
+        """
+        Drop entries whose filters could include a student of `term` with
+        demographics major `major` (None: a student without a major). School
+        is not known at write time, so it never narrows the match.
+        """
+        major = (major or "").lower()
+        with self._lock:
+            self._generation += 1
+            stale = [
+                key for key in self._entries
+                if (key[3] is None or term in key[3])
+                and (key[1] is None or (major and any(m.lower() in major for m in key[1])))
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries":       len(self._entries),
+                "max_entries":   self.max_entries,
+                "ttl_seconds":   self.ttl,
+                "hits":          self.hits,
+                "misses":        self.misses,
+                "hit_rate":      round(self.hits / lookups, 3) if lookups else None,
+                "evictions":     self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+results = ResultCache()
+
+database.add_master_write_listener(
+    lambda student_id, graduation_term, major: results.invalidate(graduation_term, major)
+)
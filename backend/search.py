@@ -0,0 +1,105 @@
+"""
+Typeahead search over demographics (name / UID), backed by pg_trgm.
+
+migrations.py creates GIN trigram indexes on the normalized expressions
+used here and in database._build_demo_where — lower(payload->>'name'),
+uid::text, lower(payload->>'major1_major'), lower(payload->>'major1_coll') —
+so substring (LIKE '%foo%') and fuzzy (word similarity) matches are index
+scans instead of a full pass over demographics with per-row JSONB parsing.
+
+When pg_trgm is not installed the search degrades to substring matching
+with prefix-based ranking; results are still correct, just not fuzzy.
+"""
+
+import database_async
+
+MIN_QUERY_LENGTH = 2
+MAX_RESULTS = 50
+
+_trgm_available = None
+
+
+def _like_escape(text: str) -> str:
+    """Escape LIKE wildcards so user input matches literally."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def normalize_query(q: str) -> str:
+    """Collapse whitespace and lower-case, matching the indexed expressions."""
+    return " ".join((q or "").split()).lower()
+
+
+def _search_query(q: str, limit: int, term_filter=None, trgm=True):
+    """
+    SQL + params for ranked typeahead matches on name and UID.
+
+    Score: exact UID prefix 1.0, name prefix 0.9, otherwise pg_trgm
+    word similarity of the query to the name (0 without pg_trgm).
+    """
+    contains = f"%{_like_escape(q)}%"
+    prefix = f"{_like_escape(q)}%"
+
+    fuzzy_score, fuzzy_match, fuzzy_params = "0", "", []
+    if trgm:
+        fuzzy_score = "word_similarity(%s, lower(d.payload->>'name'))"
+        fuzzy_match = "OR lower(d.payload->>'name') %%> %s"
+        fuzzy_params = [q]
+
+    term_clause, term_params = "", []
+    if term_filter:
+        term_clause = "AND d.term = ANY(%s)"
+        term_params = [list(term_filter)]
+
+    query = f"""
+        SELECT uid, term, name, major, school, score
+        FROM (
+            SELECT DISTINCT ON (d.uid, d.term)
+                d.uid::text                    AS uid,
+                d.term,
+                d.payload->>'name'             AS name,
+                d.payload->>'major1_major'     AS major,
+                d.payload->>'major1_coll'      AS school,
+                GREATEST(
+                    CASE WHEN d.uid::text LIKE %s THEN 1.0 ELSE 0 END,
+                    CASE WHEN lower(d.payload->>'name') LIKE %s THEN 0.9 ELSE 0 END,
+                    {fuzzy_score}
+                ) AS score
+            FROM src.src_demographics d
+            WHERE d.uid IS NOT NULL
+              AND (lower(d.payload->>'name') LIKE %s
+                   OR d.uid::text LIKE %s
+                   {fuzzy_match})
+              {term_clause}
+        ) matches
+        ORDER BY score DESC, name NULLS LAST, uid, term
+        LIMIT %s
+    """
+    params = [prefix, prefix] + fuzzy_params + [contains, contains] + fuzzy_params \
+        + term_params + [limit]
+    return query, params
+
+
+async def _has_trgm(cur) -> bool:
+    """Whether pg_trgm is installed in the connected database (cached per process)."""
+    global _trgm_available
+    if _trgm_available is None:
+        await cur.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        _trgm_available = await cur.fetchone() is not None
+    return _trgm_available
+
+
+async def typeahead(q: str, limit: int = 10, term_filter=None) -> list:
+    """Ranked name / UID matches for the search box."""
+    q = normalize_query(q)
+    if len(q) < MIN_QUERY_LENGTH:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+
+    async with database_async.get_db_connection() as conn:
+        async with conn.cursor() as cur:
+            trgm = await _has_trgm(cur)
+            await cur.execute(*_search_query(q, limit, term_filter, trgm))
+            return [
+                {**row, "score": round(float(row["score"]), 3)}
+                for row in await cur.fetchall()
+            ]
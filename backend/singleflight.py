@@ -0,0 +1,147 @@
+"""
+Single-flight coalescing of identical in-flight computations.
+
+When a term closes, many advisors open the same dashboard or download the
+same report at once. Concurrent calls with the same key share one
+computation: the first caller (the leader) runs it and every caller that
+arrives while it is running waits for, and receives, the leader's result —
+or its exception. Once the flight lands, the next call starts a new one.
+
+One flight table serves both handler styles: do() for sync code and
+do_async() for async handlers, which run the leader in a worker thread and
+wait without holding one, so a sync and an async request for the same key
+also coalesce. An async waiter that is cancelled (its client went away)
+stops waiting without cancelling the flight for everyone else.
+
+    python singleflight.py check    # coalescing and cancellation self-check
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Per-key in-flight call table shared by sync and async callers."""
+
+    def __init__(self):
+        self._flights = {}   # key -> Future of the running computation
+        self._lock = threading.Lock()
+        self.leaders = self.shared = 0
+
+    def _join(self, key):
+        """(future, is_leader) for `key`, starting a new flight if none is running."""
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = self._flights[key] = Future()
+            self.leaders += 1
+            return future, True
+
+    def _run(self, key, future, fn):
+        # Running futures cannot be cancelled, so no waiter can abort the flight
+        future.set_running_or_notify_cancel()
+        try:
+            result = fn()
+        except BaseException as e:
+            error = e
+        else:
+            error = None
+        # Land the flight before resolving it, so later callers start a fresh one
+        with self._lock:
+            del self._flights[key]
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def do(self, key, fn):
+        """fn() — or the result of the identical call already in flight."""
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, future, fn)
+        return future.result()
+
+    async def do_async(self, key, fn):
+        """do() for async handlers: the leader runs fn in a worker thread."""
+        future, leader = self._join(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(None, self._run, key, future, fn)
+        # Shielded: cancelling this waiter must not cancel the shared future
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"in_flight": len(self._flights), "leaders": self.leaders, "shared": self.shared}
+
+
+flights = SingleFlight()
+
+
+# ── Self-check ────────────────────────────────────────────────────────────────
+
+async def _check_cancelled_waiter(waiters=5) -> bool:
+    """One of `waiters` coalesced async callers is cancelled; the rest still get the result."""
+    table = SingleFlight()
+    release = threading.Event()
+
+    def compute():
+        release.wait(5)
+        return 42
+
+    tasks = [asyncio.create_task(table.do_async("key", compute)) for _ in range(waiters)]
+    await asyncio.sleep(0.05)
+    tasks[0].cancel()
+    await asyncio.sleep(0.05)
+    release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    return (isinstance(results[0], asyncio.CancelledError)
+            and results[1:] == [42] * (waiters - 1)
+            and table.stats() == {"in_flight": 0, "leaders": 1, "shared": waiters - 1})
+
+
+def _check_coalesced(callers=8) -> bool:
+    """Concurrent sync callers of one key share a single computation."""
+    table = SingleFlight()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(table.do("key", compute)))
+               for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(calls) == 1 and results == ["done"] * callers
+
+
+def check() -> bool:
+    passed = True
+    for label, ok in [
+        ("coalesced sync callers", _check_coalesced()),
+        ("cancelled async waiter", asyncio.run(_check_cancelled_waiter())),
+    ]:
+        passed &= ok
+        print(f"  {'ok  ' if ok else 'FAIL'} {label}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-flight call coalescing")
+    parser.add_argument("command", choices=["check"])
+    parser.parse_args()
+    sys.exit(0 if check() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Mergeable quantile sketches for salary and wage percentiles.
+
+A QuantileSketch summarizes a multiset of numbers so that sketches built
+over different partitions (terms, majors, schools — see cube.py) can be
+merged and queried for percentiles without re-reading the students, and
+stored compactly (to_json / from_json, the jsonb columns of the cube).
+
+Exact mode: the sketch keeps a value → count histogram. Survey salaries
+are answered in a small set of ranges and wages are typed by hand, so for
+real cohorts the histogram stays small, merging is exact, and quantile()
+returns exactly what report._percentile returns on the sorted raw values.
+
+Compacted mode: once the histogram holds more than `limit` distinct
+values, every value is replaced by the representative of its logarithmic
+bucket (gamma^(i-1), gamma^i], gamma = (1 + alpha) / (1 - alpha), as in
+DDSketch. The mapping is monotone, so the value at every rank becomes its
+bucket representative, which is within a relative error of `alpha` of the
+true value; quantile() interpolates between two such values and so is
+within alpha of report._percentile as well (for same-signed values).
+Buckets are fixed, so merging compacted sketches is exact and adds no
+error, and the size is bounded by the value range: log(max / min) /
+log(gamma) buckets, ~1,400 for $1–$1M at the default alpha of 0.5%.
+error_bound() reports alpha for compacted sketches and 0 for exact ones.
+
+    python sketches.py check    # compare against report._percentile on random data
+"""
+
+import argparse
+import math
+import random
+import sys
+
+EXACT_LIMIT       = 2048    # distinct values kept exactly before compacting
+RELATIVE_ACCURACY = 0.005   # alpha of compacted sketches
+
+
+class QuantileSketch:
+    """Mergeable value → count histogram with report._percentile-compatible quantiles."""
+
+    __slots__ = ("_counts", "count", "limit", "alpha", "compacted", "_log_gamma")
+
+    def __init__(self, values=(), limit=EXACT_LIMIT, alpha=RELATIVE_ACCURACY):
+        self._counts = {}
+        self.count = 0
+        self.limit = limit
+        self.alpha = alpha
+        self.compacted = False
+        self._log_gamma = math.log((1 + alpha) / (1 - alpha))
+        for value in values:
+            self.add(value)
+
+    def add(self, value, weight=1):
+        if self.compacted:
+            value = self._bucket(value)
+        self._counts[value] = self._counts.get(value, 0) + weight
+        self.count += weight
+        if not self.compacted and len(self._counts) > self.limit:
+            self._compact()
+
+    def merge(self, other: "QuantileSketch"):
+        """Add `other` into this sketch; compacted sketches should share alpha."""
+        if other.compacted and not self.compacted:
+            self._compact()
+        for value, weight in other._counts.items():
+            self.add(value, weight)
+        return self
+
+    def error_bound(self) -> float:
+        """Relative error bound of quantile() against the exact percentile (0.0 in exact mode)."""
+        return self.alpha if self.compacted else 0.0
+
+    def _bucket(self, value):
+        """Representative of the logarithmic bucket holding `value` (sign-symmetric, 0 exact)."""
+        if not value:
+            return 0.0
+        magnitude = abs(value)
+        i = math.ceil(math.log(magnitude) / self._log_gamma)
+        rep = 2 * math.exp(i * self._log_gamma) / (1 + math.exp(self._log_gamma))
+        return rep if value > 0 else -rep
+
+    def _compact(self):
+        """Switch to bucketed mode, folding the exact histogram into its buckets."""
+        counts, self._counts = self._counts, {}
+        self.compacted = True
+        self.count = 0
+        for value, weight in counts.items():
+            self.add(value, weight)
+
+    def _value_at(self, items, rank):
+        """The value at 0-based `rank` of the sorted expansion of `items`."""
+        seen = 0
+        for value, weight in items:
+            seen += weight
+            if rank < seen:
+                return value
+        return items[-1][0]
+
+    def quantile(self, p):
+        """p-th percentile (0-100), interpolated like report._percentile; None when empty."""
+        if not self.count:
+            return None
+        items = sorted(self._counts.items())
+        idx = (self.count - 1) * p / 100
+        lo, hi = int(idx), min(int(idx) + 1, self.count - 1)
+        v_lo, v_hi = self._value_at(items, lo), self._value_at(items, hi)
+        return v_lo + (v_hi - v_lo) * (idx - lo)
+
+    def to_json(self) -> dict:
+        items = sorted(self._counts.items())
+        data = {"values": [v for v, _ in items], "counts": [c for _, c in items]}
+        if self.compacted:
+            data["alpha"] = self.alpha
+        return data
+
+    @classmethod
+    def from_json(cls, data, limit=EXACT_LIMIT) -> "QuantileSketch":
+        sketch = cls(limit=limit, alpha=(data or {}).get("alpha", RELATIVE_ACCURACY))
+        if data:
+            sketch._counts = dict(zip(data["values"], data["counts"]))
+            sketch.count = sum(data["counts"])
+            sketch.compacted = "alpha" in data
+        return sketch
+
+
+# ── Verification ──────────────────────────────────────────────────────────────
+
+_PERCENTILES = (0, 10, 25, 50, 75, 90, 100)
+
+# (label, value generator) — salary-range midpoints, whole-dollar wages, continuous
+_DISTRIBUTIONS = [
+    ("salary ranges", lambda rng: rng.choice([22500.0, 32500.0, 42500.0, 55000.0,
+                                              67500.0, 87500.0, 112500.0, 150000.0])),
+    ("hourly wages",  lambda rng: float(rng.randint(8, 60))),
+    ("lognormal",     lambda rng: rng.lognormvariate(11, 0.5)),
+]
+
+
+def _within_bound(sketch, exact, p):
+    """Whether sketch.quantile(p) is within the documented relative error of `exact`."""
+    return abs(sketch.quantile(p) - exact) <= sketch.error_bound() * abs(exact) * (1 + 1e-9)
+
+
+def check(sizes=(1, 2, 5, 100, 20000), partitions=7, limit=256, seed=11) -> bool:
+    """
+    Against report._percentile on the sorted raw values: exact-mode sketches
+    (built whole and merged from partitions) must match exactly; compacted
+    sketches (a small `limit`) must stay within their relative error bound.
+    """
+    from report import _percentile
+
+    rng = random.Random(seed)
+    passed = True
+    for label, draw in _DISTRIBUTIONS:
+        for n in sizes:
+            values = [draw(rng) for _ in range(n)]
+            sorted_vals = sorted(values)
+            exact = [_percentile(sorted_vals, p) for p in _PERCENTILES]
+
+            whole = QuantileSketch(values, limit=max(n, EXACT_LIMIT))
+            merged = QuantileSketch(limit=max(n, EXACT_LIMIT))
+            for i in range(partitions):
+                merged.merge(QuantileSketch(values[i::partitions], limit=max(n, EXACT_LIMIT)))
+            exact_ok = all(not s.compacted and [s.quantile(p) for p in _PERCENTILES] == exact
+                           for s in (whole, merged))
+
+            compact = QuantileSketch(limit=limit)
+            for i in range(partitions):
+                compact.merge(QuantileSketch(values[i::partitions], limit=limit))
+            compact = QuantileSketch.from_json(compact.to_json(), limit=limit)
+            bound_ok = all(_within_bound(compact, e, p) for e, p in zip(exact, _PERCENTILES))
+
+            ok = exact_ok and bound_ok
+            passed &= ok
+            print(f"  {'ok  ' if ok else 'FAIL'} {label:<14} n={n:<6} "
+                  f"exact {'=' if exact_ok else '!='} _percentile, "
+                  f"compacted to {len(compact._counts)} buckets "
+                  f"(error <= {compact.error_bound():.1%}) "
+                  f"{'within' if bound_ok else 'OUTSIDE'} bound")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mergeable quantile sketches")
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--limit", type=int, default=256,
+                        help="distinct-value limit for the compacted sketches")
+    args = parser.parse_args()
+    sys.exit(0 if check(limit=args.limit) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import type { Student } from './types';
+import type { Student, SourceName } from './types';
 
 const API_BASE_URL = '/api';
 
@@ -11,17 +11,33 @@ interface GetStudentsParams {
   sources?: string[];
   limit?: number;
   offset?: number;
+  /** Keyset cursor from a previous response's `next_cursor` (overrides offset) */
+  after?: string;
+  /** How `total` is computed: exact (default), planner estimate, or skipped */
+  count?: 'exact' | 'estimate' | 'none';
+  /** 'summary' returns per-source counts/badges instead of full payloads */
+  view?: 'full' | 'summary';
 }
 
 interface GetStudentsResponse {
   count: number;
-  total: number;
-  offset: number;
+  total: number | null;
+  offset: number | null;
   limit: number;
   has_more: boolean;
+  next_cursor: string | null;
   students: Student[];
 }
 
+export interface SearchResult {
+  uid: string;
+  term: string;
+  name: string | null;
+  major: string | null;
+  school: string | null;
+  score: number;
+}
+
 export const api = {
   /**
    * Fetch students with optional filters and pagination
@@ -36,6 +52,9 @@ export const api = {
     if (params?.sources?.length) params.sources.forEach(s => queryParams.append('sources', s));
     if (params?.limit !== undefined) queryParams.append('limit', params.limit.toString());
     if (params?.offset !== undefined) queryParams.append('offset', params.offset.toString());
+    if (params?.after) queryParams.append('after', params.after);
+    if (params?.count) queryParams.append('count', params.count);
+    if (params?.view) queryParams.append('view', params.view);
 
     const url = `${API_BASE_URL}/students${queryParams.toString() ? '?' + queryParams.toString() : ''}`;
     const response = await fetch(url, { signal });
@@ -45,6 +64,9 @@ export const api = {
     }
 
     const data: GetStudentsResponse = await response.json();
+    // Summary rows carry `sources` instead of the *_data lists; those are
+    // loaded per student with getStudentSource when a card is expanded
+    if (params?.view === 'summary') return data;
     // Normalize null source arrays to empty arrays so demographics-only
     // students still render as valid student cards
     data.students = data.students.map((s) => ({
@@ -56,6 +78,39 @@ export const api = {
     return data;
   },
 
+  /**
+   * Ranked typeahead matches on name or UID (best match first)
+   */
+  async searchStudents(q: string, limit = 10, signal?: AbortSignal): Promise<SearchResult[]> {
+    const queryParams = new URLSearchParams({ q, limit: limit.toString() });
+    const response = await fetch(`${API_BASE_URL}/search/students?${queryParams.toString()}`, { signal });
+
+    if (!response.ok) {
+      throw new Error(`Failed to search students: ${response.statusText}`);
+    }
+
+    const data: { query: string; results: SearchResult[] } = await response.json();
+    return data.results;
+  },
+
+  /**
+   * Fetch one student's full rows (with payloads) from a single source
+   */
+  async getStudentSource<S extends SourceName>(
+    uid: string,
+    source: S,
+    signal?: AbortSignal,
+  ): Promise<NonNullable<Student[`${S}_data`]>> {
+    const response = await fetch(`${API_BASE_URL}/students/${uid}/sources/${source}`, { signal });
+
+    if (!response.ok) {
+      throw new Error(`Failed to fetch ${source} data: ${response.statusText}`);
+    }
+
+    const data = await response.json();
+    return data.records;
+  },
+
   /**
    * Fetch a single student by UID
    */
@@ -1,4 +1,5 @@
 import React, { useState } from 'react';
+import { api } from '../api';
 import {
   Card,
   CardContent,
@@ -15,7 +16,7 @@ import EditIcon from '@mui/icons-material/Edit';
 import DeleteIcon from '@mui/icons-material/Delete';
 import AddIcon from '@mui/icons-material/Add';
 import CheckCircleIcon from '@mui/icons-material/CheckCircle';
-import type { Student } from '../types';
+import type { Student, SourceName } from '../types';
 import { MAJOR_COMPOUND_TO_NAME, MAJOR_CODE_TO_NAME, SCHOOL_CODE_TO_NAME } from '../majorData';
 import { DataSourceCard } from './DataSourceCard';
 import { AddManuallyDialog } from './AddManuallyDialog';
@@ -41,6 +42,11 @@ const slideDown = keyframes`
   }
 `;
 
+type SourceRows = Pick<Student, 'qualtrics_data' | 'linkedin_data' | 'clearinghouse_data'>;
+
+const isPresent = (value: unknown): boolean =>
+  value != null && String(value).trim() !== '' && String(value).toUpperCase() !== 'NULL';
+
 interface StudentCardProps {
   student: Student;
   onSelectSource: (studentId: string, source: 'qualtrics' | 'linkedin' | 'clearinghouse') => void;
@@ -62,26 +68,50 @@ export const StudentCard: React.FC<StudentCardProps> = ({
   const [addManualOpen, setAddManualOpen] = useState(false);
   const [editMasterOpen, setEditMasterOpen] = useState(false);
 
+  // Source rows fetched on first expand when the list was loaded with view=summary
+  const [loadedRows, setLoadedRows] = useState<SourceRows>({});
+  const [loadingSources, setLoadingSources] = useState(false);
+  const summary = student.sources;
+  const rows: SourceRows = { ...student, ...loadedRows };
+
+  const loadSourceRows = async () => {
+    if (!summary || loadingSources || Object.keys(loadedRows).length) return;
+    const sources = (['qualtrics', 'linkedin', 'clearinghouse'] as SourceName[])
+      .filter((source) => summary[source].count > 0);
+    setLoadingSources(true);
+    try {
+      const fetched = await Promise.all(sources.map((source) => api.getStudentSource(student.uid, source)));
+      setLoadedRows(Object.fromEntries(sources.map((source, i) => [`${source}_data`, fetched[i]])) as SourceRows);
+    } catch (err) {
+      console.error('Error fetching source data:', err);
+    } finally {
+      setLoadingSources(false);
+    }
+  };
+
   const handleExpandClick = () => {
+    if (!expanded) loadSourceRows();
     setExpanded(!expanded);
   };
 
-  const hasQualtricsStatus: boolean = !!(student.qualtrics_data && student.qualtrics_data.length > 0 &&
-    (() => {
-      const status = student.qualtrics_data![0].payload?.STATUS;
-      return status != null && String(status).trim() !== '' && String(status).toUpperCase() !== 'NULL';
-    })());
+  const hasQualtricsStatus: boolean = summary
+    ? isPresent(summary.qualtrics.status)
+    : !!(rows.qualtrics_data && rows.qualtrics_data.length > 0 &&
+        isPresent(rows.qualtrics_data[0].payload?.STATUS));
+
+  const hasLinkedInUrl: boolean = summary
+    ? isPresent(summary.linkedin.profile_url)
+    : !!(rows.linkedin_data && rows.linkedin_data.length > 0 &&
+      (() => {
+        const p = rows.linkedin_data![0].payload;
+        return isPresent(p?.linkedin_url || p?.url || p?.profile_url);
+      })());
 
-  const hasLinkedInUrl: boolean = !!(student.linkedin_data && student.linkedin_data.length > 0 &&
-    (() => {
-      const p = student.linkedin_data![0].payload;
-      const url = p?.linkedin_url || p?.url || p?.profile_url;
-      return url && String(url).trim() !== '' && String(url).toUpperCase() !== 'NULL';
-    })());
+  const hasClearinghouse: boolean = summary
+    ? summary.clearinghouse.count > 0
+    : !!(rows.clearinghouse_data && rows.clearinghouse_data.length > 0);
 
-  const hasData = hasQualtricsStatus ||
-                  hasLinkedInUrl ||
-                  (student.clearinghouse_data && student.clearinghouse_data.length > 0);
+  const hasData = hasQualtricsStatus || hasLinkedInUrl || hasClearinghouse;
   const hasMasterData = student.masterData != null;
 
   return (
@@ -270,7 +300,7 @@ export const StudentCard: React.FC<StudentCardProps> = ({
                     }}
                   />
                 )}
-                {student.clearinghouse_data && student.clearinghouse_data.length > 0 && (
+                {hasClearinghouse && (
                   <Chip
                     label="ClearingHouse"
                     size="small"
@@ -282,7 +312,7 @@ export const StudentCard: React.FC<StudentCardProps> = ({
                     }}
                   />
                 )}
-                {!hasQualtricsStatus && !hasLinkedInUrl && !(student.clearinghouse_data?.length) && (
+                {!hasData && (
                   <Chip
                     label="No Source"
                     size="small"
@@ -370,39 +400,44 @@ export const StudentCard: React.FC<StudentCardProps> = ({
                   gap={3}
                   sx={{ mb: 3 }}
                 >
-                  {hasQualtricsStatus && (
+                  {loadingSources && (
+                    <Typography variant="body2" color="text.secondary">
+                      Loading source data…
+                    </Typography>
+                  )}
+                  {hasQualtricsStatus && rows.qualtrics_data?.length ? (
                     <Box sx={{ animation: `${slideDown} 0.6s ease-out` }}>
                       <DataSourceCard
                         type="qualtrics"
-                        data={student.qualtrics_data![0]}
+                        data={rows.qualtrics_data[0]}
                         onSelect={() => onSelectSource(student.uid, 'qualtrics')}
                         isSelected={student.masterData?.selectedSource === 'qualtrics'}
                         disabled={isSaving}
                       />
                     </Box>
-                  )}
-                  {hasLinkedInUrl && (
+                  ) : null}
+                  {hasLinkedInUrl && rows.linkedin_data?.length ? (
                     <Box sx={{ animation: `${slideDown} 0.7s ease-out` }}>
                       <DataSourceCard
                         type="linkedin"
-                        data={student.linkedin_data![0]}
+                        data={rows.linkedin_data[0]}
                         onSelect={() => onSelectSource(student.uid, 'linkedin')}
                         isSelected={student.masterData?.selectedSource === 'linkedin'}
                         disabled={isSaving}
                       />
                     </Box>
-                  )}
-                  {student.clearinghouse_data && student.clearinghouse_data.length > 0 && (
+                  ) : null}
+                  {hasClearinghouse && rows.clearinghouse_data?.length ? (
                     <Box sx={{ animation: `${slideDown} 0.8s ease-out` }}>
                       <DataSourceCard
                         type="clearinghouse"
-                        data={student.clearinghouse_data[0]}
+                        data={rows.clearinghouse_data[0]}
                         onSelect={() => onSelectSource(student.uid, 'clearinghouse')}
                         isSelected={student.masterData?.selectedSource === 'clearinghouse'}
                         disabled={isSaving}
                       />
                     </Box>
-                  )}
+                  ) : null}
                 </Box>
                 <Box
                   display="flex"
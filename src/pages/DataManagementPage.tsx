@@ -131,6 +131,7 @@ export const DataManagementPage = () => {
         const data = await api.getStudents({
           limit: PAGE_SIZE,
           offset,
+          view: 'summary',
           name: filters.name || undefined,
           major: filters.major.length ? filters.major : undefined,
           school: filters.school || undefined,
@@ -307,6 +308,7 @@ export const DataManagementPage = () => {
         sources: ['no-source'],
         limit: 100000,
         offset: 0,
+        view: 'summary',
         name: filters.name || undefined,
         major: filters.major.length ? filters.major : undefined,
         school: filters.school || undefined,
@@ -8,9 +8,20 @@ export interface Student {
   qualtrics_data?: QualtricsResponse[];
   linkedin_data?: LinkedInPosition[];
   clearinghouse_data?: ClearingHouseRecord[];
+  /** Present instead of the *_data lists when fetched with view=summary */
+  sources?: StudentSourceSummary;
   masterData?: MasterData;
 }
 
+export type SourceName = 'qualtrics' | 'linkedin' | 'clearinghouse';
+
+// Per-source counts and badge fields returned by /api/students?view=summary
+export interface StudentSourceSummary {
+  qualtrics: { count: number; latest_recorded_at: string | null; status: string | null };
+  linkedin: { count: number; profile_url: string | null };
+  clearinghouse: { count: number };
+}
+
 // Raw data from database - payload contains actual data
 export interface QualtricsResponse {
   id: number;